@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from .exporters import ExportFile, publish_export
+from .records import CardData
+
+
+# Anki collection schema 11, the format every Anki client still imports
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+CREATE TABLE IF NOT EXISTS revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+CREATE TABLE IF NOT EXISTS graves (usn integer not null, oid integer not null, type integer not null);
+"""
+
+# created after the bulk insert, so a cold build sorts each index once instead of maintaining it per row
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_notes_usn ON notes (usn);
+CREATE INDEX IF NOT EXISTS ix_cards_usn ON cards (usn);
+CREATE INDEX IF NOT EXISTS ix_revlog_usn ON revlog (usn);
+CREATE INDEX IF NOT EXISTS ix_cards_nid ON cards (nid);
+CREATE INDEX IF NOT EXISTS ix_cards_sched ON cards (did, queue, due);
+CREATE INDEX IF NOT EXISTS ix_revlog_cid ON revlog (cid);
+CREATE INDEX IF NOT EXISTS ix_notes_csum ON notes (csum);
+"""
+
+MODEL_NAME = "Anki MCQ Generator"
+MODEL_FIELDS = ("Question", "Multiple Choice", "Correct Answers", "Extra")
+# bump together with the model definition so Anki treats it as a new note type
+MODEL_ID = 1_607_392_319_001
+
+_FRONT = "{{Question}}<br><br>{{Multiple Choice}}"
+_BACK = "{{FrontSide}}<hr id=answer>{{Correct Answers}}<br><br>{{Extra}}"
+_CSS = ".card { font-family: arial; font-size: 20px; text-align: left; color: black; background-color: white; }"
+
+_ID_MASK = (1 << 53) - 1
+_HTML_TAG = re.compile(r"<[^>]+>")
+_BATCH_SIZE = 5000
+# page cache for the sync; cold builds insert at hash-random positions
+_CACHE_KIB = 64 * 1024
+
+_ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+_ZIP_COPY_BUFFER = 1024 * 1024
+
+_collection_locks: dict[str, Lock] = {}
+_collection_locks_guard = Lock()
+
+
+@dataclass(frozen=True)
+class ApkgDelta:
+    """What one export changed in the job's persistent collection."""
+
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+
+def _digest(*parts: str) -> bytes:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).digest()
+
+
+def _stable_id(digest: bytes) -> int:
+    # kept below 2**53 so the ids survive JSON round trips in Anki's sync code
+    return int.from_bytes(digest, "big") & _ID_MASK or 1
+
+
+def _note_identity(card: CardData) -> tuple[str, int, int]:
+    """``(guid, note_id, card_id)``, all derived from one hash of the card's content.
+
+    ``extra`` is left out so a reworded rationale updates the note in place
+    instead of importing a duplicate.
+    """
+    digest = _digest(card.question, *card.multiple_choice, "\x1e", *card.correct_answers)
+    guid = base64.b64encode(digest[:9]).decode("ascii")
+    return guid, _stable_id(digest[9:17]), _stable_id(digest[17:25])
+
+
+def note_guid(card: CardData) -> str:
+    """Content-derived GUID: regenerating the same question keeps the same note in Anki."""
+    return _note_identity(card)[0]
+
+
+def _note_fields(card: CardData) -> str:
+    return "\x1f".join(
+        (card.question, "<br>".join(card.multiple_choice), "<br>".join(card.correct_answers), card.extra)
+    )
+
+
+def _sort_field(question: str) -> str:
+    return _HTML_TAG.sub("", question).strip()
+
+
+def _checksum(sort_field: str) -> int:
+    return int(hashlib.sha1(sort_field.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _collection_json(deck_name: str, deck_id: int, now: int) -> tuple[str, str, str, str]:
+    conf = {
+        "activeDecks": [1], "curDeck": 1, "newSpread": 0, "collapseTime": 1200, "timeLim": 0,
+        "estTimes": True, "dueCounts": True, "curModel": None, "nextPos": 1, "sortType": "noteFld",
+        "sortBackwards": False, "addToCur": True,
+    }
+    model = {
+        "id": MODEL_ID, "name": MODEL_NAME, "type": 0, "mod": now, "usn": -1, "sortf": 0, "did": deck_id,
+        "tags": [], "vers": [], "css": _CSS, "req": [[0, "any", [0]]],
+        "latexPre": "\\documentclass[12pt]{article}\n\\begin{document}\n", "latexPost": "\\end{document}",
+        "flds": [
+            {"name": name, "ord": ord_, "font": "Arial", "media": [], "rtl": False, "size": 20, "sticky": False}
+            for ord_, name in enumerate(MODEL_FIELDS)
+        ],
+        "tmpls": [
+            {"name": "Card 1", "ord": 0, "qfmt": _FRONT, "afmt": _BACK, "did": None, "bqfmt": "", "bafmt": ""}
+        ],
+    }
+
+    def deck(did: int, name: str) -> dict:
+        return {
+            "id": did, "name": name, "mod": now, "usn": -1, "conf": 1, "desc": "", "dyn": 0, "collapsed": False,
+            "extendNew": 10, "extendRev": 50, "newToday": [0, 0], "revToday": [0, 0], "lrnToday": [0, 0],
+            "timeToday": [0, 0],
+        }
+
+    dconf = {
+        "id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True, "timer": 0,
+        "replayq": True,
+        "new": {
+            "bury": True, "delays": [1, 10], "initialFactor": 2500, "ints": [1, 4, 7], "order": 1, "perDay": 20,
+            "separate": True,
+        },
+        "lapse": {"delays": [10], "leechAction": 0, "leechFails": 8, "minInt": 1, "mult": 0},
+        "rev": {
+            "bury": True, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500, "minSpace": 1, "perDay": 100,
+        },
+    }
+    decks = {"1": deck(1, "Default"), str(deck_id): deck(deck_id, deck_name)}
+    return json.dumps(conf), json.dumps({str(MODEL_ID): model}), json.dumps(decks), json.dumps({"1": dconf})
+
+
+def sync_collection(conn: sqlite3.Connection, cards: Iterable[CardData], *, deck_name: str) -> ApkgDelta:
+    """Make the collection hold exactly ``cards``, in one transaction, touching only changed notes."""
+    now = int(time.time())
+    deck_id = _stable_id(_digest("deck", deck_name)[:8])
+    conn.executescript(_SCHEMA)
+    conf, models, decks, dconf = _collection_json(deck_name, deck_id, now)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current_decks = conn.execute("SELECT decks FROM col WHERE id = 1").fetchone()
+        existing = {guid: (nid, flds) for guid, nid, flds in conn.execute("SELECT guid, id, flds FROM notes")}
+        inserts: list[tuple] = []
+        card_inserts: list[tuple] = []
+        updates: list[tuple] = []
+        seen: set[str] = set()
+        unchanged = 0
+        inserted = 0
+        # new cards are shown in ``due`` order: number only the inserted ones, after those already there
+        (due,) = conn.execute("SELECT COALESCE(MAX(due) + 1, 0) FROM cards WHERE type = 0").fetchone()
+
+        for card in cards:
+            guid, nid, cid = _note_identity(card)
+            if guid in seen:
+                continue
+            seen.add(guid)
+            flds = _note_fields(card)
+            current = existing.get(guid)
+            if current is not None:
+                if current[1] == flds:
+                    unchanged += 1
+                else:
+                    sfld = _sort_field(card.question)
+                    updates.append((flds, sfld, _checksum(sfld), now, current[0]))
+                continue
+            sfld = _sort_field(card.question)
+            inserts.append((nid, guid, MODEL_ID, now, -1, "", flds, sfld, _checksum(sfld), 0, ""))
+            card_inserts.append(
+                (cid, nid, deck_id, 0, now, -1, 0, 0, due, 0, 0, 0, 0, 0, 0, 0, 0, "")
+            )
+            due += 1
+            if len(inserts) >= _BATCH_SIZE:
+                inserted += _flush_inserts(conn, inserts, card_inserts)
+
+        inserted += _flush_inserts(conn, inserts, card_inserts)
+        conn.executemany("UPDATE notes SET flds = ?, sfld = ?, csum = ?, mod = ?, usn = -1 WHERE id = ?", updates)
+        stale = [(nid,) for guid, (nid, _) in existing.items() if guid not in seen]
+        conn.executemany("DELETE FROM cards WHERE nid = ?", stale)
+        conn.executemany("DELETE FROM notes WHERE id = ?", stale)
+        conn.execute("UPDATE cards SET did = ? WHERE did != ?", (deck_id, deck_id))
+        # an export that changes nothing leaves the collection byte-identical, so its package hashes the same
+        if inserted or updates or stale or current_decks is None or str(deck_id) not in json.loads(current_decks[0]):
+            conn.execute(
+                "INSERT OR REPLACE INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, ?, ?, ?, ?, '{}')",
+                (now - now % 86400, now * 1000, now * 1000, conf, models, decks, dconf),
+            )
+        for statement in filter(str.strip, _INDEXES.split(";")):
+            conn.execute(statement)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return ApkgDelta(inserted=inserted, updated=len(updates), deleted=len(stale), unchanged=unchanged)
+
+
+def _flush_inserts(conn: sqlite3.Connection, notes: list[tuple], cards: list[tuple]) -> int:
+    count = len(notes)
+    if count:
+        # ids are hash-derived, so sorting each batch keeps B-tree inserts local
+        notes.sort()
+        cards.sort()
+        conn.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", notes)
+        conn.executemany("INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", cards)
+        notes.clear()
+        cards.clear()
+    return count
+
+
+def _collection_lock(path: str) -> Lock:
+    with _collection_locks_guard:
+        return _collection_locks.setdefault(path, Lock())
+
+
+def write_apkg(
+    cards: Iterable[CardData], export_dir: str, *, deck_name: str, collection_path: str
+) -> tuple[ExportFile, ApkgDelta]:
+    """Sync the job's persistent collection with ``cards`` and package it as an .apkg.
+
+    Re-exporting a regenerated job only writes the notes that changed; the
+    package itself is always a fresh zip of the synced collection.
+    """
+    Path(collection_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(export_dir).mkdir(parents=True, exist_ok=True)
+    with _collection_lock(os.path.abspath(collection_path)):
+        conn = sqlite3.connect(collection_path, isolation_level=None)
+        conn.execute(f"PRAGMA cache_size = -{_CACHE_KIB}")
+        try:
+            delta = sync_collection(conn, cards, deck_name=deck_name)
+        finally:
+            conn.close()
+
+        fd, tmp_path = tempfile.mkstemp(dir=export_dir, prefix="exp_", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+                # fixed entry timestamps: the same collection always zips to the same bytes
+                collection = zipfile.ZipInfo.from_file(collection_path, "collection.anki2")
+                collection.date_time = _ZIP_TIMESTAMP
+                collection.compress_type = zipfile.ZIP_DEFLATED
+                with open(collection_path, "rb") as src, package.open(collection, "w") as dst:
+                    shutil.copyfileobj(src, dst, _ZIP_COPY_BUFFER)
+                package.writestr(zipfile.ZipInfo("media", _ZIP_TIMESTAMP), "{}")
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return publish_export(tmp_path, suffix=".apkg"), delta
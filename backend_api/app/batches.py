@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import posixpath
+import zipfile
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from typing import IO
+
+from fastapi import UploadFile
+
+from .events import TERMINAL_STATUSES
+from .ingest import SpooledUpload, UploadTooLargeError, clone_spooled, spool_stream, spool_upload
+from .schemas import (
+    BatchJobSpec,
+    BatchJobStatus,
+    BatchManifest,
+    BatchSourceSpec,
+    BatchStatusResponse,
+    OutputFormat,
+    SourceType,
+)
+from .store import JobRecord, NewJob
+
+
+_SOURCE_TYPES = {".pdf": SourceType.PDF, ".png": SourceType.IMAGE, ".jpg": SourceType.IMAGE, ".jpeg": SourceType.IMAGE}
+
+
+class BatchError(ValueError):
+    """The manifest or the uploaded files don't describe a valid batch."""
+
+
+def source_type_for(filename: str) -> SourceType:
+    return _SOURCE_TYPES.get(posixpath.splitext(filename)[1].lower(), SourceType.TEXT)
+
+
+def archive_manifest(names: list[str], *, default_course: str, output_format: list[OutputFormat]) -> BatchManifest:
+    """One job per top-level folder of an archive, named after it; files at the top level form ``default_course``."""
+    jobs: dict[str, BatchJobSpec] = {}
+    for name in names:
+        folder, _, rest = name.partition("/")
+        course = folder if rest else default_course
+        job = jobs.get(course)
+        if job is None:
+            job = jobs[course] = BatchJobSpec(course_name=course, output_format=output_format)
+        job.sources.append(BatchSourceSpec(filename=name, source_type=source_type_for(name)))
+    if not jobs:
+        raise BatchError("archive has no files")
+    return BatchManifest(jobs=list(jobs.values()))
+
+
+def archive_names(archive: IO[bytes]) -> list[str]:
+    try:
+        with zipfile.ZipFile(archive) as bundle:
+            return [info.filename for info in bundle.infolist() if not info.is_dir()]
+    except zipfile.BadZipFile as exc:
+        raise BatchError("archive is not a zip file") from exc
+
+
+def spool_archive(
+    archive: IO[bytes],
+    names: set[str],
+    spool_dir: str,
+    *,
+    max_bytes: int,
+    max_total_bytes: int,
+    max_members: int,
+) -> dict[str, SpooledUpload]:
+    """Spool the archive members in ``names``, checked against the limits as they are decompressed.
+
+    Each member is held to ``max_bytes`` and all of them together to
+    ``max_total_bytes``, so a small archive can't decompress without bound;
+    more than ``max_members`` members is a ``BatchError``.
+    """
+    if len(names) > max_members:
+        raise BatchError(f"an archive holds at most {max_members} files")
+    spooled: dict[str, SpooledUpload] = {}
+    remaining = max_total_bytes
+    try:
+        with zipfile.ZipFile(archive) as bundle:
+            for name in sorted(names):
+                with bundle.open(name) as member:
+                    try:
+                        upload = spool_stream(member, spool_dir, max_bytes=min(max_bytes, remaining))
+                    except UploadTooLargeError:
+                        if remaining < max_bytes:
+                            raise UploadTooLargeError(f"archive decompresses to more than {max_total_bytes} bytes")
+                        raise
+                spooled[name] = upload
+                remaining -= upload.size_bytes
+    except BaseException:
+        discard_spooled(spooled.values())
+        raise
+    return spooled
+
+
+async def spool_parts(
+    files: Mapping[str, UploadFile], names: set[str], spool_dir: str, *, max_bytes: int
+) -> dict[str, SpooledUpload]:
+    spooled: dict[str, SpooledUpload] = {}
+    try:
+        for name in sorted(names):
+            spooled[name] = await spool_upload(files[name], spool_dir, max_bytes=max_bytes)
+    except BaseException:
+        discard_spooled(spooled.values())
+        raise
+    return spooled
+
+
+def discard_spooled(spooled: Iterable[SpooledUpload]) -> None:
+    for upload in spooled:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(upload.path)
+
+
+def referenced_files(manifest: BatchManifest, available: set[str]) -> set[str]:
+    """Every file the manifest's sources name; raises ``BatchError`` for any that wasn't uploaded."""
+    names = {source.filename for job in manifest.jobs for source in job.sources}
+    missing = sorted(names - available)
+    if missing:
+        raise BatchError(f"manifest names files that were not uploaded: {', '.join(missing[:5])}")
+    return names
+
+
+def new_jobs(manifest: BatchManifest, spooled: dict[str, SpooledUpload], spool_dir: str) -> list[NewJob]:
+    """The manifest's jobs with their sources; a file named by several sources is spooled once and shared.
+
+    Every source still gets a spool file of its own (hard-linked where
+    possible), since a job removes its sources' files when it expires.
+    """
+    used: set[str] = set()
+    jobs: list[NewJob] = []
+    for spec in manifest.jobs:
+        sources: list[tuple[SourceType, str, SpooledUpload]] = []
+        for source in spec.sources:
+            upload = spooled[source.filename]
+            if source.filename in used:
+                upload = clone_spooled(upload, spool_dir)
+            used.add(source.filename)
+            sources.append((source.source_type, posixpath.basename(source.filename), upload))
+        jobs.append(NewJob(spec.course_name, spec.output_format, spec.tenant_id, sources))
+    return jobs
+
+
+def batch_status(
+    batch_id: str, jobs: list[JobRecord], details: Mapping[str, str] | None = None
+) -> BatchStatusResponse:
+    details = details or {}
+    return BatchStatusResponse(
+        batch_id=batch_id,
+        total=len(jobs),
+        progress=sum(job.progress for job in jobs) // len(jobs) if jobs else 0,
+        finished=all(job.status in TERMINAL_STATUSES for job in jobs),
+        status_counts=Counter(job.status for job in jobs),
+        jobs=[
+            BatchJobStatus(
+                job_id=job.job_id,
+                course_name=job.course_name,
+                status=job.status,
+                progress=job.progress,
+                current_step=job.current_step,
+                source_count=job.source_count,
+                detail=details.get(job.job_id),
+            )
+            for job in jobs
+        ],
+    )
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from threading import Lock
+
+from .records import CardData, ChunkData
+
+
+def card_cache_key(chunk: ChunkData, *, course_name: str, generator_name: str, prompt_version: str) -> str:
+    payload = json.dumps([generator_name, prompt_version, course_name, chunk.topic, chunk.subtopic, chunk.text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass(slots=True)
+class _Entry:
+    chunk_id: str
+    cards: list[CardData]
+    size: int
+
+
+def reanchor_cards(cards: list[CardData], old_chunk_id: str, new_chunk_id: str) -> list[CardData]:
+    """Point cached cards at the chunk they are being reused for."""
+    if old_chunk_id == new_chunk_id:
+        return cards
+    return [replace(card, extra=card.extra.replace(old_chunk_id, new_chunk_id)) for card in cards]
+
+
+class CardCache:
+    """Content-addressed chunk -> cards cache shared by every job in the process.
+
+    The memory tier is an LRU bounded by entry count and by the serialised
+    size of its cards. When ``disk_dir`` is set, every entry is also written
+    there, so evicted or pre-restart entries can still be served. The disk
+    tier is an LRU of its own, bounded by ``max_disk_bytes`` (0 is unlimited)
+    and seeded from the files already there, oldest first.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: str | None = None,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._disk_entries: OrderedDict[str, int] = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = Lock()
+        self.stats = CacheStats()
+        self.evictions = 0
+        self.disk_evictions = 0
+        if self._disk_dir is not None:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def _scan_disk(self) -> None:
+        assert self._disk_dir is not None
+        found = []
+        for path in self._disk_dir.glob("*/*.json"):
+            with contextlib.suppress(FileNotFoundError):
+                stat = path.stat()
+                found.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(found):
+            self._disk_entries[key] = size
+            self._disk_bytes += size
+        self._unlink(self._trim_disk_locked())
+
+    def _disk_path(self, key: str) -> Path:
+        assert self._disk_dir is not None
+        return self._disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str, chunk_id: str) -> list[CardData] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return reanchor_cards(entry.cards, entry.chunk_id, chunk_id)
+
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            if key in self._disk_entries:
+                self._disk_entries.move_to_end(key)
+            self._insert_locked(key, entry)
+        return reanchor_cards(entry.cards, entry.chunk_id, chunk_id)
+
+    def put(self, key: str, chunk_id: str, cards: list[CardData]) -> None:
+        payload = json.dumps({"chunk_id": chunk_id, "cards": [asdict(card) for card in cards]})
+        evicted: list[str] = []
+        if self._disk_dir is not None:
+            path = self._disk_path(key)
+            path.parent.mkdir(exist_ok=True)
+            # a temp file of its own: other threads and processes may be writing the same key
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{key}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as file:
+                    file.write(payload)
+                os.replace(tmp, path)
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(tmp)
+                raise
+        with self._lock:
+            self._insert_locked(key, _Entry(chunk_id=chunk_id, cards=cards, size=len(payload)))
+            if self._disk_dir is not None:
+                self._disk_bytes += len(payload) - self._disk_entries.pop(key, 0)
+                self._disk_entries[key] = len(payload)
+                evicted = self._trim_disk_locked()
+        self._unlink(evicted)
+
+    def _insert_locked(self, key: str, entry: _Entry) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._entries and (len(self._entries) > self._max_entries or self._bytes > self._max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _trim_disk_locked(self) -> list[str]:
+        evicted = []
+        while self._max_disk_bytes and len(self._disk_entries) > 1 and self._disk_bytes > self._max_disk_bytes:
+            key, size = self._disk_entries.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def _unlink(self, keys: list[str]) -> None:
+        for key in keys:
+            with contextlib.suppress(FileNotFoundError):
+                self._disk_path(key).unlink()
+
+    def _load_from_disk(self, key: str) -> _Entry | None:
+        if self._disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            payload = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        try:
+            data = json.loads(payload)
+            return _Entry(
+                chunk_id=data["chunk_id"], cards=[CardData(**card) for card in data["cards"]], size=len(payload)
+            )
+        except (ValueError, KeyError, TypeError):
+            # truncated or corrupt: the chunk is generated again and the entry rewritten
+            with self._lock:
+                self._disk_bytes -= self._disk_entries.pop(key, 0)
+            self._unlink([key])
+            return None
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import replace
+from typing import NamedTuple, Union
+
+from .records import ChunkData, SourceRefData
+
+
+class SourceLine(NamedTuple):
+    """A stripped, non-empty line and where it sits in its source's decoded text."""
+
+    text: str
+    source_id: str
+    start_char: int
+    end_char: int
+
+
+# chunking accepts bare strings (no provenance) or located source lines
+Line = Union[str, SourceLine]
+
+
+def estimate_tokens(text: str) -> int:
+    # rough estimate: 1 token ~= 4 chars
+    return max(1, len(text) // 4)
+
+
+def _tokens_for_chars(char_count: int) -> int:
+    # same estimate as estimate_tokens, computed from a running char count
+    return max(1, char_count // 4)
+
+
+def _line_text(line: Line) -> str:
+    return line if isinstance(line, str) else line.text
+
+
+def _source_refs(lines: list[Line]) -> list[SourceRefData]:
+    """Collapse runs of consecutive lines from the same source into one span each."""
+    spans: list[list] = []
+    for line in lines:
+        if isinstance(line, str):
+            continue
+        if spans and spans[-1][0] == line.source_id and spans[-1][2] <= line.start_char:
+            spans[-1][2] = line.end_char
+        else:
+            spans.append([line.source_id, line.start_char, line.end_char])
+    return [SourceRefData(source_id, 1, start, end) for source_id, start, end in spans]
+
+
+def chunk_id_for(topic: str, text: str, refs: Sequence[SourceRefData], source_keys: Mapping[str, str]) -> str:
+    """``chk_`` plus 64 bits of a hash over the topic, the text and where it came from.
+
+    Spans name their source by ``source_keys[source_id]`` (the upload's
+    content hash) when given, so the same file chunks to the same ids in
+    every job and process.
+    """
+    hasher = hashlib.sha256(f"{topic}\x1f{text}".encode("utf-8"))
+    for ref in refs:
+        key = source_keys.get(ref.source_id, ref.source_id)
+        hasher.update(f"\x1e{key}\x1f{ref.page}\x1f{ref.start_char}\x1f{ref.end_char}".encode("utf-8"))
+    return f"chk_{hasher.hexdigest()[:16]}"
+
+
+def _make_chunk(topic: str, lines: list[Line], char_count: int, source_keys: Mapping[str, str]) -> ChunkData:
+    text = "\n".join(_line_text(line) for line in lines)
+    refs = _source_refs(lines)
+    return ChunkData(
+        chunk_id=chunk_id_for(topic, text, refs, source_keys),
+        topic=topic,
+        subtopic="default",
+        token_estimate=_tokens_for_chars(char_count),
+        text=text,
+        source_refs=refs,
+    )
+
+
+def _iter_topic_chunks(
+    topic: str,
+    lines: Sequence[Line],
+    target_min_tokens: int,
+    target_max_tokens: int,
+    source_keys: Mapping[str, str],
+) -> Iterator[ChunkData]:
+    """Split one topic greedily by token budget and merge undersized runs in the same pass.
+
+    A raw chunk closes when appending the next line would push it over
+    ``target_max_tokens``. Closed raw chunks are folded into the pending chunk
+    while the pending chunk is still below ``target_min_tokens``.
+    """
+    pending: list[Line] = []
+    pending_chars = 0
+
+    buffer: list[Line] = []
+    buffer_chars = 0
+
+    def close_buffer() -> Iterator[ChunkData]:
+        nonlocal pending, pending_chars
+        if pending and _tokens_for_chars(pending_chars) < target_min_tokens:
+            pending.extend(buffer)
+            pending_chars += 1 + buffer_chars
+            return
+        if pending:
+            yield _make_chunk(topic, pending, pending_chars, source_keys)
+        pending = buffer
+        pending_chars = buffer_chars
+
+    for line in lines:
+        line_chars = len(_line_text(line))
+        if buffer and _tokens_for_chars(buffer_chars + 1 + line_chars) > target_max_tokens:
+            yield from close_buffer()
+            buffer = [line]
+            buffer_chars = line_chars
+        else:
+            buffer_chars += line_chars + (1 if buffer else 0)
+            buffer.append(line)
+
+    if buffer:
+        yield from close_buffer()
+    if pending:
+        yield _make_chunk(topic, pending, pending_chars, source_keys)
+
+
+def iter_chunks(
+    sections: Mapping[str, Sequence[Line]],
+    target_min_tokens: int = 5000,
+    target_max_tokens: int = 10000,
+    *,
+    source_keys: Mapping[str, str] | None = None,
+) -> Iterator[ChunkData]:
+    """Yield chunks topic by topic as soon as each one is final.
+
+    Runs in linear time: token estimates come from running character counts
+    instead of re-joining the buffer for every line. Chunks built from
+    ``SourceLine``s carry ``source_refs`` spans. Chunk ids are derived from
+    content (see ``chunk_id_for``); identical chunks without spans get a
+    ``_2``, ``_3``... suffix in order.
+    """
+    keys = source_keys or {}
+    seen: Counter[str] = Counter()
+    for topic, lines in sections.items():
+        if not lines:
+            continue
+        for chunk in _iter_topic_chunks(topic, lines, target_min_tokens, target_max_tokens, keys):
+            seen[chunk.chunk_id] += 1
+            if seen[chunk.chunk_id] > 1:
+                chunk = replace(chunk, chunk_id=f"{chunk.chunk_id}_{seen[chunk.chunk_id]}")
+            yield chunk
+
+
+def build_chunks(
+    sections: Mapping[str, Sequence[Line]],
+    target_min_tokens: int = 5000,
+    target_max_tokens: int = 10000,
+    *,
+    source_keys: Mapping[str, str] | None = None,
+) -> list[ChunkData]:
+    return list(iter_chunks(sections, target_min_tokens, target_max_tokens, source_keys=source_keys))
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import os
+import pickle
+import sys
+from array import array
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass
+from threading import Lock
+from typing import IO, TYPE_CHECKING
+
+from pydantic import TypeAdapter
+
+from . import fastjson
+from .records import CardData, ChunkData, FailedCardData, SourceRefData
+
+if TYPE_CHECKING:
+    from .store import CardRecord, SourceRecord
+
+
+_CARD_JSON = TypeAdapter(CardData)
+# PackedChunks.spans rows: source index, page, start_char, end_char, byte_start, byte_end
+_SPAN_WIDTH = 6
+
+
+def _byte_offsets(path: str, chars: Sequence[int]) -> dict[int, int]:
+    """Map each of the sorted char offsets ``chars`` to its byte offset in the UTF-8 file at ``path``."""
+    offsets: dict[int, int] = {}
+    pending = iter(chars)
+    target = next(pending, None)
+    char_pos = byte_pos = 0
+    with open(path, "rb") as handle:
+        # binary iteration splits at b"\n", which never falls inside a UTF-8 sequence
+        for raw in handle:
+            text = None if raw.isascii() else raw.decode("utf-8")
+            line_chars = len(raw) if text is None else len(text)
+            while target is not None and target <= char_pos + line_chars:
+                step = target - char_pos
+                offsets[target] = byte_pos + (step if text is None else len(text[:step].encode("utf-8")))
+                target = next(pending, None)
+            char_pos += line_chars
+            byte_pos += len(raw)
+    return offsets
+
+
+def _footprint(*columns: object) -> int:
+    """Approximate bytes held by packed columns: each container plus the distinct objects its items point to."""
+    seen: set[int] = set()
+    total = 0
+    for column in columns:
+        total += sys.getsizeof(column)
+        items = column.values() if isinstance(column, dict) else column if isinstance(column, list) else ()
+        for item in items:
+            if id(item) not in seen:
+                seen.add(id(item))
+                total += sys.getsizeof(item)
+    return total
+
+
+class _SourceFiles:
+    """Spool files opened on first read, closed with the enclosing ``ExitStack``."""
+
+    def __init__(self, paths: list[str], stack: ExitStack) -> None:
+        self._paths = paths
+        self._stack = stack
+        self._handles: dict[int, IO[bytes]] = {}
+
+    def read(self, source_index: int, start: int, end: int) -> bytes:
+        handle = self._handles.get(source_index)
+        if handle is None:
+            handle = self._handles[source_index] = self._stack.enter_context(open(self._paths[source_index], "rb"))
+        handle.seek(start)
+        return handle.read(end - start)
+
+    def text(self, spans: array, rows: range) -> str:
+        """Chunk text for span ``rows``: each span's stripped, non-empty lines, joined as ``iter_chunks`` does."""
+        lines: list[str] = []
+        for row in rows:
+            base = row * _SPAN_WIDTH
+            raw = self.read(spans[base], spans[base + 4], spans[base + 5])
+            lines.extend(stripped for line in raw.decode("utf-8").splitlines() if (stripped := line.strip()))
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True, slots=True)
+class PackedChunks:
+    """A finished job's chunks as columns.
+
+    Topic labels are interned and chunk text is not copied: it is re-read
+    from the spooled sources through each span's byte range. Only chunks
+    whose text can't be reproduced that way keep it, in ``texts``.
+    """
+
+    chunk_ids: list[str]
+    topics: list[str]
+    subtopics: list[str]
+    token_estimates: array
+    # chunk i's spans are rows span_offsets[i]:span_offsets[i + 1] of spans
+    span_offsets: array
+    spans: array
+    source_ids: list[str]
+    paths: list[str]
+    texts: dict[int, str]
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def _rows(self, idx: int) -> range:
+        return range(self.span_offsets[idx], self.span_offsets[idx + 1])
+
+    def _refs(self, idx: int) -> list[SourceRefData]:
+        spans = self.spans
+        source_ids = self.source_ids
+        return [
+            SourceRefData(source_ids[spans[base]], spans[base + 1], spans[base + 2], spans[base + 3])
+            for base in (row * _SPAN_WIDTH for row in self._rows(idx))
+        ]
+
+    def unpack(self, indexes: Iterable[int] | None = None) -> list[ChunkData]:
+        """The chunks at ``indexes`` (all of them by default) as records."""
+        with ExitStack() as stack:
+            files = _SourceFiles(self.paths, stack)
+            return [
+                ChunkData(
+                    self.chunk_ids[idx],
+                    self.topics[idx],
+                    self.subtopics[idx],
+                    self.token_estimates[idx],
+                    self.texts[idx] if idx in self.texts else files.text(self.spans, self._rows(idx)),
+                    self._refs(idx),
+                )
+                for idx in (range(len(self)) if indexes is None else indexes)
+            ]
+
+    @property
+    def nbytes(self) -> int:
+        return _footprint(
+            self.chunk_ids, self.topics, self.subtopics, self.token_estimates, self.span_offsets, self.spans,
+            self.source_ids, self.paths, self.texts,
+        )
+
+
+def pack_chunks(chunks: Sequence[ChunkData], sources: Sequence[SourceRecord]) -> PackedChunks:
+    """Pack ``chunks``; text is dropped only where re-reading ``sources`` gives it back exactly."""
+    text_paths = {source.source_id: source.path for source in sources if source.is_text}
+    source_index: dict[str, int] = {}
+    boundaries: dict[int, set[int]] = {}
+    for chunk in chunks:
+        for ref in chunk.source_refs:
+            idx = source_index.setdefault(ref.source_id, len(source_index))
+            if ref.source_id in text_paths:
+                boundaries.setdefault(idx, set()).update((ref.start_char, ref.end_char))
+    source_ids = list(source_index)
+    paths = [text_paths.get(source_id, "") for source_id in source_ids]
+    byte_offsets = {idx: _byte_offsets(paths[idx], sorted(chars)) for idx, chars in boundaries.items()}
+
+    span_offsets = array("I", [0])
+    spans = array("q")
+    texts: dict[int, str] = {}
+    with ExitStack() as stack:
+        files = _SourceFiles(paths, stack)
+        for idx, chunk in enumerate(chunks):
+            rereadable = bool(chunk.source_refs)
+            for ref in chunk.source_refs:
+                source = source_index[ref.source_id]
+                offsets = byte_offsets.get(source, {})
+                byte_start, byte_end = offsets.get(ref.start_char, -1), offsets.get(ref.end_char, -1)
+                rereadable = rereadable and byte_start >= 0 and byte_end >= 0
+                spans.extend((source, ref.page, ref.start_char, ref.end_char, byte_start, byte_end))
+            rows = range(span_offsets[-1], len(spans) // _SPAN_WIDTH)
+            span_offsets.append(rows.stop)
+            if not rereadable or files.text(spans, rows) != chunk.text:
+                texts[idx] = chunk.text
+    return PackedChunks(
+        chunk_ids=[chunk.chunk_id for chunk in chunks],
+        topics=[sys.intern(chunk.topic) for chunk in chunks],
+        subtopics=[sys.intern(chunk.subtopic) for chunk in chunks],
+        token_estimates=array("I", (chunk.token_estimate for chunk in chunks)),
+        span_offsets=span_offsets,
+        spans=spans,
+        source_ids=source_ids,
+        paths=paths,
+        texts=texts,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class PackedCards:
+    """A finished job's card records: every card's JSON back to back in one buffer.
+
+    Pages of cards are slices of ``blob`` joined together, with no record
+    built at all; ``card`` decodes one without validating it again.
+    """
+
+    blob: bytes
+    # card i is blob[offsets[i]:offsets[i + 1]]
+    offsets: array
+    chunk_ids: list[str]
+    chunk_index: array
+    passed: array
+    failed: array
+    # validation failure reasons, interned, in the same order as ``failed``
+    reasons: list[str]
+
+    def __len__(self) -> int:
+        return len(self.chunk_index)
+
+    def _json(self, idx: int) -> bytes:
+        return self.blob[self.offsets[idx] : self.offsets[idx + 1]]
+
+    def card(self, idx: int) -> CardData:
+        return CardData(**fastjson.loads(self._json(idx)))
+
+    def records(self) -> Iterator[tuple[str, CardData, str | None]]:
+        """``(chunk_id, card, reason)`` for every card, in generation order."""
+        reasons = dict(zip(self.failed, self.reasons))
+        for idx, chunk in enumerate(self.chunk_index):
+            yield self.chunk_ids[chunk], self.card(idx), reasons.get(idx)
+
+    def failed_item(self, position: int) -> FailedCardData:
+        return FailedCardData(self.reasons[position], self.card(self.failed[position]))
+
+    def cards_json(self, indexes: Iterable[int]) -> bytes:
+        """A JSON array of the cards at ``indexes``."""
+        return b"[" + b",".join(self._json(idx) for idx in indexes) + b"]"
+
+    def failed_json(self, positions: Iterable[int]) -> bytes:
+        """A JSON array of ``FailedCardData`` for the failed cards at ``positions`` in ``failed``."""
+        items = (
+            b'{"reason":%b,"card":%b}' % (fastjson.dumps(self.reasons[position]), self._json(self.failed[position]))
+            for position in positions
+        )
+        return b"[" + b",".join(items) + b"]"
+
+    @property
+    def nbytes(self) -> int:
+        return _footprint(
+            self.blob, self.offsets, self.chunk_ids, self.chunk_index, self.passed, self.failed, self.reasons
+        )
+
+
+def pack_cards(records: Sequence[CardRecord]) -> PackedCards:
+    parts: list[bytes] = []
+    offsets = array("Q", [0])
+    chunk_index: dict[str, int] = {}
+    card_chunks = array("I")
+    passed = array("I")
+    failed = array("I")
+    reasons: list[str] = []
+    for idx, record in enumerate(records):
+        encoded = _CARD_JSON.dump_json(record.card)
+        parts.append(encoded)
+        offsets.append(offsets[-1] + len(encoded))
+        card_chunks.append(chunk_index.setdefault(record.chunk_id, len(chunk_index)))
+        if record.reason is None:
+            passed.append(idx)
+        else:
+            failed.append(idx)
+            reasons.append(sys.intern(record.reason))
+    return PackedCards(
+        blob=b"".join(parts),
+        offsets=offsets,
+        chunk_ids=list(chunk_index),
+        chunk_index=card_chunks,
+        passed=passed,
+        failed=failed,
+        reasons=reasons,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class PackedResults:
+    """Everything a finished job produced, in compact form; see ``InMemoryStore``."""
+
+    chunks: PackedChunks
+    cards: PackedCards
+    nbytes: int
+
+
+def pack_results(
+    chunks: Sequence[ChunkData], records: Sequence[CardRecord], sources: Sequence[SourceRecord]
+) -> PackedResults:
+    packed_chunks = pack_chunks(chunks, sources)
+    packed_cards = pack_cards(records)
+    return PackedResults(packed_chunks, packed_cards, packed_chunks.nbytes + packed_cards.nbytes)
+
+
+def write_spill(directory: str, job_id: str, packed: PackedResults) -> str:
+    """Write ``packed`` under ``directory`` and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{job_id}.pack")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as handle:
+        pickle.dump(packed, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return path
+
+
+def read_spill(path: str) -> PackedResults:
+    with open(path, "rb") as handle:
+        return pickle.load(handle)
+
+
+class MemoryBudget:
+    """LRU accounting for packed results held in memory.
+
+    ``admit`` records a use and returns the least recently used jobs that no
+    longer fit in ``max_bytes``; the most recent job always stays.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    @property
+    def resident_bytes(self) -> int:
+        return self._bytes
+
+    def admit(self, job_id: str, nbytes: int) -> list[str]:
+        with self._lock:
+            self._bytes += nbytes - self._sizes.pop(job_id, 0)
+            self._sizes[job_id] = nbytes
+            evicted: list[str] = []
+            while self._bytes > self._max_bytes and len(self._sizes) > 1:
+                victim, size = self._sizes.popitem(last=False)
+                self._bytes -= size
+                evicted.append(victim)
+            return evicted
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            self._bytes -= self._sizes.pop(job_id, 0)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, replace
+from threading import Lock
+
+from .cache import reanchor_cards
+from .instrumentation import text_bytes
+from .records import ChunkData
+from .schemas import ContentIndexMetricsResponse, ContentReuse
+from .store import CardRecord, SourceRecord
+
+
+def source_set_key(sources: Sequence[SourceRecord]) -> str:
+    """Hash of everything segmentation reads from ``sources``: their content hashes, in order.
+
+    A binary source is read as a placeholder naming its file, so its filename counts too.
+    """
+    payload = json.dumps(
+        [[source.sha256, source.is_text, "" if source.is_text else source.filename] for source in sources]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _FleetTotals:
+    jobs: int = 0
+    segmentations_reused: int = 0
+    source_bytes_reused: int = 0
+    chunks: int = 0
+    chunks_reused: int = 0
+    cards_reused: int = 0
+
+
+@dataclass(slots=True)
+class _Segmented:
+    source_ids: list[str]
+    fingerprints: dict[str, str]
+    chunks: list[ChunkData]
+    size: int
+
+
+@dataclass(slots=True)
+class _Validated:
+    chunk_id: str
+    records: list[CardRecord]
+    size: int
+
+
+def _rebased(chunks: list[ChunkData], source_ids: dict[str, str]) -> list[ChunkData]:
+    """``chunks`` with their source refs pointing at another job's sources."""
+    return [
+        replace(
+            chunk,
+            source_refs=[
+                replace(ref, source_id=source_ids.get(ref.source_id, ref.source_id)) for ref in chunk.source_refs
+            ],
+        )
+        for chunk in chunks
+    ]
+
+
+def _records_size(records: list[CardRecord]) -> int:
+    return sum(
+        text_bytes((record.card.question, record.card.extra, record.reason or ""))
+        + text_bytes(record.card.multiple_choice)
+        + text_bytes(record.card.correct_answers)
+        for record in records
+    )
+
+
+class ContentIndex:
+    """Content-addressed pipeline results shared by every job in the process.
+
+    Two kinds of entries share one LRU bounded by ``max_bytes`` of text:
+
+    * a source set (see ``source_set_key``) -> its topic fingerprints and
+      chunks, so a job whose uploads were all segmented before skips
+      segmentation; chunk ids are content-derived and carry over unchanged;
+    * a card cache key (see ``card_cache_key``) -> the validated cards of that
+      chunk, so a chunk seen in any earlier job, even one whose other uploads
+      differed, skips generation and the validation rules.
+
+    It also keeps fleet-wide totals of the reuse each job recorded.
+    """
+
+    def __init__(self, *, max_bytes: int = 128 * 1024 * 1024) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[str, _Segmented | _Validated] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._evictions = 0
+        self._totals = _FleetTotals()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def segmented(self, sources: Sequence[SourceRecord]) -> tuple[dict[str, str], list[ChunkData]] | None:
+        """Fingerprints and chunks of ``sources`` if the same content was segmented before, refs rebased onto them."""
+        key = f"s:{source_set_key(sources)}"
+        with self._lock:
+            entry = self._get_locked(key)
+        if not isinstance(entry, _Segmented):
+            return None
+        source_ids = dict(zip(entry.source_ids, (source.source_id for source in sources)))
+        if all(old == new for old, new in source_ids.items()):
+            return dict(entry.fingerprints), list(entry.chunks)
+        return dict(entry.fingerprints), _rebased(entry.chunks, source_ids)
+
+    def add_segmented(
+        self, sources: Sequence[SourceRecord], fingerprints: dict[str, str], chunks: list[ChunkData]
+    ) -> None:
+        size = text_bytes(chunk.text for chunk in chunks) + text_bytes(fingerprints.values())
+        entry = _Segmented([source.source_id for source in sources], dict(fingerprints), list(chunks), size)
+        key = f"s:{source_set_key(sources)}"
+        with self._lock:
+            self._insert_locked(key, entry)
+
+    def validated(self, key: str, chunk_id: str) -> list[CardRecord] | None:
+        """The validated cards stored under ``key``, pointed at ``chunk_id``."""
+        with self._lock:
+            entry = self._get_locked(f"c:{key}")
+        if not isinstance(entry, _Validated):
+            return None
+        if entry.chunk_id == chunk_id:
+            return list(entry.records)
+        cards = reanchor_cards([record.card for record in entry.records], entry.chunk_id, chunk_id)
+        return [CardRecord(chunk_id, card, record.reason) for card, record in zip(cards, entry.records)]
+
+    def add_validated(self, key: str, chunk_id: str, records: list[CardRecord]) -> None:
+        entry = _Validated(chunk_id, list(records), _records_size(records) + len(key))
+        with self._lock:
+            self._insert_locked(f"c:{key}", entry)
+
+    def record(self, reuse: ContentReuse) -> None:
+        """Add one finished job run to the fleet totals."""
+        with self._lock:
+            totals = self._totals
+            totals.jobs += 1
+            totals.segmentations_reused += reuse.segmentation_reused
+            totals.source_bytes_reused += reuse.source_bytes if reuse.segmentation_reused else 0
+            totals.chunks += reuse.chunks
+            totals.chunks_reused += reuse.chunks_reused
+            totals.cards_reused += reuse.cards_reused
+
+    def metrics(self) -> ContentIndexMetricsResponse:
+        with self._lock:
+            totals = self._totals
+            return ContentIndexMetricsResponse(
+                entries=len(self._entries),
+                resident_bytes=self._bytes,
+                evictions=self._evictions,
+                reuse_ratio=totals.chunks_reused / totals.chunks if totals.chunks else 0.0,
+                **asdict(totals),
+            )
+
+    def _get_locked(self, key: str) -> _Segmented | _Validated | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _insert_locked(self, key: str, entry: _Segmented | _Validated) -> None:
+        if entry.size > self._max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self._evictions += 1
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from threading import Lock
+
+from .schemas import JobStatus
+
+
+TERMINAL_STATUSES = frozenset({JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    job_id: str
+    status: JobStatus
+    progress: int
+    current_step: str
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @cached_property
+    def sse_message(self) -> str:
+        """The event as a ``text/event-stream`` message, encoded once however many watchers get it."""
+        payload = {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "progress": self.progress,
+            "current_step": self.current_step,
+        }
+        return f"event: progress\ndata: {json.dumps(payload)}\n\n"
+
+
+def _set_all(wakeups: list[asyncio.Event]) -> None:
+    for wakeup in wakeups:
+        wakeup.set()
+
+
+@dataclass
+class _Channel:
+    latest: ProgressEvent | None = None
+    version: int = 0
+    watchers: int = 0
+    # one wakeup per event loop with watchers, replaced after every publish
+    wakeups: dict[asyncio.AbstractEventLoop, asyncio.Event] = field(default_factory=dict)
+
+
+class Subscription:
+    """One watcher's view of a job's channel; see ``ProgressBroker.subscribe``."""
+
+    def __init__(self, broker: ProgressBroker, channel: _Channel) -> None:
+        self._broker = broker
+        self._channel = channel
+        self._seen = channel.version
+
+    async def next(self, timeout: float | None = None) -> ProgressEvent | None:
+        """The latest event published since the previous call, or None after ``timeout`` seconds."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._broker._lock:
+                if self._channel.version != self._seen:
+                    self._seen = self._channel.version
+                    return self._channel.latest
+                wakeup = self._channel.wakeups.setdefault(loop, asyncio.Event())
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+
+class ProgressBroker:
+    """Fans job progress out from pipeline threads to asyncio watchers.
+
+    Channels only hold the latest event: a watcher that falls behind skips
+    straight to the newest state, which is always the one that matters for
+    progress. Publishing costs one ``call_soon_threadsafe`` per event loop
+    with watchers, however many watchers there are, and nothing for jobs
+    nobody is watching.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._channels: dict[str, _Channel] = {}
+
+    def watchers(self, job_id: str) -> int:
+        channel = self._channels.get(job_id)
+        return channel.watchers if channel else 0
+
+    def publish(self, event: ProgressEvent) -> None:
+        self.publish_many([event])
+
+    def publish_many(self, events: Iterable[ProgressEvent]) -> None:
+        """Publish ``events`` under one lock, with one ``call_soon_threadsafe`` per event loop for all of them."""
+        wakeups: dict[asyncio.AbstractEventLoop, list[asyncio.Event]] = {}
+        with self._lock:
+            for event in events:
+                channel = self._channels.get(event.job_id)
+                if channel is None:
+                    continue
+                channel.latest = event
+                channel.version += 1
+                for loop, wakeup in channel.wakeups.items():
+                    wakeups.setdefault(loop, []).append(wakeup)
+                channel.wakeups = {}
+        for loop, pending in wakeups.items():
+            try:
+                loop.call_soon_threadsafe(_set_all, pending)
+            except RuntimeError:
+                # the loop closed while its watchers were still registered
+                pass
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[Subscription]:
+        """Watch ``job_id`` for as long as the context is open.
+
+        Subscribe before reading the job's current state: an update that lands
+        in between is then delivered again rather than lost.
+        """
+        with self._lock:
+            channel = self._channels.setdefault(job_id, _Channel())
+            channel.watchers += 1
+        try:
+            yield Subscription(self, channel)
+        finally:
+            with self._lock:
+                channel.watchers -= 1
+                if not channel.watchers:
+                    del self._channels[job_id]
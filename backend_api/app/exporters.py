@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from .records import CardData
+
+
+EXPORT_WRITE_BUFFER = 256 * 1024
+
+
+@dataclass(frozen=True)
+class ExportFile:
+    path: str
+    size_bytes: int
+    etag: str
+
+
+def iter_pipe_csv(cards: Iterable[CardData]) -> Iterator[str]:
+    """Yield the pipe-delimited CSV one row at a time, rows separated by newlines."""
+    separator = ""
+    for card in cards:
+        choices = "<br>".join(card.multiple_choice)
+        answers = "<br>".join(card.correct_answers)
+        yield f"{separator}{card.question}|{choices}|{answers}|{card.extra}"
+        separator = "\n"
+
+
+def publish_export(tmp_path: str, *, suffix: str) -> ExportFile:
+    """Hash a fully written export file and move it to its final name."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(tmp_path, "rb") as handle:
+        while block := handle.read(EXPORT_WRITE_BUFFER):
+            digest.update(block)
+            size += len(block)
+    path = tmp_path[: -len(".part")] + suffix
+    os.replace(tmp_path, path)
+    return ExportFile(path=path, size_bytes=size, etag=f'"{digest.hexdigest()[:32]}"')
+
+
+def write_export(parts: Iterable[str], export_dir: str, *, suffix: str) -> ExportFile:
+    """Stream ``parts`` to a new file under ``export_dir``, hashing as it goes.
+
+    The file only appears under its final name once fully written, so a
+    crashed export never leaves a truncated download behind.
+    """
+    Path(export_dir).mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=export_dir, prefix="exp_", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb", buffering=EXPORT_WRITE_BUFFER) as out:
+            for part in parts:
+                data = part.encode("utf-8")
+                digest.update(data)
+                size += len(data)
+                out.write(data)
+        path = tmp_path[: -len(".part")] + suffix
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return ExportFile(path=path, size_bytes=size, etag=f'"{digest.hexdigest()[:32]}"')
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from .cache import CacheStats, CardCache, card_cache_key
+from .records import CardData, ChunkData
+from .settings import Settings
+from .terms import TERM_RANKINGS, DocumentFrequencies, TermRanking, extract_terms
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class CardGenerator(Protocol):
+    """One card-generation backend; ``generate`` is called once per chunk.
+
+    ``prompt_version`` must change whenever the same chunk would produce
+    different cards, since it is part of the card cache key.
+
+    A generator that needs job-wide statistics may also define
+    ``for_chunks(chunks)``, returning a generator bound to one job's chunks;
+    ``GenerationStage.bind`` calls it once per job.
+
+    Cards come back as ``CardData``; a backend that parses its output into
+    ``Card`` models for validation converts them with ``CardData.from_model``.
+    """
+
+    name: str
+    prompt_version: str
+
+    async def generate(self, chunk: ChunkData, *, course_name: str) -> list[CardData]: ...
+
+
+class ChunkGenerationError(Exception):
+    def __init__(self, chunk_id: str, attempts: int) -> None:
+        super().__init__(f"card generation failed for {chunk_id} after {attempts} attempts")
+        self.chunk_id = chunk_id
+        self.attempts = attempts
+
+
+class TransientGenerationError(Exception):
+    pass
+
+
+def create_cards_from_chunk(
+    chunk: ChunkData, *, ranking: TermRanking = "first", frequencies: DocumentFrequencies | None = None
+) -> list[CardData]:
+    unique_terms = extract_terms(chunk.text, ranking=ranking, frequencies=frequencies)
+
+    if not unique_terms:
+        unique_terms = ["ConceptA", "ConceptB", "ConceptC", "ConceptD", "ConceptE", "ConceptF"]
+    elif len(unique_terms) < 6:
+        unique_terms.extend([f"Distractor{i}" for i in range(1, 7 - len(unique_terms))])
+
+    correct = unique_terms[0]
+    options = unique_terms[:6]
+
+    card = CardData(
+        question=f"High-yield term associated with {chunk.topic}",
+        multiple_choice=options,
+        correct_answers=[correct],
+        extra=(
+            f"Rationale: {correct} appears prominently in the chunk for {chunk.topic}."
+            f"<br><br>Source Anchor: {chunk.chunk_id}"
+        ),
+    )
+    return [card]
+
+
+class HeuristicGenerator:
+    """Local term-picking generator; cheap enough to run on the event loop.
+
+    ``ranking`` picks the terms: ``first`` takes them in order of appearance,
+    ``frequency`` by count within the chunk, and ``tfidf`` weights that count
+    by document frequencies across the job's chunks.
+    """
+
+    name = "heuristic"
+
+    def __init__(self, ranking: TermRanking = "first", frequencies: DocumentFrequencies | None = None) -> None:
+        if ranking not in TERM_RANKINGS:
+            raise ValueError(f"unknown term ranking {ranking!r}")
+        self.ranking = ranking
+        self.frequencies = frequencies
+        self.prompt_version = "heuristic-1" if ranking == "first" else f"heuristic-1-{ranking}"
+        if frequencies is not None:
+            # tf-idf cards depend on every chunk of the job, not just their own
+            self.prompt_version += f"-{frequencies.digest()[:16]}"
+
+    def for_chunks(self, chunks: list[ChunkData]) -> "HeuristicGenerator":
+        if self.ranking != "tfidf":
+            return self
+        return HeuristicGenerator(self.ranking, DocumentFrequencies.from_texts(chunk.text for chunk in chunks))
+
+    async def generate(self, chunk: ChunkData, *, course_name: str) -> list[CardData]:
+        return create_cards_from_chunk(chunk, ranking=self.ranking, frequencies=self.frequencies)
+
+
+class FakeSlowGenerator:
+    """Stand-in for a model-backed generator in tests and benchmarks.
+
+    Sleeps ``latency_s`` per call and raises ``TransientGenerationError`` with
+    probability ``failure_rate``, then answers like ``HeuristicGenerator``.
+    """
+
+    name = "fake-slow"
+    prompt_version = HeuristicGenerator().prompt_version
+
+    def __init__(self, latency_s: float = 0.2, failure_rate: float = 0.0, seed: int | None = None) -> None:
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    async def generate(self, chunk: ChunkData, *, course_name: str) -> list[CardData]:
+        self.calls += 1
+        await asyncio.sleep(self.latency_s)
+        if self._rng.random() < self.failure_rate:
+            raise TransientGenerationError(f"simulated failure for {chunk.chunk_id}")
+        return create_cards_from_chunk(chunk)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Per-chunk exponential backoff: ``base_delay_s * multiplier**n``, capped and jittered."""
+
+    max_attempts: int = 4
+    base_delay_s: float = 0.5
+    multiplier: float = 2.0
+    max_delay_s: float = 8.0
+    jitter: float = 0.1
+
+    def delay_for(self, attempt: int, rng: random.Random) -> float:
+        delay = min(self.max_delay_s, self.base_delay_s * self.multiplier ** (attempt - 1))
+        return delay * (1 + rng.uniform(-self.jitter, self.jitter))
+
+
+@dataclass
+class GenerationStage:
+    """Fans chunks out to a ``CardGenerator`` with at most ``concurrency`` calls in flight.
+
+    Failed calls are retried per chunk according to ``retry``; a chunk that
+    exhausts its attempts fails the stage with ``ChunkGenerationError``.
+    Cards come back in chunk order regardless of completion order. With a
+    ``cache``, chunks whose content was generated before skip the generator.
+    """
+
+    generator: CardGenerator = field(default_factory=HeuristicGenerator)
+    concurrency: int = 8
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    cache: CardCache | None = None
+
+    def run_by_chunk(
+        self,
+        chunks: list[ChunkData],
+        *,
+        course_name: str,
+        on_progress: ProgressCallback | None = None,
+        cache_stats: CacheStats | None = None,
+        generator: CardGenerator | None = None,
+    ) -> list[list[CardData]]:
+        """Cards for each of ``chunks``, in order.
+
+        ``generator`` is this stage's generator from ``bind``, bound to every
+        chunk of the job when only some of them are being generated; by
+        default it is bound to ``chunks``.
+        """
+        return asyncio.run(
+            self._generate_all(
+                chunks,
+                course_name=course_name,
+                on_progress=on_progress,
+                cache_stats=cache_stats,
+                generator=generator or self.bind(chunks),
+            )
+        )
+
+    async def _generate_all(
+        self,
+        chunks: list[ChunkData],
+        *,
+        course_name: str,
+        on_progress: ProgressCallback | None = None,
+        cache_stats: CacheStats | None,
+        generator: CardGenerator,
+    ) -> list[list[CardData]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        rng = random.Random()
+        stats = cache_stats if cache_stats is not None else CacheStats()
+        total = len(chunks)
+        done = 0
+
+        async def one(chunk: ChunkData) -> list[CardData]:
+            nonlocal done
+            cards = self._cached(generator, chunk, course_name, stats)
+            if cards is None:
+                async with semaphore:
+                    cards = await self._generate_with_retry(generator, chunk, course_name, rng)
+                self._remember(generator, chunk, course_name, cards)
+            done += 1
+            if on_progress is not None:
+                on_progress(done, total)
+            return cards
+
+        tasks = [asyncio.create_task(one(chunk)) for chunk in chunks]
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def card_keys(
+        self, chunks: list[ChunkData], *, course_name: str, generator: CardGenerator | None = None
+    ) -> list[str]:
+        """The card cache key of each of ``chunks``: chunks with equal keys generate equal cards.
+
+        ``generator`` is as for ``run_by_chunk``.
+        """
+        generator = generator or self.bind(chunks)
+        return [self._cache_key(generator, chunk, course_name) for chunk in chunks]
+
+    def bind(self, job_chunks: list[ChunkData]) -> CardGenerator:
+        """The generator for one job's chunks: built once per job and passed to ``card_keys`` and ``run_by_chunk``.
+
+        ``for_chunks`` generators may scan every chunk to bind (tf-idf
+        ranking builds its document frequencies), so binding is not free.
+        """
+        bind = getattr(self.generator, "for_chunks", None)
+        return bind(job_chunks) if bind is not None else self.generator
+
+    @staticmethod
+    def _cache_key(generator: CardGenerator, chunk: ChunkData, course_name: str) -> str:
+        return card_cache_key(
+            chunk,
+            course_name=course_name,
+            generator_name=generator.name,
+            prompt_version=generator.prompt_version,
+        )
+
+    def _cached(
+        self, generator: CardGenerator, chunk: ChunkData, course_name: str, stats: CacheStats
+    ) -> list[CardData] | None:
+        if self.cache is None:
+            return None
+        cards = self.cache.get(self._cache_key(generator, chunk, course_name), chunk.chunk_id)
+        if cards is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return cards
+
+    def _remember(self, generator: CardGenerator, chunk: ChunkData, course_name: str, cards: list[CardData]) -> None:
+        if self.cache is not None:
+            self.cache.put(self._cache_key(generator, chunk, course_name), chunk.chunk_id, cards)
+
+    async def _generate_with_retry(
+        self, generator: CardGenerator, chunk: ChunkData, course_name: str, rng: random.Random
+    ) -> list[CardData]:
+        attempt = 1
+        while True:
+            try:
+                return await generator.generate(chunk, course_name=course_name)
+            except Exception as exc:
+                if attempt >= self.retry.max_attempts:
+                    raise ChunkGenerationError(chunk.chunk_id, attempt) from exc
+            await asyncio.sleep(self.retry.delay_for(attempt, rng))
+            attempt += 1
+
+
+def build_generation_stage(settings: Settings) -> GenerationStage:
+    generator: CardGenerator
+    if settings.generator == "heuristic":
+        generator = HeuristicGenerator(ranking=settings.term_ranking)
+    elif settings.generator == "fake-slow":
+        generator = FakeSlowGenerator(latency_s=settings.fake_generator_latency_ms / 1000)
+    else:
+        raise ValueError(f"unknown generator {settings.generator!r}")
+    cache = None
+    if settings.card_cache_entries > 0:
+        cache = CardCache(
+            max_entries=settings.card_cache_entries,
+            max_bytes=settings.card_cache_mb * 1024 * 1024,
+            disk_dir=settings.card_cache_dir,
+            max_disk_bytes=settings.card_cache_disk_mb * 1024 * 1024,
+        )
+    return GenerationStage(
+        generator=generator,
+        concurrency=settings.generation_concurrency,
+        retry=RetryPolicy(max_attempts=settings.generation_max_attempts),
+        cache=cache,
+    )
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import codecs
+import hashlib
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import IO
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+
+SPOOL_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    path: str
+    size_bytes: int
+    is_text: bool
+    # content hash of the upload, so the same file gets the same identity in every job
+    sha256: str
+
+
+def _open_spool_file(spool_dir: str) -> tuple[int, str]:
+    Path(spool_dir).mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=spool_dir, prefix="src_", suffix=".upload")
+
+
+class _Spooler:
+    """Writes blocks to a new spool file, checking size and UTF-8 validity and hashing them on the way."""
+
+    def __init__(self, spool_dir: str, max_bytes: int) -> None:
+        fd, self.path = _open_spool_file(spool_dir)
+        self._out = os.fdopen(fd, "wb")
+        self._max_bytes = max_bytes
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._digest = hashlib.sha256()
+        self._is_text = True
+        self._size = 0
+
+    def write(self, block: bytes) -> None:
+        self._size += len(block)
+        if self._size > self._max_bytes:
+            raise UploadTooLargeError(f"upload exceeds {self._max_bytes} bytes")
+        self._out.write(block)
+        self._digest.update(block)
+        if self._is_text:
+            try:
+                self._decoder.decode(block)
+            except UnicodeDecodeError:
+                self._is_text = False
+
+    def finish(self) -> SpooledUpload:
+        self._out.close()
+        if self._is_text:
+            try:
+                self._decoder.decode(b"", final=True)
+            except UnicodeDecodeError:
+                self._is_text = False
+        return SpooledUpload(
+            path=self.path, size_bytes=self._size, is_text=self._is_text, sha256=self._digest.hexdigest()
+        )
+
+    def abort(self) -> None:
+        self._out.close()
+        os.unlink(self.path)
+
+
+async def spool_upload(
+    file: UploadFile, spool_dir: str, *, max_bytes: int, block_size: int = SPOOL_BLOCK_SIZE
+) -> SpooledUpload:
+    """Copy an upload to disk block by block, checking size and UTF-8 validity and hashing it as it streams.
+
+    Only one block is held in memory at a time. Raises ``UploadTooLargeError``
+    as soon as ``max_bytes`` is exceeded and removes the partial file. The
+    spool file is written from the thread pool, off the event loop.
+    """
+    spooler = await run_in_threadpool(_Spooler, spool_dir, max_bytes)
+    try:
+        while block := await file.read(block_size):
+            await run_in_threadpool(spooler.write, block)
+        return await run_in_threadpool(spooler.finish)
+    except BaseException:
+        # inline, so cleanup still happens when the request is cancelled
+        spooler.abort()
+        raise
+
+
+def spool_stream(
+    stream: IO[bytes], spool_dir: str, *, max_bytes: int, block_size: int = SPOOL_BLOCK_SIZE
+) -> SpooledUpload:
+    """``spool_upload`` for a blocking binary stream, such as a member of an uploaded archive."""
+    spooler = _Spooler(spool_dir, max_bytes)
+    try:
+        while block := stream.read(block_size):
+            spooler.write(block)
+        return spooler.finish()
+    except BaseException:
+        spooler.abort()
+        raise
+
+
+def clone_spooled(spooled: SpooledUpload, spool_dir: str) -> SpooledUpload:
+    """A second spool file with the same content, so each job that shares an upload can remove its own.
+
+    Hard-links where the filesystem allows it, so nothing is copied.
+    """
+    fd, path = _open_spool_file(spool_dir)
+    os.close(fd)
+    os.unlink(path)
+    try:
+        os.link(spooled.path, path)
+    except OSError:
+        shutil.copyfile(spooled.path, path)
+    return replace(spooled, path=path)
+
+
+def spool_text(text: str, spool_dir: str) -> SpooledUpload:
+    """Spool an in-process string the same way as an upload (tests, benchmarks, tooling)."""
+    fd, path = _open_spool_file(spool_dir)
+    data = text.encode("utf-8")
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    return SpooledUpload(path=path, size_bytes=len(data), is_text=True, sha256=hashlib.sha256(data).hexdigest())
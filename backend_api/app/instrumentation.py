@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import os
+import resource
+import time
+from collections.abc import Callable, Collection, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from .schemas import StageSpan
+
+
+T = TypeVar("T")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def text_bytes(texts: Iterable[str]) -> int:
+    """UTF-8 size of ``texts``, without encoding the ASCII ones (``str.isascii`` is O(1))."""
+    return sum(len(text) if text.isascii() else len(text.encode("utf-8")) for text in texts)
+
+
+def timed_call(fn: Callable[..., T], *args: Any) -> tuple[T, float]:
+    """``fn(*args)`` and the CPU seconds it took; run in a worker process so the caller can count them."""
+    started = time.thread_time()
+    result = fn(*args)
+    return result, time.thread_time() - started
+
+
+@dataclass
+class OpenSpan:
+    """A stage in progress; the stage body fills in the counts it knows."""
+
+    stage: str
+    items_in: int = 0
+    items_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    # CPU spent for this stage outside the job's thread, e.g. in the process pool
+    offloaded_cpu_s: float = 0.0
+
+
+@dataclass
+class _StageTotal:
+    runs: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+
+
+class StageTotals:
+    """Process-wide sums over every recorded span, by stage, for the Prometheus endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._totals: dict[str, _StageTotal] = {}
+
+    def add(self, span: StageSpan) -> None:
+        with self._lock:
+            total = self._totals.setdefault(span.stage, _StageTotal())
+            total.runs += 1
+            total.wall_s += span.wall_ms / 1000
+            total.cpu_s += span.cpu_ms / 1000
+
+    def snapshot(self) -> dict[str, tuple[int, float, float]]:
+        with self._lock:
+            return {stage: (total.runs, total.wall_s, total.cpu_s) for stage, total in self._totals.items()}
+
+
+STAGE_TOTALS = StageTotals()
+
+
+@dataclass
+class JobSpans:
+    """Stage spans of one run of a job, in the order the stages ran.
+
+    ``on_record`` gets the spans so far each time a stage ends, failed or not.
+    Wall time is measured around the stage; CPU time is the job thread's
+    plus whatever the stage offloaded.
+    """
+
+    on_record: Callable[[list[StageSpan]], None] | None = None
+    spans: list[StageSpan] = field(default_factory=list)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[OpenSpan]:
+        span = OpenSpan(name)
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield span
+        finally:
+            recorded = StageSpan(
+                stage=name,
+                wall_ms=(time.perf_counter() - wall_started) * 1000,
+                cpu_ms=(time.thread_time() - cpu_started + span.offloaded_cpu_s) * 1000,
+                items_in=span.items_in,
+                items_out=span.items_out,
+                bytes_in=span.bytes_in,
+                bytes_out=span.bytes_out,
+            )
+            self.spans.append(recorded)
+            STAGE_TOTALS.add(recorded)
+            if self.on_record is not None:
+                self.on_record(list(self.spans))
+
+
+# (name, type, help, [(labels, value), ...])
+MetricFamily = tuple[str, str, str, list[tuple[dict[str, str], float]]]
+
+
+def _resident_bytes() -> int:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # no procfs: fall back to the peak, which is what getrusage knows
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+_STARTED_AT = time.time()
+
+
+def process_metrics() -> list[MetricFamily]:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return [
+        ("process_cpu_seconds_total", "counter", "User and system CPU time.", [({}, usage.ru_utime + usage.ru_stime)]),
+        ("process_resident_memory_bytes", "gauge", "Resident set size.", [({}, _resident_bytes())]),
+        ("process_max_resident_memory_bytes", "gauge", "Peak resident set size.", [({}, usage.ru_maxrss * 1024)]),
+        ("process_start_time_seconds", "gauge", "Start time since the epoch.", [({}, _STARTED_AT)]),
+    ]
+
+
+def stage_metrics(totals: StageTotals = STAGE_TOTALS) -> list[MetricFamily]:
+    snapshot = totals.snapshot()
+    return [
+        (
+            "mcq_stage_runs_total",
+            "counter",
+            "Pipeline stage runs.",
+            [({"stage": stage}, runs) for stage, (runs, _, _) in snapshot.items()],
+        ),
+        (
+            "mcq_stage_wall_seconds_total",
+            "counter",
+            "Wall time spent in pipeline stages.",
+            [({"stage": stage}, wall_s) for stage, (_, wall_s, _) in snapshot.items()],
+        ),
+        (
+            "mcq_stage_cpu_seconds_total",
+            "counter",
+            "CPU time spent in pipeline stages, including process-pool work.",
+            [({"stage": stage}, cpu_s) for stage, (_, _, cpu_s) in snapshot.items()],
+        ),
+    ]
+
+
+def model_metrics(prefix: str, model: BaseModel, *, counters: Collection[str] = ()) -> list[MetricFamily]:
+    """One family per numeric field of ``model``: ``counters`` as ``{prefix}_{field}_total``, the rest as gauges."""
+    families: list[MetricFamily] = []
+    for name, value in model.model_dump().items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        description = name.replace("_", " ").capitalize() + "."
+        if name in counters:
+            families.append((f"{prefix}_{name}_total", "counter", description, [({}, value)]))
+        else:
+            families.append((f"{prefix}_{name}", "gauge", description, [({}, value)]))
+    return families
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def prometheus_text(families: Iterable[MetricFamily]) -> str:
+    """Render metric families in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for name, kind, help_text, samples in families:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{_labels(labels)} {float(value)!r}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
@@ -1,33 +1,198 @@
 from __future__ import annotations
 
-from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, UploadFile
-
-from .pipeline import cards_to_apkg_manifest, cards_to_pipe_csv, run_job
+import contextlib
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import partial
+
+from fastapi import FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .apkg import write_apkg
+from .batches import (
+    BatchError,
+    archive_manifest,
+    archive_names,
+    batch_status,
+    discard_spooled,
+    new_jobs,
+    referenced_files,
+    spool_archive,
+    spool_parts,
+)
+from .content_index import ContentIndex
+from .downloads import file_download
+from .events import ProgressBroker, ProgressEvent
+from .exporters import iter_pipe_csv, write_export
+from .generation import build_generation_stage
+from .ingest import UploadTooLargeError, spool_upload
+from .instrumentation import (
+    PROMETHEUS_CONTENT_TYPE,
+    model_metrics,
+    process_metrics,
+    prometheus_text,
+    stage_metrics,
+)
+from .pages import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, RenderedPages, paged_response
+from .pipeline import run_job
+from .profiling import SlowJobProfiler
+from .retention import RetentionPolicy, RetentionSweeper
+from .scheduler import JobAlreadyActiveError, JobScheduler, QueueFullError
 from .schemas import (
+    BatchManifest,
+    BatchStatusResponse,
+    Card,
+    Chunk,
     ChunksResponse,
-    ExportDownloadResponse,
+    ContentIndexMetricsResponse,
     ExportRequest,
     ExportResponse,
+    JobCancelResponse,
     JobCreateRequest,
     JobCreateResponse,
+    JobMetricsResponse,
     JobPreviewResponse,
     JobStartResponse,
     JobStatus,
     JobStatusResponse,
     OutputFormat,
+    SchedulerMetricsResponse,
     SourceType,
     SourceUploadResponse,
+    StoreMetricsResponse,
+    ValidationErrorItem,
     ValidationReportResponse,
 )
-from .store import InMemoryStore
+from .segmentation import ParallelSegmentation
+from .settings import Settings
+from .sqlite_store import SQLiteStore
+from .store import InMemoryStore, JobNotFoundError, JobRecord, JobStore
+
+settings = Settings.from_env()
+progress_events = ProgressBroker()
+store: JobStore = (
+    SQLiteStore(settings.sqlite_path, events=progress_events)
+    if settings.sqlite_path
+    else InMemoryStore(
+        events=progress_events,
+        memory_budget_bytes=settings.job_memory_mb * 1024 * 1024,
+        spill_dir=settings.job_spill_dir,
+        retention=RetentionPolicy(
+            job_ttl_s=settings.job_ttl_s or None,
+            export_ttl_s=settings.export_ttl_s or None,
+            max_export_bytes=settings.export_max_mb * 1024 * 1024 or None,
+        ),
+    )
+)
+rendered_pages = RenderedPages(settings.page_cache_mb * 1024 * 1024)
+profiler = (
+    SlowJobProfiler(
+        settings.profile_dir,
+        threshold_s=settings.profile_slow_jobs_ms / 1000,
+        interval_s=settings.profile_interval_ms / 1000,
+    )
+    if settings.profile_slow_jobs_ms
+    else None
+)
+# threads would only contend for the GIL, so segmentation is spread out in process mode only
+parallel_segmentation = (
+    ParallelSegmentation(workers=settings.max_workers, min_bytes=settings.parallel_segment_mb * 1024 * 1024)
+    if settings.worker_mode == "process" and settings.parallel_segment_mb
+    else None
+)
+content_index = ContentIndex(max_bytes=settings.content_index_mb * 1024 * 1024) if settings.content_index_mb else None
+scheduler = JobScheduler(
+    store,
+    max_workers=settings.max_workers,
+    max_queue=settings.max_queue,
+    mode=settings.worker_mode,
+    runner=partial(
+        run_job,
+        generation=build_generation_stage(settings),
+        profiler=profiler,
+        parallel_segmentation=parallel_segmentation,
+        content_index=content_index,
+    ),
+)
+
+
+def _collection_path(job_id: str) -> str:
+    return os.path.join(settings.export_dir, "collections", f"{job_id}.anki2")
+
+
+def sweep_store() -> None:
+    """Apply the retention policy; expired jobs also lose their persistent .apkg collection."""
+    if not isinstance(store, InMemoryStore):
+        return
+    for job_id in store.sweep():
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(_collection_path(job_id))
+
+
+sweeper = RetentionSweeper(sweep_store, interval_s=settings.sweep_interval_s)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    sweeper.start()
+    yield
+    sweeper.stop()
+    scheduler.shutdown()
 
-app = FastAPI(title="Anki MCQ Generator Backend", version="0.4.0")
-store = InMemoryStore()
+
+app = FastAPI(title="Anki MCQ Generator Backend", version="0.4.0", lifespan=lifespan)
+
+# multipart framing around the file part
+_UPLOAD_OVERHEAD_BYTES = 64 * 1024
+
+
+class RejectOversizedUploads:
+    """Refuse oversized uploads from Content-Length before the body is read.
+
+    Plain ASGI rather than ``@app.middleware("http")``, which pipes every
+    response body chunk through a memory stream: an event stream would pay
+    for that on every event it sends.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = (
+                settings.max_upload_bytes
+                if scope["path"].endswith("/sources")
+                else settings.max_batch_upload_bytes
+                if scope["path"] == "/v1/batches"
+                else None
+            )
+            declared = Headers(scope=scope).get("content-length")
+            if limit is not None and declared and declared.isdigit() and int(declared) > limit + _UPLOAD_OVERHEAD_BYTES:
+                response = JSONResponse(status_code=413, content={"detail": "upload too large"})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(RejectOversizedUploads)
+
+
+@app.exception_handler(JobNotFoundError)
+async def job_not_found(_: Request, exc: JobNotFoundError) -> JSONResponse:
+    # the job expired between a handler's own lookup and a later store call
+    return JSONResponse(status_code=404, content={"detail": "job not found"})
 
 
 @app.post("/v1/jobs", response_model=JobCreateResponse)
 def create_job(payload: JobCreateRequest) -> JobCreateResponse:
-    job = store.create_job(course_name=payload.course_name, output_format=payload.output_format)
+    job = store.create_job(
+        course_name=payload.course_name, output_format=payload.output_format, tenant_id=payload.tenant_id
+    )
     return JobCreateResponse(job_id=job.job_id, status=job.status)
 
 
@@ -41,32 +206,219 @@ async def upload_source(
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
 
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="empty file")
-
     try:
-        raw_text = content.decode("utf-8")
-    except UnicodeDecodeError:
-        raw_text = f"Binary source ({file.filename}) uploaded. OCR pipeline pending."
+        spooled = await spool_upload(file, settings.spool_dir, max_bytes=settings.max_upload_bytes)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    if not spooled.size_bytes:
+        os.unlink(spooled.path)
+        raise HTTPException(status_code=400, detail="empty file")
 
-    source = store.add_source(job_id, source_type=source_type, filename=file.filename or "upload", raw_text=raw_text)
+    source = store.add_source(job_id, source_type=source_type, filename=file.filename or "upload", spooled=spooled)
     return SourceUploadResponse(source_id=source.source_id, status="uploaded")
 
 
+_RESTARTABLE = frozenset({JobStatus.QUEUED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.DONE})
+
+
 @app.post("/v1/jobs/{job_id}/start", response_model=JobStartResponse)
-def start_job(job_id: str, background_tasks: BackgroundTasks) -> JobStartResponse:
+def start_job(job_id: str) -> JobStartResponse:
     job = store.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
-    if not job.sources:
+    if not job.source_count:
         raise HTTPException(status_code=400, detail="at least one source is required")
 
-    if job.status not in {JobStatus.QUEUED, JobStatus.FAILED}:
+    if job.status not in _RESTARTABLE:
         raise HTTPException(status_code=409, detail="job already started")
 
-    background_tasks.add_task(run_job, store, job_id)
-    return JobStartResponse(job_id=job_id, status=JobStatus.PARSING)
+    try:
+        scheduler.submit(job_id, tenant_id=job.tenant_id)
+    except JobAlreadyActiveError as exc:
+        raise HTTPException(status_code=409, detail="job already started") from exc
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return JobStartResponse(job_id=job_id, status=JobStatus.QUEUED)
+
+
+@app.post("/v1/jobs/{job_id}/cancel", response_model=JobCancelResponse)
+def cancel_job(job_id: str) -> JobCancelResponse:
+    job = store.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    if not scheduler.is_active(job_id) or not scheduler.cancel(job_id):
+        raise HTTPException(status_code=409, detail="job is not queued or running")
+
+    job = store.get_job(job_id)
+    return JobCancelResponse(job_id=job_id, status=job.status)
+
+
+@app.post("/v1/batches", response_model=BatchStatusResponse)
+async def create_batch(
+    manifest: str | None = Form(None),
+    files: list[UploadFile] = File([]),
+    archive: UploadFile | None = File(None),
+    start: bool = Form(False),
+) -> BatchStatusResponse:
+    """Create many jobs with their sources from one upload, and start them if asked.
+
+    Sources come from the ``files`` parts, matched to the manifest by
+    filename, or from a zip ``archive``. Without a manifest, each top-level
+    folder of the archive becomes a job.
+    """
+    try:
+        parsed = BatchManifest.model_validate_json(manifest) if manifest else None
+        if archive is not None:
+            names = await run_in_threadpool(archive_names, archive.file)
+            if parsed is None:
+                course = os.path.splitext(os.path.basename(archive.filename or ""))[0] or "Default"
+                parsed = archive_manifest(names, default_course=course, output_format=[OutputFormat.CSV])
+        elif parsed is None:
+            raise BatchError("a manifest is required unless an archive is uploaded")
+        if len(parsed.jobs) > settings.max_batch_jobs:
+            raise BatchError(f"a batch holds at most {settings.max_batch_jobs} jobs")
+        if archive is not None:
+            wanted = referenced_files(parsed, set(names))
+            spooled = await run_in_threadpool(
+                partial(
+                    spool_archive,
+                    archive.file,
+                    wanted,
+                    settings.spool_dir,
+                    max_bytes=settings.max_upload_bytes,
+                    max_total_bytes=settings.max_batch_upload_bytes,
+                    max_members=settings.max_batch_files,
+                )
+            )
+        else:
+            parts = {file.filename: file for file in files if file.filename}
+            wanted = referenced_files(parsed, set(parts))
+            spooled = await spool_parts(parts, wanted, settings.spool_dir, max_bytes=settings.max_upload_bytes)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False)) from exc
+    except BatchError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    empty = sorted(name for name, upload in spooled.items() if not upload.size_bytes)
+    if empty:
+        discard_spooled(spooled.values())
+        raise HTTPException(status_code=400, detail=f"empty file: {empty[0]}")
+
+    batch_id, jobs = store.create_batch(new_jobs(parsed, spooled, settings.spool_dir))
+    if start or parsed.start:
+        return _start_batch(batch_id, jobs)
+    return batch_status(batch_id, jobs)
+
+
+def _start_batch(batch_id: str, jobs: list[JobRecord]) -> BatchStatusResponse:
+    """Queue every job of the batch that ``start_job`` would; the others get a ``detail`` saying why not."""
+    details: dict[str, str] = {}
+    startable: list[JobRecord] = []
+    for job in jobs:
+        if not job.source_count:
+            details[job.job_id] = "at least one source is required"
+        elif job.status not in _RESTARTABLE:
+            details[job.job_id] = "job already started"
+        else:
+            startable.append(job)
+
+    active, rejected = scheduler.submit_many([(job.job_id, job.tenant_id) for job in startable])
+    details.update((job_id, "job already started") for job_id in active)
+    details.update((job_id, "job queue is full") for job_id in rejected)
+    return batch_status(batch_id, store.get_batch_jobs(batch_id), details)
+
+
+@app.post("/v1/batches/{batch_id}/start", response_model=BatchStatusResponse)
+def start_batch(batch_id: str) -> BatchStatusResponse:
+    jobs = store.get_batch_jobs(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="batch not found")
+    return _start_batch(batch_id, jobs)
+
+
+@app.get("/v1/batches/{batch_id}", response_model=BatchStatusResponse)
+def get_batch(batch_id: str) -> BatchStatusResponse:
+    jobs = store.get_batch_jobs(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="batch not found")
+    return batch_status(batch_id, jobs)
+
+
+@app.get("/v1/scheduler/metrics", response_model=SchedulerMetricsResponse)
+def scheduler_metrics() -> SchedulerMetricsResponse:
+    return scheduler.metrics()
+
+
+@app.get("/v1/store/metrics", response_model=StoreMetricsResponse)
+def store_metrics() -> StoreMetricsResponse:
+    return store.metrics()
+
+
+@app.get("/v1/content-index/metrics", response_model=ContentIndexMetricsResponse)
+def content_index_metrics() -> ContentIndexMetricsResponse:
+    """Reuse across jobs through the content index, totalled over every job it has seen."""
+    if content_index is None:
+        raise HTTPException(status_code=404, detail="content index is disabled")
+    return content_index.metrics()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> Response:
+    """Process and pipeline-stage metrics in the Prometheus text format."""
+    families = process_metrics() + stage_metrics()
+    families += model_metrics("mcq_store", store.metrics(), counters={"expired_jobs", "evicted_exports"})
+    families += model_metrics(
+        "mcq_scheduler", scheduler.metrics(), counters={"submitted", "completed", "failed", "cancelled", "rejected"}
+    )
+    families += [
+        ("mcq_retention_sweeps_total", "counter", "Retention sweeps run.", [({}, sweeper.sweeps)]),
+        ("mcq_retention_sweep_errors_total", "counter", "Retention sweeps that raised.", [({}, sweeper.errors)]),
+    ]
+    if content_index is not None:
+        families += model_metrics(
+            "mcq_content_index",
+            content_index.metrics(),
+            counters={
+                "evictions",
+                "jobs",
+                "segmentations_reused",
+                "source_bytes_reused",
+                "chunks",
+                "chunks_reused",
+                "cards_reused",
+            },
+        )
+    return Response(content=prometheus_text(families), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/v1/jobs/{job_id}/metrics", response_model=JobMetricsResponse)
+def job_metrics(job_id: str) -> JobMetricsResponse:
+    """Per-stage spans of the job's latest run."""
+    job = store.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+
+    return JobMetricsResponse(
+        job_id=job.job_id,
+        status=job.status,
+        wall_ms=sum(span.wall_ms for span in job.stage_spans),
+        cpu_ms=sum(span.cpu_ms for span in job.stage_spans),
+        stages=job.stage_spans,
+        reuse=job.content_reuse,
+        profile_available=profiler is not None and profiler.existing_profile(job_id) is not None,
+    )
+
+
+@app.get("/v1/jobs/{job_id}/profile", response_class=PlainTextResponse)
+def job_profile(job_id: str) -> Response:
+    """The folded-stack profile of the job's latest slow run."""
+    if not store.get_job(job_id):
+        raise HTTPException(status_code=404, detail="job not found")
+    path = profiler.existing_profile(job_id) if profiler is not None else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="no profile for this job")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=f"{job_id}.folded")
 
 
 @app.get("/v1/jobs/{job_id}", response_model=JobStatusResponse)
@@ -80,45 +432,118 @@ def get_job(job_id: str) -> JobStatusResponse:
         status=job.status,
         progress=job.progress,
         current_step=job.current_step,
+        cache_hits=job.cache_hits,
+        cache_misses=job.cache_misses,
+    )
+
+
+@app.get("/v1/jobs/{job_id}/events")
+def job_events(job_id: str) -> StreamingResponse:
+    """Server-sent ``progress`` events: the current state, then every change until the job finishes.
+
+    Comment lines are sent as keep-alives while nothing changes.
+    """
+    if not store.get_job(job_id):
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def stream() -> AsyncIterator[str]:
+        with progress_events.subscribe(job_id) as subscription:
+            job = store.get_job(job_id)
+            if job is None:
+                # expired between the check above and the first read: nothing left to report
+                return
+            event = ProgressEvent(job.job_id, job.status, job.progress, job.current_step)
+            yield event.sse_message
+            while not event.terminal:
+                update = await subscription.next(timeout=settings.events_heartbeat_s)
+                if update is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                event = update
+                yield event.sse_message
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+_PageSize = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+
+
 @app.get("/v1/jobs/{job_id}/chunks", response_model=ChunksResponse)
-def get_chunks(job_id: str) -> ChunksResponse:
+def get_chunks(
+    job_id: str, request: Request, cursor: str | None = None, limit: int = _PageSize, fields: str | None = None
+) -> Response:
     job = store.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
     if job.status not in {JobStatus.CHUNKING, JobStatus.GENERATING, JobStatus.DONE}:
         raise HTTPException(status_code=409, detail="chunks not ready")
 
-    return ChunksResponse(job_id=job.job_id, status=job.status, chunks=job.chunks)
+    return paged_response(
+        request,
+        job,
+        cursor=cursor,
+        limit=limit,
+        fields=fields,
+        item_model=Chunk,
+        items_field="chunks",
+        fetch=store.get_chunks_page,
+        envelope={"job_id": job.job_id, "status": job.status.value},
+        cache=rendered_pages,
+    )
 
 
 @app.get("/v1/jobs/{job_id}/preview", response_model=JobPreviewResponse)
-def preview(job_id: str) -> JobPreviewResponse:
+def preview(
+    job_id: str, request: Request, cursor: str | None = None, limit: int = _PageSize, fields: str | None = None
+) -> Response:
     job = store.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
     if job.status != JobStatus.DONE:
         raise HTTPException(status_code=409, detail="job not complete")
 
-    return JobPreviewResponse(
-        job_id=job.job_id,
-        status=job.status,
-        cards=job.cards,
-        validation=job.validation_summary,
+    return paged_response(
+        request,
+        job,
+        cursor=cursor,
+        limit=limit,
+        fields=fields,
+        item_model=Card,
+        items_field="cards",
+        fetch=store.get_cards_page,
+        envelope={
+            "job_id": job.job_id,
+            "status": job.status.value,
+            "validation": job.validation_summary.model_dump(mode="json"),
+        },
+        cache=rendered_pages,
     )
 
 
 @app.get("/v1/jobs/{job_id}/validation", response_model=ValidationReportResponse)
-def validation_report(job_id: str) -> ValidationReportResponse:
+def validation_report(
+    job_id: str, request: Request, cursor: str | None = None, limit: int = _PageSize, fields: str | None = None
+) -> Response:
     job = store.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
     if job.status != JobStatus.DONE:
         raise HTTPException(status_code=409, detail="job not complete")
 
-    return ValidationReportResponse(job_id=job.job_id, summary=job.validation_summary, failed_cards=job.failed_cards)
+    return paged_response(
+        request,
+        job,
+        cursor=cursor,
+        limit=limit,
+        fields=fields,
+        item_model=ValidationErrorItem,
+        items_field="failed_cards",
+        fetch=store.get_failed_cards_page,
+        envelope={"job_id": job.job_id, "summary": job.validation_summary.model_dump(mode="json")},
+        cache=rendered_pages,
+    )
 
 
 @app.post("/v1/jobs/{job_id}/export", response_model=ExportResponse)
@@ -133,19 +558,26 @@ def export_job(job_id: str, payload: ExportRequest) -> ExportResponse:
 
     if payload.format == OutputFormat.CSV:
         filename = f"{safe_course_name}_{job.job_id}.csv"
-        content = cards_to_pipe_csv(job.cards)
+        written = write_export(iter_pipe_csv(store.iter_cards(job_id)), settings.export_dir, suffix=".csv")
         content_type = "text/csv"
     else:
         filename = f"{safe_course_name}_{job.job_id}.apkg"
-        content = cards_to_apkg_manifest(job.cards, deck_name=f"{job.course_name}::Default")
-        content_type = "application/octet-stream"
+        written, _ = write_apkg(
+            store.iter_cards(job_id),
+            settings.export_dir,
+            deck_name=f"{job.course_name}::Default",
+            collection_path=_collection_path(job.job_id),
+        )
+        content_type = "application/apkg"
 
     export = store.create_export(
         job_id=job.job_id,
         export_format=payload.format,
         filename=filename,
         content_type=content_type,
-        content=content,
+        path=written.path,
+        size_bytes=written.size_bytes,
+        etag=written.etag,
     )
     return ExportResponse(
         export_id=export.export_id,
@@ -156,15 +588,19 @@ def export_job(job_id: str, payload: ExportRequest) -> ExportResponse:
     )
 
 
-@app.get("/v1/exports/{export_id}/download", response_model=ExportDownloadResponse)
-def download_export(export_id: str) -> ExportDownloadResponse:
+@app.get("/v1/exports/{export_id}/download")
+def download_export(export_id: str, request: Request) -> Response:
     export = store.get_export(export_id)
     if not export:
         raise HTTPException(status_code=404, detail="export not found")
-
-    return ExportDownloadResponse(
-        export_id=export.export_id,
+    if not os.path.exists(export.path):
+        raise HTTPException(status_code=410, detail="export file no longer available")
+
+    return file_download(
+        request,
+        path=export.path,
+        size=export.size_bytes,
+        etag=export.etag,
         filename=export.filename,
         content_type=export.content_type,
-        content=export.content,
     )
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+from typing import Any
+
+from fastapi import HTTPException, Request, Response
+from pydantic import BaseModel
+
+from . import fastjson
+from .downloads import etag_matches
+from .schemas import JobStatus
+from .store import JobRecord, JsonPage
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class StaleCursor(Exception):
+    pass
+
+
+def encode_cursor(revision: int, after: int) -> str:
+    return base64.urlsafe_b64encode(f"{revision}.{after}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, revision: int) -> int:
+    """The ``after`` key of a cursor handed out by ``encode_cursor``.
+
+    Raises ``ValueError`` for a malformed cursor and ``StaleCursor`` when the
+    job's results were replaced after the cursor was issued.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        issued_at, after = map(int, raw.split("."))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"invalid cursor: {cursor!r}") from exc
+    if issued_at != revision:
+        raise StaleCursor(cursor)
+    return after
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> tuple[str, ...] | None:
+    """Projected field names from a comma-separated ``fields`` parameter, in model order; None for every field."""
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - set(model.model_fields)
+    if unknown or not names:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}" if unknown else "no fields requested")
+    return tuple(name for name in model.model_fields if name in names)
+
+
+class RenderedPages:
+    """LRU of response bodies for pages of done jobs, keyed by ETag and bounded by total size.
+
+    A done job's pages only change with its revision, which is part of the
+    ETag, so a cached body never needs invalidating; old revisions age out.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._bodies: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def get(self, etag: str) -> bytes | None:
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+            return body
+
+    def put(self, etag: str, body: bytes) -> None:
+        if len(body) > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._bodies.pop(etag, None)
+            self._bytes += len(body) - (len(previous) if previous is not None else 0)
+            self._bodies[etag] = body
+            while self._bytes > self._max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+def paged_response(
+    request: Request,
+    job: JobRecord,
+    *,
+    cursor: str | None,
+    limit: int,
+    fields: str | None,
+    item_model: type[BaseModel],
+    items_field: str,
+    fetch: Callable[..., JsonPage],
+    envelope: dict[str, Any],
+    cache: RenderedPages | None = None,
+) -> Response:
+    """One page of a job's chunks or cards as JSON, with ``fields`` projected out of each item.
+
+    The store hands over the page's items already encoded, and they are
+    spliced into the body as they are.
+    ``envelope`` holds the other (at least one) response fields. Pages of completed jobs
+    get an ETag derived from the job's revision and the query: a
+    revalidation is answered with 304 before anything is read, and the
+    rendered body is kept in ``cache`` for the next client.
+    """
+    try:
+        projection = parse_fields(fields, item_model)
+        after = None if cursor is None else decode_cursor(cursor, job.revision)
+    except StaleCursor as exc:
+        raise HTTPException(status_code=409, detail="job results changed; restart from the first page") from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    headers = {}
+    etag = None
+    if job.status == JobStatus.DONE:
+        query = f"{request.url.path}|{after}|{limit}|{','.join(projection or ())}"
+        etag = headers["ETag"] = f'"r{job.revision}-{hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]}"'
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        body = cache.get(etag) if cache is not None else None
+        if body is not None:
+            return Response(body, media_type="application/json", headers=headers)
+
+    page = fetch(job.job_id, after=after, limit=limit, fields=projection)
+    next_cursor = None if page.next_after is None else encode_cursor(job.revision, page.next_after)
+    body = b"".join(
+        (
+            fastjson.dumps(envelope)[:-1],
+            b",",
+            fastjson.dumps(items_field),
+            b":",
+            page.items,
+            b',"next_cursor":',
+            fastjson.dumps(next_cursor),
+            b"}",
+        )
+    )
+    if etag is not None and cache is not None:
+        cache.put(etag, body)
+    return Response(body, media_type="application/json", headers=headers)
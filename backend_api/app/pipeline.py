@@ -1,166 +1,355 @@
 from __future__ import annotations
 
-import re
-from collections import defaultdict
-from uuid import uuid4
-
-from .schemas import Card, Chunk, JobStatus, ValidationErrorItem, ValidationSummary
-from .store import InMemoryStore
-from .validation import validate_cards
-
-
-_HEADING_PATTERN = re.compile(r"^(#{1,6}\s+.+|[A-Z][A-Za-z0-9\s]{2,}:)$")
-
-
-def estimate_tokens(text: str) -> int:
-    # rough estimate: 1 token ~= 4 chars
-    return max(1, len(text) // 4)
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from threading import Event
+from typing import Any, TypeVar
+
+from .cache import CacheStats
+from .content_index import ContentIndex
+from .generation import GenerationStage
+from .instrumentation import JobSpans, OpenSpan, text_bytes, timed_call
+from .profiling import SlowJobProfiler
+from .records import CardData, ChunkData
+from .schemas import ContentReuse, JobStatus, RuleStat, ValidationSummary
+from .segmentation import (
+    ParallelSegmentation,
+    TaskMap,
+    heading_topic,
+    segment_changed_topics,
+    segment_changed_topics_parallel,
+)
+from .store import CardRecord, ChunkManifestEntry, JobStore, SourceRecord
+from .validation import RuleStats, check_cards, is_near_duplicate
+
+
+T = TypeVar("T")
 
 
 def extract_topics(text: str) -> dict[str, list[str]]:
     """Very small topic splitter: headings define sections; fallback to one General section."""
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    if not lines:
-        return {"General": []}
+    return extract_topics_from_lines(text.splitlines())
+
 
+def extract_topics_from_lines(lines: Iterable[str]) -> dict[str, list[str]]:
+    """``extract_topics`` over an iterable of raw lines, consumed lazily."""
     topic = "General"
     sections: dict[str, list[str]] = defaultdict(list)
-    for line in lines:
-        if _HEADING_PATTERN.match(line):
-            topic = line.lstrip("#").strip().rstrip(":")
+    saw_line = False
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        saw_line = True
+        heading = heading_topic(line)
+        if heading is not None:
+            topic = heading
             continue
         sections[topic].append(line)
-    return dict(sections)
+    return dict(sections) if saw_line else {"General": []}
 
 
-def build_chunks(sections: dict[str, list[str]], target_min_tokens: int = 5000, target_max_tokens: int = 10000) -> list[Chunk]:
-    chunks: list[Chunk] = []
-    for topic, lines in sections.items():
-        if not lines:
-            continue
+class JobCancelled(Exception):
+    """Raised at a stage boundary once a job's cancel event is set."""
 
-        buffer: list[str] = []
-        for line in lines:
-            prospective = "\n".join(buffer + [line])
-            if buffer and estimate_tokens(prospective) > target_max_tokens:
-                text = "\n".join(buffer)
-                chunks.append(
-                    Chunk(
-                        chunk_id=f"chk_{uuid4().hex[:10]}",
-                        topic=topic,
-                        subtopic="default",
-                        token_estimate=estimate_tokens(text),
-                        text=text,
-                    )
-                )
-                buffer = [line]
-            else:
-                buffer.append(line)
-
-        if buffer:
-            text = "\n".join(buffer)
-            chunks.append(
-                Chunk(
-                    chunk_id=f"chk_{uuid4().hex[:10]}",
-                    topic=topic,
-                    subtopic="default",
-                    token_estimate=estimate_tokens(text),
-                    text=text,
-                )
-            )
 
-    merged: list[Chunk] = []
+def validate_generated(
+    raw_cards: list[CardData], known_reasons: dict[int, str | None] | None = None, prechecked: Sequence[int] = ()
+) -> tuple[list[str | None], ValidationSummary]:
+    stats = RuleStats()
+    reasons = check_cards(raw_cards, stats=stats, known_reasons=known_reasons, prechecked=prechecked)
+    failed = sum(reason is not None for reason in reasons)
+    summary = ValidationSummary(
+        total=len(raw_cards),
+        passed=len(raw_cards) - failed,
+        failed=failed,
+        rule_stats=[RuleStat(rule=rule, hits=hits, seconds=stats.seconds[rule]) for rule, hits in stats.hits.items()],
+    )
+    return reasons, summary
+
+
+def _merge_cards(
+    chunks: list[ChunkData],
+    generated: dict[str, list[CardData]],
+    previous: dict[str, list[CardRecord]],
+    reused: dict[str, list[CardRecord]] | None = None,
+) -> tuple[list[str], list[CardData], dict[int, str | None], list[int]]:
+    """Cards in chunk order, with the chunk of each and the outcomes that carry over from ``previous``.
+
+    Near-duplicate verdicts are not carried over: the card they point at may
+    be gone, so those cards are deduplicated again with the new ones. Cards
+    ``reused`` from other jobs keep their rule failures; their passes are
+    returned as prechecked, to be deduplicated against this job's cards.
+    """
+    reused = reused or {}
+    chunk_ids: list[str] = []
+    cards: list[CardData] = []
+    known_reasons: dict[int, str | None] = {}
+    prechecked: list[int] = []
     for chunk in chunks:
-        if merged and merged[-1].topic == chunk.topic and merged[-1].token_estimate < target_min_tokens:
-            combined_text = f"{merged[-1].text}\n{chunk.text}".strip()
-            merged[-1] = Chunk(
-                chunk_id=f"chk_{uuid4().hex[:10]}",
-                topic=chunk.topic,
-                subtopic="default",
-                token_estimate=estimate_tokens(combined_text),
-                text=combined_text,
-            )
-        else:
-            merged.append(chunk)
-
-    return merged
-
-
-def create_cards_from_chunk(chunk: Chunk) -> list[Card]:
-    unique_terms: list[str] = []
-    seen = set()
-
-    for token in re.findall(r"\b[A-Za-z][A-Za-z0-9\-]{3,}\b", chunk.text):
-        lowered = token.lower()
-        if lowered not in seen:
-            seen.add(lowered)
-            unique_terms.append(token)
-        if len(unique_terms) >= 8:
-            break
-
-    if not unique_terms:
-        unique_terms = ["ConceptA", "ConceptB", "ConceptC", "ConceptD", "ConceptE", "ConceptF"]
-    elif len(unique_terms) < 6:
-        unique_terms.extend([f"Distractor{i}" for i in range(1, 7 - len(unique_terms))])
-
-    correct = unique_terms[0]
-    options = unique_terms[:6]
-
-    card = Card(
-        question=f"High-yield term associated with {chunk.topic}",
-        multiple_choice=options,
-        correct_answers=[correct],
-        extra=(
-            f"Rationale: {correct} appears prominently in the chunk for {chunk.topic}."
-            f"<br><br>Source Anchor: {chunk.chunk_id}"
-        ),
+        if chunk.chunk_id in generated:
+            chunk_ids.extend([chunk.chunk_id] * len(generated[chunk.chunk_id]))
+            cards.extend(generated[chunk.chunk_id])
+            continue
+        if chunk.chunk_id in reused:
+            for record in reused[chunk.chunk_id]:
+                if record.reason is None:
+                    prechecked.append(len(cards))
+                elif not is_near_duplicate(record.reason):
+                    known_reasons[len(cards)] = record.reason
+                chunk_ids.append(chunk.chunk_id)
+                cards.append(record.card)
+            continue
+        for record in previous[chunk.chunk_id]:
+            if not is_near_duplicate(record.reason):
+                known_reasons[len(cards)] = record.reason
+            chunk_ids.append(chunk.chunk_id)
+            cards.append(record.card)
+    return chunk_ids, cards, known_reasons, prechecked
+
+
+def _manifest(chunks: list[ChunkData], chunk_ids: list[str]) -> list[ChunkManifestEntry]:
+    card_counts = Counter(chunk_ids)
+    return [
+        ChunkManifestEntry(
+            chunk_id=chunk.chunk_id,
+            topic=chunk.topic,
+            token_estimate=chunk.token_estimate,
+            card_count=card_counts[chunk.chunk_id],
+        )
+        for chunk in chunks
+    ]
+
+
+def _segment_changed(
+    store: JobStore,
+    job_id: str,
+    sources: list[SourceRecord],
+    executor: Executor | None,
+    span: OpenSpan,
+    parallel: ParallelSegmentation | None = None,
+    content_index: ContentIndex | None = None,
+) -> tuple[list[ChunkData], bool]:
+    """Chunk the job's sources, reusing the stored chunks of every topic whose lines are unchanged.
+
+    Large enough jobs are segmented across ``executor`` with ``parallel``, others in one task.
+    Sources whose content ``content_index`` has seen segmented are not read at all; the
+    flag returned says whether that was the case.
+    """
+    if content_index is not None:
+        indexed = content_index.segmented(sources)
+        if indexed is not None:
+            fingerprints, chunks = indexed
+            store.set_chunks(job_id, chunks, fingerprints)
+            return chunks, True
+
+    previous: dict[str, list[ChunkData]] = defaultdict(list)
+    previous_fingerprints = store.get_topic_fingerprints(job_id)
+    for chunk in store.get_chunks(job_id) if previous_fingerprints else ():
+        previous[chunk.topic].append(chunk)
+    reusable = {topic: fingerprint for topic, fingerprint in previous_fingerprints.items() if topic in previous}
+
+    text_bytes_total = sum(source.size_bytes for source in sources if source.is_text)
+    if executor is not None and parallel is not None and text_bytes_total >= parallel.min_bytes:
+        fingerprints, rebuilt = segment_changed_topics_parallel(
+            sources, reusable, map_tasks=_map_stage(executor, span), parallel=parallel
+        )
+    else:
+        fingerprints, rebuilt = _run_stage(executor, segment_changed_topics, sources, reusable, span=span)
+    chunks: list[ChunkData] = []
+    for topic in fingerprints:
+        chunks.extend(rebuilt.get(topic, previous[topic]))
+    store.set_chunks(job_id, chunks, fingerprints)
+    if content_index is not None:
+        content_index.add_segmented(sources, fingerprints, chunks)
+    return chunks, False
+
+
+def _index_generated(
+    content_index: ContentIndex, generated: list[ChunkData], card_keys: dict[str, str], records: list[CardRecord]
+) -> None:
+    """Add the validated cards of the chunks generated in this run to ``content_index``."""
+    by_chunk: dict[str, list[CardRecord]] = {chunk.chunk_id: [] for chunk in generated}
+    for record in records:
+        if record.chunk_id in by_chunk:
+            by_chunk[record.chunk_id].append(record)
+    for chunk in generated:
+        content_index.add_validated(card_keys[chunk.chunk_id], chunk.chunk_id, by_chunk[chunk.chunk_id])
+
+
+def _run_stage(executor: Executor | None, fn: Callable[..., T], *args: Any, span: OpenSpan) -> T:
+    """``fn(*args)`` on ``executor``; CPU time spent there is added to ``span``."""
+    if executor is None:
+        return fn(*args)
+    result, cpu_s = executor.submit(timed_call, fn, *args).result()
+    span.offloaded_cpu_s += cpu_s
+    return result
+
+
+def _map_stage(executor: Executor, span: OpenSpan) -> TaskMap:
+    """A ``TaskMap`` that fans tasks out over ``executor`` and adds their CPU time to ``span``."""
+
+    def map_tasks(fn: Callable[..., T], arg_tuples: Sequence[tuple[Any, ...]]) -> list[T]:
+        futures = [executor.submit(timed_call, fn, *args) for args in arg_tuples]
+        results: list[T] = []
+        for future in futures:
+            result, cpu_s = future.result()
+            span.offloaded_cpu_s += cpu_s
+            results.append(result)
+        return results
+
+    return map_tasks
+
+
+def _card_bytes(cards: Iterable[CardData]) -> int:
+    return sum(
+        text_bytes((card.question, card.extra)) + text_bytes(card.multiple_choice) + text_bytes(card.correct_answers)
+        for card in cards
     )
-    return [card]
-
-
-def cards_to_pipe_csv(cards: list[Card]) -> str:
-    rows: list[str] = []
-    for card in cards:
-        choices = "<br>".join(card.multiple_choice)
-        answers = "<br>".join(card.correct_answers)
-        row = f"{card.question}|{choices}|{answers}|{card.extra}"
-        rows.append(row)
-    return "\n".join(rows)
-
 
-def cards_to_apkg_manifest(cards: list[Card], deck_name: str) -> str:
-    """Placeholder .apkg payload representation until binary packaging is integrated."""
-    lines = [f"DECK={deck_name}", "FORMAT=apkg-placeholder", f"CARDS={len(cards)}"]
-    for idx, card in enumerate(cards, start=1):
-        lines.append(f"CARD_{idx}_Q={card.question}")
-        lines.append(f"CARD_{idx}_A={'<br>'.join(card.correct_answers)}")
-    return "\n".join(lines)
 
-
-def run_job(store: InMemoryStore, job_id: str) -> None:
+def run_job(
+    store: JobStore,
+    job_id: str,
+    *,
+    executor: Executor | None = None,
+    cancel_event: Event | None = None,
+    generation: GenerationStage | None = None,
+    profiler: SlowJobProfiler | None = None,
+    parallel_segmentation: ParallelSegmentation | None = None,
+    content_index: ContentIndex | None = None,
+) -> None:
+    """Run the pipeline for one job, recording every status change in the store.
+
+    CPU-bound stages run on ``executor`` when given (the scheduler passes a
+    process pool); store updates always happen in the calling thread. Card
+    generation is I/O-bound and runs here as an asyncio fan-out.
+
+    Re-running a job (say, after adding a source) only rechunks topics whose
+    lines changed. Chunk ids are content-derived, so cards are only generated
+    for chunks missing from the job's chunk manifest, even inside a rechunked
+    topic. Cards of the other chunks keep their validation outcome. The new
+    cards are checked and deduplicated against them.
+
+    Every stage leaves a span on the job (see ``JobSpans``), including the one
+    that failed or was cancelled. With a ``profiler``, slow runs are profiled.
+    With ``parallel_segmentation``, large jobs are segmented across ``executor``.
+
+    With a ``content_index``, work already done for the same content in other
+    jobs is reused: segmentation when every source matches, and validated
+    cards for each chunk that matches. The job's ``content_reuse`` says how much.
+    """
     job = store.get_job(job_id)
     if job is None:
         return
+    generation = generation or GenerationStage()
+    spans = JobSpans(on_record=lambda recorded: store.set_stage_spans(job_id, recorded))
 
-    try:
-        store.update_progress(job_id, status=JobStatus.PARSING, progress=20, current_step="parsing source text")
-        merged_text = "\n".join(source.raw_text for source in job.sources)
-
-        store.update_progress(job_id, status=JobStatus.CHUNKING, progress=45, current_step="topic segmentation")
-        sections = extract_topics(merged_text)
-        chunks = build_chunks(sections)
-        store.set_chunks(job_id, chunks)
+    def checkpoint() -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled(job_id)
 
-        store.update_progress(job_id, status=JobStatus.GENERATING, progress=75, current_step="card generation")
-        raw_cards: list[Card] = []
-        for chunk in chunks:
-            raw_cards.extend(create_cards_from_chunk(chunk))
+    try:
+        with profiler.profile(job_id) if profiler is not None else nullcontext():
+            checkpoint()
+            store.update_progress(job_id, status=JobStatus.PARSING, progress=20, current_step="parsing source text")
+            with spans.stage("parsing") as span:
+                sources = store.get_sources(job_id)
+                span.items_out = len(sources)
+                span.bytes_out = sum(source.size_bytes for source in sources)
+
+            checkpoint()
+            store.update_progress(job_id, status=JobStatus.CHUNKING, progress=45, current_step="topic segmentation")
+            with spans.stage("chunking") as span:
+                span.items_in, span.bytes_in = len(sources), sum(source.size_bytes for source in sources)
+                chunks, segmentation_reused = _segment_changed(
+                    store, job_id, sources, executor, span, parallel_segmentation, content_index
+                )
+                manifest = store.get_chunk_manifest(job_id)
+                kept_chunk_ids = {chunk.chunk_id for chunk in chunks if chunk.chunk_id in manifest}
+                previous_cards: dict[str, list[CardRecord]] = defaultdict(list)
+                for record in store.get_card_records(job_id) if kept_chunk_ids else ():
+                    if record.chunk_id in kept_chunk_ids:
+                        previous_cards[record.chunk_id].append(record)
+                to_generate = [chunk for chunk in chunks if chunk.chunk_id not in kept_chunk_ids]
+                card_keys: dict[str, str] = {}
+                reused: dict[str, list[CardRecord]] = {}
+                generator = generation.bind(chunks)
+                if content_index is not None and to_generate:
+                    keys = generation.card_keys(to_generate, course_name=job.course_name, generator=generator)
+                    card_keys = {chunk.chunk_id: key for chunk, key in zip(to_generate, keys)}
+                    for chunk in to_generate:
+                        indexed = content_index.validated(card_keys[chunk.chunk_id], chunk.chunk_id)
+                        if indexed is not None:
+                            reused[chunk.chunk_id] = indexed
+                    to_generate = [chunk for chunk in to_generate if chunk.chunk_id not in reused]
+                span.items_out = len(chunks)
+                span.bytes_out = text_bytes(chunk.text for chunk in chunks)
+
+            checkpoint()
+            store.update_progress(job_id, status=JobStatus.GENERATING, progress=75, current_step="card generation")
+
+            def on_chunk_done(done: int, total: int) -> None:
+                checkpoint()
+                store.update_progress(
+                    job_id,
+                    status=JobStatus.GENERATING,
+                    progress=75 + (20 * done) // total,
+                    current_step=f"card generation ({done}/{total} chunks)",
+                )
 
-        passed_cards, issues = validate_cards(raw_cards)
-        failed_cards = [ValidationErrorItem(reason=i.reason, card=i.card) for i in issues]
-        summary = ValidationSummary(total=len(raw_cards), passed=len(passed_cards), failed=len(failed_cards))
-        store.set_validated_cards(job_id, passed_cards, summary, failed_cards)
+            with spans.stage("generating") as span:
+                span.items_in = len(to_generate)
+                span.bytes_in = text_bytes(chunk.text for chunk in to_generate)
+                cache_stats = CacheStats()
+                generated = generation.run_by_chunk(
+                    to_generate,
+                    course_name=job.course_name,
+                    on_progress=on_chunk_done,
+                    cache_stats=cache_stats,
+                    generator=generator,
+                )
+                store.set_cache_stats(job_id, hits=cache_stats.hits, misses=cache_stats.misses)
+                span.items_out = sum(len(cards) for cards in generated)
+                span.bytes_out = sum(_card_bytes(cards) for cards in generated)
+            chunk_ids, raw_cards, known_reasons, prechecked = _merge_cards(
+                chunks, {chunk.chunk_id: cards for chunk, cards in zip(to_generate, generated)}, previous_cards, reused
+            )
 
-        store.update_progress(job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+            checkpoint()
+            with spans.stage("validating") as span:
+                span.items_in = len(raw_cards)
+                reasons, summary = _run_stage(
+                    executor, validate_generated, raw_cards, known_reasons, prechecked, span=span
+                )
+                span.items_out = summary.passed
+            checkpoint()
+            with spans.stage("storing") as span:
+                records = [
+                    CardRecord(chunk_id, card, reason) for chunk_id, card, reason in zip(chunk_ids, raw_cards, reasons)
+                ]
+                span.items_in = len(records)
+                store.set_validated_cards(job_id, records, summary, _manifest(chunks, chunk_ids))
+
+            if content_index is not None:
+                _index_generated(content_index, to_generate, card_keys, records)
+                reuse = ContentReuse(
+                    segmentation_reused=segmentation_reused,
+                    source_bytes=sum(source.size_bytes for source in sources),
+                    chunks=len(chunks),
+                    chunks_reused=len(reused),
+                    cards_reused=sum(len(cards) for cards in reused.values()),
+                    reuse_ratio=len(reused) / len(chunks) if chunks else 0.0,
+                )
+                store.set_content_reuse(job_id, reuse)
+                content_index.record(reuse)
+            store.update_progress(job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+    except JobCancelled:
+        current = store.get_job(job_id)
+        store.update_progress(
+            job_id, status=JobStatus.CANCELLED, progress=current.progress if current else 0, current_step="cancelled"
+        )
     except Exception as exc:
         store.mark_failed(job_id, str(exc))
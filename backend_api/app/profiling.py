@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import FrameType
+
+
+def _folded(frame: FrameType | None) -> str:
+    """The stack under ``frame`` as one ``file:function`` per frame, outermost first, ``;``-separated."""
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler:
+    """Samples one thread's stack every ``interval_s`` on a daemon thread."""
+
+    def __init__(self, thread_id: int, interval_s: float) -> None:
+        self._thread_id = thread_id
+        self._interval_s = interval_s
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="mcq-profiler", daemon=True)
+        self.stacks: Counter[str] = Counter()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval_s):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.stacks[_folded(frame)] += 1
+
+
+class SlowJobProfiler:
+    """Opt-in sampling profiler: jobs that take ``threshold_s`` or longer leave a profile behind.
+
+    While a job runs, its thread's stack is sampled every ``interval_s``; if
+    the job turns out slow, the samples are written to
+    ``{directory}/{job_id}.folded`` as folded stacks (one ``stack count`` per
+    line), which flamegraph.pl and speedscope read. Work offloaded to the
+    process pool shows up as time waiting on its future.
+    """
+
+    def __init__(self, directory: str, *, threshold_s: float, interval_s: float = 0.01) -> None:
+        self.directory = directory
+        self.threshold_s = threshold_s
+        self.interval_s = interval_s
+
+    def path_for(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.folded")
+
+    def existing_profile(self, job_id: str) -> str | None:
+        path = self.path_for(job_id)
+        return path if os.path.exists(path) else None
+
+    @contextmanager
+    def profile(self, job_id: str) -> Iterator[None]:
+        sampler = _Sampler(threading.get_ident(), self.interval_s)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            if time.perf_counter() - started >= self.threshold_s and sampler.stacks:
+                self._write(job_id, sampler.stacks)
+
+    def _write(self, job_id: str, stacks: Counter[str]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(job_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            handle.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        os.replace(tmp, path)
@@ -0,0 +1,76 @@
+"""Internal records of chunks and cards.
+
+The pipeline, the card cache and the stores pass these around instead of
+the ``schemas`` models: they are plain slotted dataclasses, built without
+validation, so reading a finished job back costs no more than its fields.
+They have the models' field names and order and serialise to the same JSON,
+so the API models only describe responses; ``to_model`` builds one where a
+caller needs it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from .schemas import Card, Chunk, SourceRef, ValidationErrorItem
+
+
+@dataclass(frozen=True, slots=True)
+class SourceRefData:
+    source_id: str
+    page: int
+    start_char: int
+    end_char: int
+
+    def to_model(self) -> SourceRef:
+        return SourceRef(source_id=self.source_id, page=self.page, start_char=self.start_char, end_char=self.end_char)
+
+
+@dataclass(frozen=True, slots=True)
+class ChunkData:
+    chunk_id: str
+    topic: str
+    subtopic: str
+    token_estimate: int
+    text: str
+    source_refs: list[SourceRefData] = field(default_factory=list)
+
+    def to_model(self) -> Chunk:
+        return Chunk(
+            chunk_id=self.chunk_id,
+            topic=self.topic,
+            subtopic=self.subtopic,
+            token_estimate=self.token_estimate,
+            text=self.text,
+            source_refs=[ref.to_model() for ref in self.source_refs],
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CardData:
+    question: str
+    multiple_choice: list[str]
+    correct_answers: list[str]
+    extra: str
+
+    @classmethod
+    def from_model(cls, card: Card) -> CardData:
+        return cls(card.question, card.multiple_choice, card.correct_answers, card.extra)
+
+    def to_model(self) -> Card:
+        return Card(
+            question=self.question,
+            multiple_choice=self.multiple_choice,
+            correct_answers=self.correct_answers,
+            extra=self.extra,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class FailedCardData:
+    """A card that failed validation and why, as ``ValidationErrorItem`` has it."""
+
+    reason: str
+    card: CardData
+
+    def to_model(self) -> ValidationErrorItem:
+        return ValidationErrorItem(reason=self.reason, card=self.card.to_model())
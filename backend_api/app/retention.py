@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from threading import Event, Thread
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """How long finished jobs and unused exports are kept, and how much disk exports may use; None is no limit.
+
+    Job TTLs count from when the job finished, export TTLs from when the
+    export was last created or read.
+    """
+
+    job_ttl_s: float | None = None
+    export_ttl_s: float | None = None
+    max_export_bytes: int | None = None
+
+
+class RetentionSweeper:
+    """Calls ``sweep`` every ``interval_s`` seconds on a daemon thread until stopped."""
+
+    def __init__(self, sweep: Callable[[], object], *, interval_s: float) -> None:
+        if interval_s <= 0:
+            raise ValueError(f"sweep interval must be positive, got {interval_s}")
+        self._sweep = sweep
+        self._interval_s = interval_s
+        self._stopped = Event()
+        self._thread: Thread | None = None
+        self.sweeps = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="mcq-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval_s):
+            try:
+                self._sweep()
+            except Exception:
+                # a failed sweep is retried on the next tick rather than ending the thread
+                logger.exception("retention sweep failed")
+                self.errors += 1
+            self.sweeps += 1
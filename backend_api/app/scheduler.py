@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Condition, Event
+from typing import Literal
+
+from .pipeline import run_job
+from .schemas import JobStatus, SchedulerMetricsResponse, TenantQueueDepth
+from .store import JobStore
+
+
+WorkerMode = Literal["process", "thread"]
+JobRunner = Callable[..., None]
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobAlreadyActiveError(Exception):
+    """The job is already queued or running."""
+
+
+@dataclass
+class _QueuedJob:
+    job_id: str
+    tenant_id: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    cancel_event: Event = field(default_factory=Event)
+
+
+class JobScheduler:
+    """Bounded, tenant-fair job queue in front of a fixed pool of pipeline workers.
+
+    At most ``max_workers`` jobs run at once, each driven by its own thread
+    that records status changes in the store. In ``process`` mode the
+    CPU-bound stages are shipped to a process pool so they never compete with
+    request handling for the GIL. Queued jobs are dispatched round-robin across
+    tenants, so one tenant's backlog cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        *,
+        max_workers: int = 2,
+        max_queue: int = 1000,
+        mode: WorkerMode = "process",
+        runner: JobRunner = run_job,
+    ) -> None:
+        self._store = store
+        self._max_workers = max_workers
+        self._max_queue = max_queue
+        self._mode = mode
+        self._runner = runner
+
+        self._cond = Condition()
+        self._queues: dict[str, deque[_QueuedJob]] = {}
+        self._tenant_order: deque[str] = deque()
+        self._depth = 0
+        self._running: dict[str, _QueuedJob] = {}
+        self._closed = False
+
+        self._drivers: ThreadPoolExecutor | None = None
+        self._compute: Executor | None = None
+
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        self._waits: deque[float] = deque(maxlen=1024)
+
+    def _ensure_started(self) -> None:
+        if self._drivers is not None:
+            return
+        self._drivers = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="mcq-job")
+        if self._mode == "process":
+            self._compute = ProcessPoolExecutor(
+                max_workers=self._max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def submit(self, job_id: str, tenant_id: str = "default") -> None:
+        """Queue a job and mark it queued in the store.
+
+        The check for a job that is already queued or running and the enqueue
+        happen under one lock, so concurrent starts of the same job queue it once.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is shut down")
+            if self._is_active_locked(job_id):
+                raise JobAlreadyActiveError(f"job {job_id} is already queued or running")
+            if self._depth >= self._max_queue:
+                self._counters["rejected"] += 1
+                raise QueueFullError(f"job queue is full ({self._max_queue} jobs)")
+            self._ensure_started()
+            # before the enqueue, so a driver that starts right away can't be overwritten
+            self._store.update_progress(job_id, status=JobStatus.QUEUED, progress=0, current_step="waiting for worker")
+            self._enqueue_locked(job_id, tenant_id)
+            self._dispatch_locked()
+
+    def submit_many(self, jobs: list[tuple[str, str]]) -> tuple[list[str], list[str]]:
+        """Queue ``(job_id, tenant_id)`` pairs in order under one lock, marking them queued in the store at once.
+
+        Returns the ids left out because they were already queued or running
+        (or listed twice), and those left out by a full queue.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("scheduler is shut down")
+            active: list[str] = []
+            fresh: list[tuple[str, str]] = []
+            seen: set[str] = set()
+            for job_id, tenant_id in jobs:
+                if job_id in seen or self._is_active_locked(job_id):
+                    active.append(job_id)
+                else:
+                    fresh.append((job_id, tenant_id))
+                seen.add(job_id)
+            room = max(self._max_queue - self._depth, 0)
+            accepted, rejected = fresh[:room], [job_id for job_id, _ in fresh[room:]]
+            if accepted:
+                self._ensure_started()
+                self._store.update_progress_many(
+                    [job_id for job_id, _ in accepted],
+                    status=JobStatus.QUEUED,
+                    progress=0,
+                    current_step="waiting for worker",
+                )
+            for job_id, tenant_id in accepted:
+                self._enqueue_locked(job_id, tenant_id)
+            self._counters["rejected"] += len(rejected)
+            self._dispatch_locked()
+            return active, rejected
+
+    def _enqueue_locked(self, job_id: str, tenant_id: str) -> None:
+        queue = self._queues.get(tenant_id)
+        if queue is None:
+            queue = self._queues[tenant_id] = deque()
+            self._tenant_order.append(tenant_id)
+        queue.append(_QueuedJob(job_id=job_id, tenant_id=tenant_id))
+        self._depth += 1
+        self._counters["submitted"] += 1
+
+    def is_active(self, job_id: str) -> bool:
+        with self._cond:
+            return self._is_active_locked(job_id)
+
+    def _is_active_locked(self, job_id: str) -> bool:
+        if job_id in self._running:
+            return True
+        return any(item.job_id == job_id for queue in self._queues.values() for item in queue)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; running jobs stop at their next stage boundary."""
+        with self._cond:
+            running = self._running.get(job_id)
+            if running is not None:
+                running.cancel_event.set()
+                return True
+            if not self._remove_queued_locked(job_id):
+                return False
+            self._counters["cancelled"] += 1
+
+        job = self._store.get_job(job_id)
+        self._store.update_progress(
+            job_id, status=JobStatus.CANCELLED, progress=job.progress if job else 0, current_step="cancelled"
+        )
+        return True
+
+    def _remove_queued_locked(self, job_id: str) -> bool:
+        for tenant_id, queue in self._queues.items():
+            for item in queue:
+                if item.job_id == job_id:
+                    queue.remove(item)
+                    self._depth -= 1
+                    if not queue:
+                        self._drop_tenant_locked(tenant_id)
+                    return True
+        return False
+
+    def _drop_tenant_locked(self, tenant_id: str) -> None:
+        del self._queues[tenant_id]
+        self._tenant_order.remove(tenant_id)
+
+    def _next_fair_locked(self) -> _QueuedJob:
+        tenant_id = self._tenant_order[0]
+        self._tenant_order.rotate(-1)
+        queue = self._queues[tenant_id]
+        item = queue.popleft()
+        if not queue:
+            self._drop_tenant_locked(tenant_id)
+        self._depth -= 1
+        return item
+
+    def _dispatch_locked(self) -> None:
+        while self._depth and len(self._running) < self._max_workers and not self._closed:
+            item = self._next_fair_locked()
+            self._waits.append(time.monotonic() - item.enqueued_at)
+            self._running[item.job_id] = item
+            assert self._drivers is not None
+            self._drivers.submit(self._drive, item)
+
+    def _drive(self, item: _QueuedJob) -> None:
+        try:
+            self._runner(self._store, item.job_id, executor=self._compute, cancel_event=item.cancel_event)
+        finally:
+            job = self._store.get_job(item.job_id)
+            status = job.status if job else JobStatus.FAILED
+            with self._cond:
+                del self._running[item.job_id]
+                if status == JobStatus.DONE:
+                    self._counters["completed"] += 1
+                elif status == JobStatus.CANCELLED:
+                    self._counters["cancelled"] += 1
+                else:
+                    self._counters["failed"] += 1
+                self._dispatch_locked()
+                self._cond.notify_all()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Block until nothing is queued or running; mainly for tests and benchmarks."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._depth and not self._running, timeout)
+
+    def metrics(self) -> SchedulerMetricsResponse:
+        with self._cond:
+            waits_ms = sorted(w * 1000 for w in self._waits)
+            return SchedulerMetricsResponse(
+                queue_depth=self._depth,
+                queue_capacity=self._max_queue,
+                running=len(self._running),
+                max_workers=self._max_workers,
+                worker_mode=self._mode,
+                wait_ms_avg=sum(waits_ms) / len(waits_ms) if waits_ms else 0.0,
+                wait_ms_p95=waits_ms[int(len(waits_ms) * 0.95)] if waits_ms else 0.0,
+                wait_ms_max=waits_ms[-1] if waits_ms else 0.0,
+                tenants=[
+                    TenantQueueDepth(tenant_id=tenant_id, queued=len(self._queues[tenant_id]))
+                    for tenant_id in self._tenant_order
+                ],
+                **self._counters,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._closed = True
+            for queue in self._queues.values():
+                for item in queue:
+                    item.cancel_event.set()
+            for item in self._running.values():
+                item.cancel_event.set()
+            self._queues.clear()
+            self._tenant_order.clear()
+            self._depth = 0
+        if self._drivers is not None:
+            self._drivers.shutdown(wait=wait)
+        if self._compute is not None:
+            self._compute.shutdown(wait=wait)
@@ -13,6 +13,7 @@ class JobStatus(str, Enum):
     GENERATING = "generating"
     DONE = "done"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class OutputFormat(str, Enum):
@@ -29,6 +30,22 @@ class SourceType(str, Enum):
 class JobCreateRequest(BaseModel):
     course_name: str = Field(min_length=1)
     output_format: list[OutputFormat] = Field(default_factory=lambda: [OutputFormat.CSV])
+    tenant_id: str = Field(default="default", min_length=1)
+
+
+class BatchSourceSpec(BaseModel):
+    # the filename of an uploaded part, or a path inside the uploaded archive
+    filename: str = Field(min_length=1)
+    source_type: SourceType = SourceType.TEXT
+
+
+class BatchJobSpec(JobCreateRequest):
+    sources: list[BatchSourceSpec] = Field(default_factory=list)
+
+
+class BatchManifest(BaseModel):
+    jobs: list[BatchJobSpec] = Field(min_length=1)
+    start: bool = False
 
 
 class JobCreateResponse(BaseModel):
@@ -46,18 +63,27 @@ class JobStartResponse(BaseModel):
     status: JobStatus
 
 
+class SourceRef(BaseModel):
+    source_id: str
+    page: int = Field(default=1, ge=1)
+    start_char: int = Field(ge=0)
+    end_char: int = Field(ge=0)
+
+
 class Chunk(BaseModel):
     chunk_id: str
     topic: str
     subtopic: str
     token_estimate: int = Field(ge=1)
     text: str = Field(min_length=1)
+    source_refs: list[SourceRef] = Field(default_factory=list)
 
 
 class ChunksResponse(BaseModel):
     job_id: str
     status: JobStatus
     chunks: list[Chunk]
+    next_cursor: str | None = None
 
 
 class Card(BaseModel):
@@ -78,16 +104,132 @@ class ValidationErrorItem(BaseModel):
     card: Card
 
 
+class RuleStat(BaseModel):
+    rule: str
+    hits: int = Field(default=0, ge=0)
+    seconds: float = Field(default=0.0, ge=0)
+
+
 class ValidationSummary(BaseModel):
     total: int
     passed: int
     failed: int
+    rule_stats: list[RuleStat] = Field(default_factory=list)
 
 
 class ValidationReportResponse(BaseModel):
     job_id: str
     summary: ValidationSummary
     failed_cards: list[ValidationErrorItem]
+    next_cursor: str | None = None
+
+
+class JobCancelResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+class TenantQueueDepth(BaseModel):
+    tenant_id: str
+    queued: int
+
+
+class SchedulerMetricsResponse(BaseModel):
+    queue_depth: int
+    queue_capacity: int
+    running: int
+    max_workers: int
+    worker_mode: str
+    submitted: int
+    completed: int
+    failed: int
+    cancelled: int
+    rejected: int
+    wait_ms_avg: float
+    wait_ms_p95: float
+    wait_ms_max: float
+    tenants: list[TenantQueueDepth]
+
+
+class StoreMetricsResponse(BaseModel):
+    live_jobs: int
+    live_exports: int
+    resident_bytes: int
+    spilled_jobs: int
+    export_bytes: int
+    expired_jobs: int
+    evicted_exports: int
+
+
+class StageSpan(BaseModel):
+    """One pipeline stage of a job run: wall and CPU time, and how much went in and out."""
+
+    stage: str
+    wall_ms: float = Field(ge=0)
+    cpu_ms: float = Field(ge=0)
+    items_in: int = Field(default=0, ge=0)
+    items_out: int = Field(default=0, ge=0)
+    bytes_in: int = Field(default=0, ge=0)
+    bytes_out: int = Field(default=0, ge=0)
+
+
+class ContentReuse(BaseModel):
+    """What a job run took from earlier jobs' results through the content index."""
+
+    # the whole source set had been segmented before, so chunking was skipped
+    segmentation_reused: bool = False
+    source_bytes: int = Field(default=0, ge=0)
+    chunks: int = Field(default=0, ge=0)
+    # chunks whose validated cards came from another job, so they were neither generated nor checked again
+    chunks_reused: int = Field(default=0, ge=0)
+    cards_reused: int = Field(default=0, ge=0)
+    reuse_ratio: float = Field(default=0.0, ge=0, le=1)
+
+
+class ContentIndexMetricsResponse(BaseModel):
+    entries: int
+    resident_bytes: int
+    evictions: int
+    jobs: int
+    segmentations_reused: int
+    source_bytes_reused: int
+    chunks: int
+    chunks_reused: int
+    cards_reused: int
+    # chunks_reused / chunks over every job recorded
+    reuse_ratio: float
+
+
+class JobMetricsResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+    wall_ms: float
+    cpu_ms: float
+    stages: list[StageSpan]
+    reuse: ContentReuse = Field(default_factory=ContentReuse)
+    # the profile itself is served by GET /v1/jobs/{job_id}/profile
+    profile_available: bool = False
+
+
+class BatchJobStatus(BaseModel):
+    job_id: str
+    course_name: str
+    status: JobStatus
+    progress: int = Field(ge=0, le=100)
+    current_step: str
+    source_count: int
+    # why a batch start left the job as it was
+    detail: str | None = None
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    total: int
+    # mean progress over the batch's jobs
+    progress: int = Field(ge=0, le=100)
+    finished: bool
+    status_counts: dict[JobStatus, int]
+    jobs: list[BatchJobStatus]
 
 
 class JobStatusResponse(BaseModel):
@@ -95,6 +237,8 @@ class JobStatusResponse(BaseModel):
     status: JobStatus
     progress: int = Field(ge=0, le=100)
     current_step: str
+    cache_hits: int = 0
+    cache_misses: int = 0
 
 
 class JobPreviewResponse(BaseModel):
@@ -102,6 +246,7 @@ class JobPreviewResponse(BaseModel):
     status: JobStatus
     cards: list[Card]
     validation: ValidationSummary
+    next_cursor: str | None = None
 
 
 class ExportRequest(BaseModel):
@@ -114,10 +259,3 @@ class ExportResponse(BaseModel):
     format: OutputFormat
     filename: str
     status: Literal["ready"]
-
-
-class ExportDownloadResponse(BaseModel):
-    export_id: str
-    filename: str
-    content_type: str
-    content: str
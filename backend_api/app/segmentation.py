@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import re
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from itertools import repeat
+from typing import Any, TypeVar, overload
+
+from .chunking import SourceLine, iter_chunks
+from .records import ChunkData
+from .store import SourceRecord
+
+
+T = TypeVar("T")
+# runs ``fn(*args)`` for each args tuple, possibly in other processes, and returns the results in order
+TaskMap = Callable[[Callable[..., T], Sequence[tuple[Any, ...]]], list[T]]
+# LineTable columns: source index, char_start, byte_start, byte_end
+LineColumns = tuple[array, array, array, array]
+
+_HEADING_PATTERN = re.compile(r"^(#{1,6}\s+.+|[A-Z][A-Za-z0-9\s]{2,}:)$")
+
+
+def heading_topic(line: str) -> str | None:
+    """Topic name if the stripped ``line`` is a heading, else None."""
+    if _HEADING_PATTERN.match(line):
+        return line.lstrip("#").strip().rstrip(":")
+    return None
+
+
+class SourceBuffers:
+    """Read-only byte views of a job's sources: mmaps of the spool files, or the placeholder text."""
+
+    def __init__(self, sources: Sequence[SourceRecord], stack: ExitStack) -> None:
+        self.source_ids = [source.source_id for source in sources]
+        self.source_keys = {source.source_id: source.sha256 for source in sources}
+        self.buffers: list[bytes | mmap.mmap] = []
+        for source in sources:
+            if not source.is_text:
+                self.buffers.append("\n".join(source.iter_lines()).encode("utf-8"))
+                continue
+            handle = stack.enter_context(open(source.path, "rb"))
+            if handle.seek(0, 2) == 0:
+                self.buffers.append(b"")
+                continue
+            self.buffers.append(stack.enter_context(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)))
+
+
+class LineTable(Sequence[SourceLine]):
+    """A topic's lines stored as offsets into ``SourceBuffers`` rather than as strings.
+
+    Costs 26 bytes per line; text is decoded only while a line is being chunked.
+    """
+
+    def __init__(self, buffers: SourceBuffers) -> None:
+        self._buffers = buffers
+        self._source = array("H")
+        self._char_start = array("q")
+        self._byte_start = array("q")
+        self._byte_end = array("q")
+
+    @classmethod
+    def from_columns(cls, buffers: SourceBuffers, columns: LineColumns) -> LineTable:
+        table = cls(buffers)
+        table._source, table._char_start, table._byte_start, table._byte_end = columns
+        return table
+
+    def columns(self) -> LineColumns:
+        return self._source, self._char_start, self._byte_start, self._byte_end
+
+    def append(self, source_index: int, char_start: int, byte_start: int, byte_end: int) -> None:
+        self._source.append(source_index)
+        self._char_start.append(char_start)
+        self._byte_start.append(byte_start)
+        self._byte_end.append(byte_end)
+
+    def extend(self, source_index: int, char_starts: Iterable[int], byte_starts: array, byte_ends: array) -> None:
+        """Append lines of one source at once."""
+        self._source.extend(repeat(source_index, len(byte_starts)))
+        self._char_start.extend(char_starts)
+        self._byte_start.extend(byte_starts)
+        self._byte_end.extend(byte_ends)
+
+    def __len__(self) -> int:
+        return len(self._source)
+
+    def _line(self, idx: int) -> SourceLine:
+        source_index = self._source[idx]
+        text = self._buffers.buffers[source_index][self._byte_start[idx] : self._byte_end[idx]].decode("utf-8")
+        start = self._char_start[idx]
+        return SourceLine(text, self._buffers.source_ids[source_index], start, start + len(text))
+
+    @overload
+    def __getitem__(self, idx: int) -> SourceLine: ...
+
+    @overload
+    def __getitem__(self, idx: slice) -> list[SourceLine]: ...
+
+    def __getitem__(self, idx: int | slice) -> SourceLine | list[SourceLine]:
+        if isinstance(idx, slice):
+            return [self._line(i) for i in range(*idx.indices(len(self)))]
+        return self._line(idx)
+
+    def __iter__(self) -> Iterator[SourceLine]:
+        return (self._line(i) for i in range(len(self)))
+
+    def fingerprint(self) -> str:
+        """Hash of every line's source, offset and bytes: equal fingerprints chunk identically.
+
+        Sources are named by their content hash, so the same uploads fingerprint
+        the same in every job.
+        """
+        hasher = hashlib.sha256()
+        buffers = self._buffers.buffers
+        source_keys = [self._buffers.source_keys[source_id] for source_id in self._buffers.source_ids]
+        for source_index, char_start, byte_start, byte_end in zip(
+            self._source, self._char_start, self._byte_start, self._byte_end
+        ):
+            hasher.update(f"{source_keys[source_index]}\x1f{char_start}\x1f".encode("utf-8"))
+            hasher.update(buffers[source_index][byte_start:byte_end])
+            hasher.update(b"\x1e")
+        return hasher.hexdigest()
+
+
+def scan_lines(
+    data: bytes | mmap.mmap, start: int = 0, end: int | None = None
+) -> Iterator[tuple[str, int, int, int]]:
+    """Yield ``(stripped_text, char_start, byte_start, byte_end)`` for every non-empty line.
+
+    Lines are split exactly like ``str.splitlines`` on the decoded text; char
+    offsets count the decoded text with its original line endings. Only
+    ``data[start:end]`` is scanned, which must start at a line start; char
+    offsets are then relative to ``start``, byte offsets are not.
+    """
+    char_pos = 0
+    byte_pos = start
+    view_end = len(data) if end is None else end
+    while byte_pos < view_end:
+        newline = data.find(b"\n", byte_pos, view_end)
+        raw_end = view_end if newline == -1 else newline + 1
+        raw = data[byte_pos:raw_end]
+        # a UTF-8 line split at b"\n" is always a whole sequence of characters
+        text = raw.decode("utf-8")
+        is_ascii = raw.isascii()
+        piece_byte_pos = byte_pos
+        for piece in text.splitlines(keepends=True):
+            # every line terminator is whitespace, so strip() also drops the ending
+            stripped = piece.strip()
+            if stripped:
+                lead = len(piece) - len(piece.lstrip())
+                if is_ascii:
+                    start_byte = piece_byte_pos + lead
+                    end_byte = start_byte + len(stripped)
+                else:
+                    start_byte = piece_byte_pos + len(piece[:lead].encode("utf-8"))
+                    end_byte = start_byte + len(stripped.encode("utf-8"))
+                yield stripped, char_pos + lead, start_byte, end_byte
+            char_pos += len(piece)
+            piece_byte_pos += len(piece) if is_ascii else len(piece.encode("utf-8"))
+        byte_pos = raw_end
+
+
+def extract_source_topics(buffers: SourceBuffers) -> dict[str, LineTable]:
+    """Topic split over every source in order; the current topic carries over between sources."""
+    topic = "General"
+    sections: dict[str, LineTable] = {}
+    for source_index, data in enumerate(buffers.buffers):
+        for text, char_start, byte_start, byte_end in scan_lines(data):
+            heading = heading_topic(text)
+            if heading is not None:
+                topic = heading
+                continue
+            table = sections.get(topic)
+            if table is None:
+                table = sections[topic] = LineTable(buffers)
+            table.append(source_index, char_start, byte_start, byte_end)
+    return sections
+
+
+def segment_sources(sources: list[SourceRecord]) -> list[ChunkData]:
+    """Parse, split and chunk sources straight from their spool files.
+
+    Sections keep only offsets, so the chunk texts are the one in-memory copy
+    of the corpus; each topic's offsets are dropped once it has been chunked.
+    """
+    with ExitStack() as stack:
+        buffers = SourceBuffers(sources, stack)
+        sections = extract_source_topics(buffers)
+        chunks: list[ChunkData] = []
+        for topic in list(sections):
+            chunks.extend(iter_chunks({topic: sections.pop(topic)}, source_keys=buffers.source_keys))
+        return chunks
+
+
+def _chunk_topic(
+    topic: str, lines: LineTable, reusable: Mapping[str, str], source_keys: Mapping[str, str]
+) -> tuple[str, list[ChunkData] | None]:
+    """The topic's fingerprint, and its chunks unless ``reusable`` has the same fingerprint for it."""
+    fingerprint = lines.fingerprint()
+    if reusable.get(topic) == fingerprint:
+        return fingerprint, None
+    return fingerprint, list(iter_chunks({topic: lines}, source_keys=source_keys))
+
+
+def segment_changed_topics(
+    sources: list[SourceRecord], reusable: Mapping[str, str]
+) -> tuple[dict[str, str], dict[str, list[ChunkData]]]:
+    """Fingerprint every topic, but chunk only those not in ``reusable`` with the same fingerprint.
+
+    ``reusable`` maps topics whose chunks the caller still has to their
+    fingerprints. Returns all fingerprints in topic order, and the new chunks
+    of every other topic.
+    """
+    with ExitStack() as stack:
+        buffers = SourceBuffers(sources, stack)
+        sections = extract_source_topics(buffers)
+        fingerprints: dict[str, str] = {}
+        rebuilt: dict[str, list[ChunkData]] = {}
+        for topic in list(sections):
+            fingerprints[topic], chunks = _chunk_topic(topic, sections.pop(topic), reusable, buffers.source_keys)
+            if chunks is not None:
+                rebuilt[topic] = chunks
+        return fingerprints, rebuilt
+
+
+@dataclass(frozen=True)
+class ParallelSegmentation:
+    """Segment jobs whose text sources add up to ``min_bytes`` or more across ``workers`` processes.
+
+    Each worker gets ``ranges_per_worker`` byte ranges on average, so one
+    slow range doesn't leave the others idle.
+    """
+
+    workers: int
+    min_bytes: int = 32 * 1024 * 1024
+    ranges_per_worker: int = 4
+
+
+@dataclass(slots=True)
+class _Run:
+    """Lines of a scanned range under one heading; ``topic`` is None before the range's first heading."""
+
+    topic: str | None
+    char_starts: array = field(default_factory=lambda: array("q"))
+    byte_starts: array = field(default_factory=lambda: array("q"))
+    byte_ends: array = field(default_factory=lambda: array("q"))
+
+
+def _line_ranges(data: bytes | mmap.mmap, range_bytes: int) -> list[tuple[int, int]]:
+    """Split ``data`` into ranges of about ``range_bytes``, each ending after a newline or at the end."""
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    while start < len(data):
+        newline = data.find(b"\n", start + range_bytes) if start + range_bytes < len(data) else -1
+        end = len(data) if newline == -1 else newline + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def scan_range(source: SourceRecord, start: int, end: int | None) -> tuple[int, list[_Run]]:
+    """Headings and line offsets in ``[start, end)`` of one source, and the range's length in chars.
+
+    Char offsets are relative to ``start``: they only become absolute once
+    the lengths of the ranges before it are known.
+    """
+    with ExitStack() as stack:
+        data = SourceBuffers([source], stack).buffers[0]
+        end = len(data) if end is None else end
+        runs = [_Run(None)]
+        for text, char_start, byte_start, byte_end in scan_lines(data, start, end):
+            heading = heading_topic(text)
+            if heading is not None:
+                runs.append(_Run(heading))
+                continue
+            run = runs[-1]
+            run.char_starts.append(char_start)
+            run.byte_starts.append(byte_start)
+            run.byte_ends.append(byte_end)
+        raw = data[start:end]
+        return (len(raw) if raw.isascii() else len(raw.decode("utf-8"))), runs
+
+
+def chunk_topics(
+    sources: list[SourceRecord], batch: list[tuple[str, LineColumns]], reusable: Mapping[str, str]
+) -> list[tuple[str, list[ChunkData] | None]]:
+    """``_chunk_topic`` over a batch of topics given as ``LineTable`` columns."""
+    with ExitStack() as stack:
+        buffers = SourceBuffers(sources, stack)
+        return [
+            _chunk_topic(topic, LineTable.from_columns(buffers, columns), reusable, buffers.source_keys)
+            for topic, columns in batch
+        ]
+
+
+def _merge_scans(buffers: SourceBuffers, scans: Iterable[tuple[int, int, list[_Run]]]) -> dict[str, LineTable]:
+    """Topic sections from per-range scans, in source and range order: same result as ``extract_source_topics``."""
+    topic = "General"
+    sections: dict[str, LineTable] = {}
+    source_index, char_offset = -1, 0
+    for scanned_source, chars, runs in scans:
+        if scanned_source != source_index:
+            source_index, char_offset = scanned_source, 0
+        for run in runs:
+            if run.topic is not None:
+                topic = run.topic
+            if not run.byte_starts:
+                continue
+            table = sections.get(topic)
+            if table is None:
+                table = sections[topic] = LineTable(buffers)
+            char_starts = run.char_starts if not char_offset else (start + char_offset for start in run.char_starts)
+            table.extend(source_index, char_starts, run.byte_starts, run.byte_ends)
+        char_offset += chars
+    return sections
+
+
+def _topic_batches(sections: dict[str, LineTable], batches: int) -> list[list[tuple[str, LineColumns]]]:
+    """Consecutive topics grouped into about ``batches`` batches of similar line counts, in topic order."""
+    target = sum(len(lines) for lines in sections.values()) // max(batches, 1) + 1
+    grouped: list[list[tuple[str, LineColumns]]] = [[]]
+    size = 0
+    for topic, lines in sections.items():
+        if size >= target:
+            grouped.append([])
+            size = 0
+        grouped[-1].append((topic, lines.columns()))
+        size += len(lines)
+    return grouped if grouped[0] else []
+
+
+def segment_changed_topics_parallel(
+    sources: list[SourceRecord],
+    reusable: Mapping[str, str],
+    *,
+    map_tasks: TaskMap,
+    parallel: ParallelSegmentation,
+    range_bytes: int | None = None,
+) -> tuple[dict[str, str], dict[str, list[ChunkData]]]:
+    """``segment_changed_topics`` with the work spread over ``map_tasks``, with the same result.
+
+    Sources are cut into line-aligned byte ranges that are scanned for
+    headings independently; lines before a range's first heading belong to
+    whichever topic the ranges before it ended in, which the merge resolves
+    in order. Topics are then fingerprinted and chunked in batches. Ranges
+    need not start at headings: a topic may span ranges and sources.
+    """
+    tasks = parallel.workers * parallel.ranges_per_worker
+    with ExitStack() as stack:
+        buffers = SourceBuffers(sources, stack)
+        if range_bytes is None:
+            total = sum(len(data) for data in buffers.buffers)
+            range_bytes = max(total // tasks, 1024 * 1024)
+        ranges: list[tuple[int, int, int | None]] = []
+        for source_index, (source, data) in enumerate(zip(sources, buffers.buffers)):
+            if not source.is_text:
+                ranges.append((source_index, 0, None))
+                continue
+            ranges.extend((source_index, start, end) for start, end in _line_ranges(data, range_bytes))
+        scanned = map_tasks(scan_range, [(sources[source_index], start, end) for source_index, start, end in ranges])
+        sections = _merge_scans(
+            buffers, ((source_index, chars, runs) for (source_index, _, _), (chars, runs) in zip(ranges, scanned))
+        )
+        del scanned
+
+        batches = _topic_batches(sections, tasks)
+        topic_order = list(sections)
+        sections.clear()
+        results = map_tasks(
+            chunk_topics,
+            [
+                (sources, batch, {topic: reusable[topic] for topic, _ in batch if topic in reusable})
+                for batch in batches
+            ],
+        )
+        fingerprints: dict[str, str] = {}
+        rebuilt: dict[str, list[ChunkData]] = {}
+        for topic, (fingerprint, chunks) in zip(topic_order, (result for batch in results for result in batch)):
+            fingerprints[topic] = fingerprint
+            if chunks is not None:
+                rebuilt[topic] = chunks
+        return fingerprints, rebuilt
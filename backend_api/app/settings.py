@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration, read from ``MCQ_*`` environment variables."""
+
+    sqlite_path: str | None = None
+    spool_dir: str = field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "anki-mcq-spool"))
+    max_upload_mb: int = 256
+    export_dir: str = field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "anki-mcq-exports"))
+    worker_mode: str = "process"
+    max_workers: int = 2
+    max_queue: int = 1000
+    generator: str = "heuristic"
+    term_ranking: str = "first"
+    generation_concurrency: int = 8
+    generation_max_attempts: int = 4
+    fake_generator_latency_ms: int = 200
+    card_cache_entries: int = 10_000
+    card_cache_mb: int = 64
+    card_cache_dir: str | None = None
+    # 0 is unlimited
+    card_cache_disk_mb: int = 1024
+    events_heartbeat_s: float = 15.0
+    page_cache_mb: int = 32
+    job_memory_mb: int = 256
+    job_spill_dir: str = field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "anki-mcq-results"))
+    # a whole POST /v1/batches request, and everything its archive decompresses to;
+    # each file in it is still held to max_upload_mb
+    max_batch_upload_mb: int = 2048
+    max_batch_jobs: int = 1000
+    max_batch_files: int = 10_000
+    # 0 disables the TTL or budget
+    job_ttl_s: float = 86_400.0
+    export_ttl_s: float = 86_400.0
+    export_max_mb: int = 2048
+    sweep_interval_s: float = 60.0
+    # process mode only: jobs with this much text are segmented across all workers; 0 turns it off
+    parallel_segment_mb: int = 32
+    # text held by the cross-job content index; 0 turns reuse across jobs off
+    content_index_mb: int = 128
+    # jobs slower than this are profiled into profile_dir; 0 turns profiling off
+    profile_slow_jobs_ms: int = 0
+    profile_dir: str = field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "anki-mcq-profiles"))
+    profile_interval_ms: int = 10
+
+    @property
+    def max_upload_bytes(self) -> int:
+        return self.max_upload_mb * 1024 * 1024
+
+    @property
+    def max_batch_upload_bytes(self) -> int:
+        return self.max_batch_upload_mb * 1024 * 1024
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            sqlite_path=os.environ.get("MCQ_SQLITE_PATH") or None,
+            spool_dir=os.environ.get("MCQ_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "anki-mcq-spool"),
+            max_upload_mb=int(os.environ.get("MCQ_MAX_UPLOAD_MB", "256")),
+            export_dir=os.environ.get("MCQ_EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "anki-mcq-exports"),
+            worker_mode=os.environ.get("MCQ_WORKER_MODE", "process"),
+            max_workers=int(os.environ.get("MCQ_MAX_WORKERS", "2")),
+            max_queue=int(os.environ.get("MCQ_MAX_QUEUE", "1000")),
+            generator=os.environ.get("MCQ_GENERATOR", "heuristic"),
+            term_ranking=os.environ.get("MCQ_TERM_RANKING", "first"),
+            generation_concurrency=int(os.environ.get("MCQ_GENERATION_CONCURRENCY", "8")),
+            generation_max_attempts=int(os.environ.get("MCQ_GENERATION_MAX_ATTEMPTS", "4")),
+            fake_generator_latency_ms=int(os.environ.get("MCQ_FAKE_GENERATOR_LATENCY_MS", "200")),
+            card_cache_entries=int(os.environ.get("MCQ_CARD_CACHE_ENTRIES", "10000")),
+            card_cache_mb=int(os.environ.get("MCQ_CARD_CACHE_MB", "64")),
+            card_cache_dir=os.environ.get("MCQ_CARD_CACHE_DIR") or None,
+            card_cache_disk_mb=int(os.environ.get("MCQ_CARD_CACHE_DISK_MB", "1024")),
+            events_heartbeat_s=float(os.environ.get("MCQ_EVENTS_HEARTBEAT_S", "15")),
+            page_cache_mb=int(os.environ.get("MCQ_PAGE_CACHE_MB", "32")),
+            job_memory_mb=int(os.environ.get("MCQ_JOB_MEMORY_MB", "256")),
+            job_spill_dir=os.environ.get("MCQ_JOB_SPILL_DIR")
+            or os.path.join(tempfile.gettempdir(), "anki-mcq-results"),
+            max_batch_upload_mb=int(os.environ.get("MCQ_MAX_BATCH_UPLOAD_MB", "2048")),
+            max_batch_jobs=int(os.environ.get("MCQ_MAX_BATCH_JOBS", "1000")),
+            max_batch_files=int(os.environ.get("MCQ_MAX_BATCH_FILES", "10000")),
+            job_ttl_s=float(os.environ.get("MCQ_JOB_TTL_S", "86400")),
+            export_ttl_s=float(os.environ.get("MCQ_EXPORT_TTL_S", "86400")),
+            export_max_mb=int(os.environ.get("MCQ_EXPORT_MAX_MB", "2048")),
+            sweep_interval_s=float(os.environ.get("MCQ_SWEEP_INTERVAL_S", "60")),
+            parallel_segment_mb=int(os.environ.get("MCQ_PARALLEL_SEGMENT_MB", "32")),
+            content_index_mb=int(os.environ.get("MCQ_CONTENT_INDEX_MB", "128")),
+            profile_slow_jobs_ms=int(os.environ.get("MCQ_PROFILE_SLOW_JOBS_MS", "0")),
+            profile_dir=os.environ.get("MCQ_PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "anki-mcq-profiles"),
+            profile_interval_ms=int(os.environ.get("MCQ_PROFILE_INTERVAL_MS", "10")),
+        )
@@ -0,0 +1,691 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict
+from datetime import datetime
+from threading import Lock, local
+from uuid import uuid4
+
+from . import fastjson
+from .events import ProgressBroker, ProgressEvent
+from .ingest import SpooledUpload
+from .records import CardData, ChunkData, FailedCardData, SourceRefData
+from .schemas import (
+    ContentReuse,
+    JobStatus,
+    OutputFormat,
+    RuleStat,
+    SourceType,
+    StageSpan,
+    StoreMetricsResponse,
+    ValidationSummary,
+)
+from .store import (
+    CardRecord,
+    ChunkManifestEntry,
+    ExportRecord,
+    JobNotFoundError,
+    JobRecord,
+    JsonPage,
+    NewJob,
+    SourceRecord,
+    new_job_record,
+    new_source_record,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    course_name TEXT NOT NULL,
+    output_format TEXT NOT NULL,
+    tenant_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL,
+    current_step TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    source_count INTEGER NOT NULL DEFAULT 0,
+    total_cards INTEGER NOT NULL DEFAULT 0,
+    passed_cards INTEGER NOT NULL DEFAULT 0,
+    failed_cards INTEGER NOT NULL DEFAULT 0,
+    cache_hits INTEGER NOT NULL DEFAULT 0,
+    cache_misses INTEGER NOT NULL DEFAULT 0,
+    rule_stats TEXT NOT NULL DEFAULT '[]',
+    topic_fingerprints TEXT NOT NULL DEFAULT '{}',
+    revision INTEGER NOT NULL DEFAULT 0,
+    stage_spans TEXT NOT NULL DEFAULT '[]',
+    batch_id TEXT,
+    content_reuse TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch_id) WHERE batch_id IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS sources (
+    source_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    position INTEGER NOT NULL,
+    source_type TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    is_text INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sources_job ON sources(job_id, position);
+
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    position INTEGER NOT NULL,
+    chunk_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    subtopic TEXT NOT NULL,
+    token_estimate INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    source_refs TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS chunk_manifest (
+    job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    chunk_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    token_estimate INTEGER NOT NULL,
+    card_count INTEGER NOT NULL,
+    PRIMARY KEY (job_id, chunk_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS cards (
+    job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    passed INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    chunk_id TEXT NOT NULL,
+    reason TEXT,
+    question TEXT NOT NULL,
+    multiple_choice TEXT NOT NULL,
+    correct_answers TEXT NOT NULL,
+    extra TEXT NOT NULL,
+    PRIMARY KEY (job_id, passed, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS exports (
+    export_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    export_format TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exports_job ON exports(job_id);
+"""
+
+_JOB_COLUMNS = (
+    "job_id, course_name, output_format, tenant_id, status, progress, current_step, created_at, "
+    "source_count, total_cards, passed_cards, failed_cards, cache_hits, cache_misses, rule_stats, revision, "
+    "stage_spans, batch_id, content_reuse"
+)
+
+
+_INSERT_JOB = f"INSERT INTO jobs ({_JOB_COLUMNS}) VALUES ({', '.join('?' for _ in _JOB_COLUMNS.split(','))})"
+_INSERT_SOURCE = (
+    "INSERT INTO sources (source_id, job_id, position, source_type, filename, path, size_bytes, is_text, sha256) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _job_row(job: JobRecord) -> tuple:
+    """A new job's values for ``_JOB_COLUMNS``; results and stats start out empty."""
+    return (
+        job.job_id,
+        job.course_name,
+        json.dumps([fmt.value for fmt in job.output_format]),
+        job.tenant_id,
+        job.status.value,
+        job.progress,
+        job.current_step,
+        job.created_at.isoformat(),
+        job.source_count,
+        0,
+        0,
+        0,
+        0,
+        0,
+        "[]",
+        0,
+        "[]",
+        job.batch_id,
+        "{}",
+    )
+
+
+def _job_from_row(row: sqlite3.Row) -> JobRecord:
+    return JobRecord(
+        job_id=row["job_id"],
+        course_name=row["course_name"],
+        output_format=[OutputFormat(fmt) for fmt in json.loads(row["output_format"])],
+        tenant_id=row["tenant_id"],
+        status=JobStatus(row["status"]),
+        progress=row["progress"],
+        current_step=row["current_step"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        source_count=row["source_count"],
+        cache_hits=row["cache_hits"],
+        cache_misses=row["cache_misses"],
+        revision=row["revision"],
+        batch_id=row["batch_id"],
+        stage_spans=[StageSpan(**span) for span in json.loads(row["stage_spans"])],
+        content_reuse=ContentReuse(**json.loads(row["content_reuse"])),
+        validation_summary=ValidationSummary(
+            total=row["total_cards"],
+            passed=row["passed_cards"],
+            failed=row["failed_cards"],
+            rule_stats=[RuleStat(**stat) for stat in json.loads(row["rule_stats"])],
+        ),
+    )
+
+
+def _source_row(job_id: str, position: int, source: SourceRecord) -> tuple:
+    return (
+        source.source_id,
+        job_id,
+        position,
+        source.source_type.value,
+        source.filename,
+        source.path,
+        source.size_bytes,
+        int(source.is_text),
+        source.sha256,
+    )
+
+
+def _card_row(job_id: str, position: int, record: CardRecord) -> tuple:
+    card = record.card
+    return (
+        job_id,
+        int(record.reason is None),
+        position,
+        record.chunk_id,
+        record.reason,
+        card.question,
+        json.dumps(card.multiple_choice),
+        json.dumps(card.correct_answers),
+        card.extra,
+    )
+
+
+def _card_from_row(row: sqlite3.Row) -> CardData:
+    return CardData(
+        row["question"], fastjson.loads(row["multiple_choice"]), fastjson.loads(row["correct_answers"]), row["extra"]
+    )
+
+
+def _chunk_from_row(row: sqlite3.Row) -> ChunkData:
+    return ChunkData(
+        row["chunk_id"],
+        row["topic"],
+        row["subtopic"],
+        row["token_estimate"],
+        row["text"],
+        [SourceRefData(**ref) for ref in fastjson.loads(row["source_refs"])],
+    )
+
+
+# list item fields, which are also the column names they are stored under
+_CHUNK_FIELDS = ("chunk_id", "topic", "subtopic", "token_estimate", "text", "source_refs")
+_CARD_FIELDS = ("question", "multiple_choice", "correct_answers", "extra")
+_JSON_FIELDS = frozenset({"source_refs", "multiple_choice", "correct_answers"})
+
+
+def _projected(fields: tuple[str, ...] | None, allowed: tuple[str, ...]) -> tuple[str, ...]:
+    # the names end up in SQL, so never trust them
+    if fields and not set(fields) <= set(allowed):
+        raise ValueError(f"unknown fields: {', '.join(sorted(set(fields) - set(allowed)))}")
+    return fields or allowed
+
+
+def _json_items(rows: list[tuple], names: tuple[str, ...], *, skip: int = 1) -> list[dict]:
+    """List items straight from row tuples, whose first ``skip`` columns are not item fields.
+
+    No Pydantic model is constructed (and re-validated) for data that was
+    validated before it was stored.
+    """
+    decoders = [fastjson.loads if name in _JSON_FIELDS else None for name in names]
+    return [
+        {name: decode(value) if decode else value for name, decode, value in zip(names, decoders, row[skip:])}
+        for row in rows
+    ]
+
+
+def _next_after(rows: list[tuple], limit: int) -> int | None:
+    # pages fetch ``limit + 1`` rows ordered by position; the extra row only says there is more
+    return rows[limit - 1][0] if len(rows) > limit else None
+
+
+class SQLiteStore:
+    """Persistent ``JobStore`` backed by a SQLite database in WAL mode.
+
+    ``get_job`` returns job metadata only; sources, chunks and cards are
+    fetched from their own tables when requested. Each thread reads through
+    its own connection against the last committed WAL snapshot, so status
+    reads do not queue behind other jobs' batched writes. Status changes are
+    published to ``events``, when given, once they are committed.
+    """
+
+    def __init__(self, path: str, events: ProgressBroker | None = None) -> None:
+        self._path = path
+        self._events = events
+        self._local = local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = Lock()
+        # SQLite allows one writer at a time; serialising writers here avoids busy retries.
+        self._write_lock = Lock()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, so readers never wait on another thread's writer."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = local()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        return self._connection().execute(sql, params).fetchall()
+
+    def _tuples(self, sql: str, params: tuple = ()) -> list[tuple]:
+        """Like ``_query`` but with plain tuple rows, about half the fetch cost of ``sqlite3.Row`` on big pages."""
+        cursor = self._connection().cursor()
+        cursor.row_factory = None
+        return cursor.execute(sql, params).fetchall()
+
+    def create_job(
+        self, course_name: str, output_format: list[OutputFormat], tenant_id: str = "default"
+    ) -> JobRecord:
+        job = JobRecord(
+            job_id=f"job_{uuid4().hex[:10]}", course_name=course_name, output_format=output_format, tenant_id=tenant_id
+        )
+        with self._transaction() as conn:
+            conn.execute(_INSERT_JOB, _job_row(job))
+        return job
+
+    def create_batch(self, jobs: list[NewJob]) -> tuple[str, list[JobRecord]]:
+        """Create ``jobs`` with their sources in one transaction."""
+        batch_id = f"batch_{uuid4().hex[:10]}"
+        records = [new_job_record(new_job, batch_id) for new_job in jobs]
+        with self._transaction() as conn:
+            conn.executemany(_INSERT_JOB, (_job_row(job) for job in records))
+            conn.executemany(
+                _INSERT_SOURCE,
+                (
+                    _source_row(job.job_id, position, source)
+                    for job in records
+                    for position, source in enumerate(job.sources, start=1)
+                ),
+            )
+        return batch_id, records
+
+    def get_job(self, job_id: str) -> JobRecord | None:
+        rows = self._query(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,))
+        return _job_from_row(rows[0]) if rows else None
+
+    def get_batch_jobs(self, batch_id: str) -> list[JobRecord]:
+        rows = self._query(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE batch_id = ? ORDER BY rowid", (batch_id,))
+        return [_job_from_row(row) for row in rows]
+
+    def add_source(
+        self, job_id: str, source_type: SourceType, filename: str, spooled: SpooledUpload
+    ) -> SourceRecord:
+        source = new_source_record(source_type, filename, spooled)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET source_count = source_count + 1 WHERE job_id = ? RETURNING source_count", (job_id,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise JobNotFoundError(job_id)
+            conn.execute(_INSERT_SOURCE, _source_row(job_id, row[0], source))
+        return source
+
+    def get_sources(self, job_id: str) -> list[SourceRecord]:
+        rows = self._query(
+            "SELECT source_id, source_type, filename, path, size_bytes, is_text, sha256 FROM sources "
+            "WHERE job_id = ? ORDER BY position",
+            (job_id,),
+        )
+        return [
+            SourceRecord(
+                source_id=row["source_id"],
+                source_type=SourceType(row["source_type"]),
+                filename=row["filename"],
+                path=row["path"],
+                size_bytes=row["size_bytes"],
+                is_text=bool(row["is_text"]),
+                sha256=row["sha256"],
+            )
+            for row in rows
+        ]
+
+    def update_progress(self, job_id: str, *, status: JobStatus, progress: int, current_step: str) -> None:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, current_step = ? WHERE job_id = ?",
+                (status.value, progress, current_step, job_id),
+            )
+            if cursor.rowcount == 0:
+                raise JobNotFoundError(job_id)
+        if self._events is not None:
+            self._events.publish(ProgressEvent(job_id, status, progress, current_step))
+
+    def update_progress_many(
+        self, job_ids: list[str], *, status: JobStatus, progress: int, current_step: str
+    ) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET status = ?, progress = ?, current_step = ? WHERE job_id = ?",
+                ((status.value, progress, current_step, job_id) for job_id in job_ids),
+            )
+        if self._events is not None:
+            for job_id in job_ids:
+                self._events.publish(ProgressEvent(job_id, status, progress, current_step))
+
+    def set_chunks(
+        self, job_id: str, chunks: list[ChunkData], topic_fingerprints: dict[str, str] | None = None
+    ) -> None:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET topic_fingerprints = ?, revision = revision + 1 WHERE job_id = ?",
+                (json.dumps(topic_fingerprints or {}), job_id),
+            )
+            if cursor.rowcount == 0:
+                raise JobNotFoundError(job_id)
+            conn.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO chunks (job_id, position, chunk_id, topic, subtopic, token_estimate, text, source_refs) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        job_id,
+                        position,
+                        c.chunk_id,
+                        c.topic,
+                        c.subtopic,
+                        c.token_estimate,
+                        c.text,
+                        json.dumps([asdict(ref) for ref in c.source_refs]),
+                    )
+                    for position, c in enumerate(chunks)
+                ),
+            )
+
+    def get_chunks(self, job_id: str) -> list[ChunkData]:
+        rows = self._query(
+            "SELECT chunk_id, topic, subtopic, token_estimate, text, source_refs FROM chunks "
+            "WHERE job_id = ? ORDER BY position",
+            (job_id,),
+        )
+        return [_chunk_from_row(row) for row in rows]
+
+    def get_topic_fingerprints(self, job_id: str) -> dict[str, str]:
+        rows = self._query("SELECT topic_fingerprints FROM jobs WHERE job_id = ?", (job_id,))
+        return json.loads(rows[0]["topic_fingerprints"]) if rows else {}
+
+    def set_validated_cards(
+        self,
+        job_id: str,
+        records: list[CardRecord],
+        summary: ValidationSummary,
+        manifest: list[ChunkManifestEntry] | None = None,
+    ) -> None:
+        """Store every generated card; ``position`` is its index in ``records``, passed or not."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET total_cards = ?, passed_cards = ?, failed_cards = ?, rule_stats = ?, "
+                "revision = revision + 1 WHERE job_id = ?",
+                (
+                    summary.total,
+                    summary.passed,
+                    summary.failed,
+                    json.dumps([stat.model_dump() for stat in summary.rule_stats]),
+                    job_id,
+                ),
+            )
+            if cursor.rowcount == 0:
+                raise JobNotFoundError(job_id)
+            conn.execute("DELETE FROM chunk_manifest WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO chunk_manifest (job_id, chunk_id, topic, token_estimate, card_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (job_id, entry.chunk_id, entry.topic, entry.token_estimate, entry.card_count)
+                    for entry in manifest or ()
+                ),
+            )
+            conn.execute("DELETE FROM cards WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO cards "
+                "(job_id, passed, position, chunk_id, reason, question, multiple_choice, correct_answers, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_card_row(job_id, position, record) for position, record in enumerate(records)),
+            )
+
+    def get_card_records(self, job_id: str) -> list[CardRecord]:
+        rows = self._query(
+            "SELECT chunk_id, reason, question, multiple_choice, correct_answers, extra FROM cards "
+            "WHERE job_id = ? ORDER BY position",
+            (job_id,),
+        )
+        return [CardRecord(chunk_id=row["chunk_id"], card=_card_from_row(row), reason=row["reason"]) for row in rows]
+
+    def get_chunk_manifest(self, job_id: str) -> dict[str, ChunkManifestEntry]:
+        rows = self._query(
+            "SELECT chunk_id, topic, token_estimate, card_count FROM chunk_manifest WHERE job_id = ?", (job_id,)
+        )
+        return {
+            row["chunk_id"]: ChunkManifestEntry(
+                chunk_id=row["chunk_id"],
+                topic=row["topic"],
+                token_estimate=row["token_estimate"],
+                card_count=row["card_count"],
+            )
+            for row in rows
+        }
+
+    def set_cache_stats(self, job_id: str, *, hits: int, misses: int) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET cache_hits = ?, cache_misses = ? WHERE job_id = ?", (hits, misses, job_id)
+            )
+
+    def set_stage_spans(self, job_id: str, spans: list[StageSpan]) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage_spans = ? WHERE job_id = ?",
+                (json.dumps([span.model_dump() for span in spans]), job_id),
+            )
+
+    def set_content_reuse(self, job_id: str, reuse: ContentReuse) -> None:
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET content_reuse = ? WHERE job_id = ?", (reuse.model_dump_json(), job_id))
+
+    def get_cards(self, job_id: str) -> list[CardData]:
+        rows = self._query(
+            "SELECT question, multiple_choice, correct_answers, extra FROM cards "
+            "WHERE job_id = ? AND passed = 1 ORDER BY position",
+            (job_id,),
+        )
+        return [_card_from_row(row) for row in rows]
+
+    def iter_cards(self, job_id: str) -> Iterator[CardData]:
+        """Like ``get_cards`` but reads rows off the cursor as they are consumed."""
+        cursor = self._connection().execute(
+            "SELECT question, multiple_choice, correct_answers, extra FROM cards "
+            "WHERE job_id = ? AND passed = 1 ORDER BY position",
+            (job_id,),
+        )
+        for row in cursor:
+            yield _card_from_row(row)
+
+    def get_chunks_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage:
+        """Only the projected columns are read, so a page without ``text`` never touches the chunk text."""
+        names = _projected(fields, _CHUNK_FIELDS)
+        rows = self._tuples(
+            f"SELECT position, {', '.join(names)} FROM chunks "
+            "WHERE job_id = ? AND position > ? ORDER BY position LIMIT ?",
+            (job_id, -1 if after is None else after, limit + 1),
+        )
+        return JsonPage(fastjson.dumps(_json_items(rows[:limit], names)), _next_after(rows, limit))
+
+    def get_cards_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage:
+        """Keyed by card ``position``, so each page is one range scan of the primary key."""
+        names = _projected(fields, _CARD_FIELDS)
+        rows = self._tuples(
+            f"SELECT position, {', '.join(names)} FROM cards "
+            "WHERE job_id = ? AND passed = 1 AND position > ? ORDER BY position LIMIT ?",
+            (job_id, -1 if after is None else after, limit + 1),
+        )
+        return JsonPage(fastjson.dumps(_json_items(rows[:limit], names)), _next_after(rows, limit))
+
+    def get_failed_cards_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage:
+        names = _projected(fields, ("reason", "card"))
+        rows = self._tuples(
+            "SELECT position, reason, question, multiple_choice, correct_answers, extra FROM cards "
+            "WHERE job_id = ? AND passed = 0 AND position > ? ORDER BY position LIMIT ?",
+            (job_id, -1 if after is None else after, limit + 1),
+        )
+        cards = _json_items(rows[:limit], _CARD_FIELDS, skip=2)
+        items = [
+            {name: value for name, value in (("reason", row[1]), ("card", card)) if name in names}
+            for row, card in zip(rows, cards)
+        ]
+        return JsonPage(fastjson.dumps(items), _next_after(rows, limit))
+
+    def get_failed_cards(self, job_id: str) -> list[FailedCardData]:
+        rows = self._query(
+            "SELECT reason, question, multiple_choice, correct_answers, extra FROM cards "
+            "WHERE job_id = ? AND passed = 0 ORDER BY position",
+            (job_id,),
+        )
+        return [FailedCardData(reason=row["reason"], card=_card_from_row(row)) for row in rows]
+
+    def mark_failed(self, job_id: str, reason: str) -> None:
+        current_step = f"failed: {reason}"
+        with self._transaction() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET status = ?, current_step = ? WHERE job_id = ? RETURNING progress",
+                (JobStatus.FAILED.value, current_step, job_id),
+            ).fetchone()
+            if row is None:
+                raise JobNotFoundError(job_id)
+        if self._events is not None:
+            self._events.publish(ProgressEvent(job_id, JobStatus.FAILED, row["progress"], current_step))
+
+    def create_export(
+        self,
+        *,
+        job_id: str,
+        export_format: OutputFormat,
+        filename: str,
+        content_type: str,
+        path: str,
+        size_bytes: int,
+        etag: str,
+    ) -> ExportRecord:
+        export = ExportRecord(
+            export_id=f"exp_{uuid4().hex[:10]}",
+            job_id=job_id,
+            export_format=export_format,
+            filename=filename,
+            content_type=content_type,
+            path=path,
+            size_bytes=size_bytes,
+            etag=etag,
+        )
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO exports "
+                "(export_id, job_id, export_format, filename, content_type, path, size_bytes, etag, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    export.export_id,
+                    job_id,
+                    export_format.value,
+                    filename,
+                    content_type,
+                    path,
+                    size_bytes,
+                    etag,
+                    export.created_at.isoformat(),
+                ),
+            )
+        return export
+
+    def get_export(self, export_id: str) -> ExportRecord | None:
+        rows = self._query(
+            "SELECT export_id, job_id, export_format, filename, content_type, path, size_bytes, etag, created_at "
+            "FROM exports WHERE export_id = ?",
+            (export_id,),
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return ExportRecord(
+            export_id=row["export_id"],
+            job_id=row["job_id"],
+            export_format=OutputFormat(row["export_format"]),
+            filename=row["filename"],
+            content_type=row["content_type"],
+            path=row["path"],
+            size_bytes=row["size_bytes"],
+            etag=row["etag"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+        )
+
+    def metrics(self) -> StoreMetricsResponse:
+        """Row counts; jobs and exports live in the database, so nothing is resident, spilled or evicted."""
+        jobs = self._tuples("SELECT COUNT(*) FROM jobs")[0][0]
+        exports, export_bytes = self._tuples("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM exports")[0]
+        return StoreMetricsResponse(
+            live_jobs=jobs,
+            live_exports=exports,
+            resident_bytes=0,
+            spilled_jobs=0,
+            export_bytes=export_bytes,
+            expired_jobs=0,
+            evicted_exports=0,
+        )
@@ -1,19 +1,116 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from datetime import datetime, timezone
+import os
+import sys
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
 from threading import Lock
+from typing import Any, Generic, Protocol, TypeVar
 from uuid import uuid4
 
-from .schemas import Card, Chunk, JobStatus, OutputFormat, SourceType, ValidationErrorItem, ValidationSummary
+from pydantic import TypeAdapter
+
+from .compact import MemoryBudget, PackedResults, pack_results, read_spill, write_spill
+from .events import TERMINAL_STATUSES, ProgressBroker, ProgressEvent
+from .ingest import SpooledUpload
+from .retention import RetentionPolicy
+from .records import CardData, ChunkData, FailedCardData
+from .schemas import (
+    ContentReuse,
+    JobStatus,
+    OutputFormat,
+    SourceType,
+    StageSpan,
+    StoreMetricsResponse,
+    ValidationSummary,
+)
+
+
+T = TypeVar("T")
+
+
+class JobNotFoundError(KeyError):
+    """No job has this id, or it expired while the request using it was in flight."""
 
 
 @dataclass
 class SourceRecord:
+    """An uploaded source; the content stays in the spool file at ``path``."""
+
     source_id: str
     source_type: SourceType
     filename: str
-    raw_text: str
+    path: str
+    size_bytes: int
+    is_text: bool
+    sha256: str
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield the source's lines lazily, split exactly like ``str.splitlines``."""
+        if not self.is_text:
+            yield f"Binary source ({self.filename}) uploaded. OCR pipeline pending."
+            return
+        with open(self.path, encoding="utf-8") as handle:
+            for line in handle:
+                yield from line.splitlines()
+
+    def read_text(self) -> str:
+        return "\n".join(self.iter_lines())
+
+
+@dataclass(slots=True)
+class CardRecord:
+    """A generated card, the chunk it came from, and why it failed validation (None if it passed)."""
+
+    chunk_id: str
+    card: CardData
+    reason: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ChunkManifestEntry:
+    """A chunk whose cards are stored; ids are content-derived, so a matching id means the same chunk."""
+
+    chunk_id: str
+    topic: str
+    token_estimate: int
+    card_count: int
+
+
+@dataclass(frozen=True, slots=True)
+class Page(Generic[T]):
+    """One page of a job's chunks or cards; ``next_after`` is the ``after`` key of the next page, None on the last."""
+
+    items: list[T]
+    next_after: int | None
+
+
+def page_of(items: list[T], *, after: int | None, limit: int) -> Page[T]:
+    """Page an in-memory list, keyed by list index."""
+    start = 0 if after is None else after + 1
+    end = start + limit
+    return Page(items[start:end], end - 1 if end < len(items) else None)
+
+
+@dataclass(frozen=True, slots=True)
+class JsonPage:
+    """A page of list items already encoded as a JSON array, ready to be spliced into a response body."""
+
+    items: bytes
+    next_after: int | None
+
+
+_LIST_ADAPTERS: dict[type, TypeAdapter] = {
+    model: TypeAdapter(list[model]) for model in (ChunkData, CardData, FailedCardData)
+}
+
+
+def _json_page(page: Page[Any], model: type, fields: tuple[str, ...] | None) -> JsonPage:
+    """Encode records in one call to Pydantic's serialiser, which is far cheaper than a dict per item."""
+    include = {"__all__": set(fields)} if fields else None
+    return JsonPage(_LIST_ADAPTERS[model].dump_json(page.items, include=include), page.next_after)
 
 
 @dataclass
@@ -23,7 +120,9 @@ class ExportRecord:
     export_format: OutputFormat
     filename: str
     content_type: str
-    content: str
+    path: str
+    size_bytes: int
+    etag: str
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
 
@@ -32,69 +131,503 @@ class JobRecord:
     job_id: str
     course_name: str
     output_format: list[OutputFormat]
+    tenant_id: str = "default"
     status: JobStatus = JobStatus.QUEUED
     progress: int = 0
     current_step: str = "queued"
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # when the job last reached a terminal status; None while it is queued or running
+    finished_at: datetime | None = None
+    source_count: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # set for jobs created together through ``create_batch``
+    batch_id: str | None = None
+    # spans of the pipeline stages of the latest run, in the order they ran
+    stage_spans: list[StageSpan] = field(default_factory=list)
+    # what the latest run reused from other jobs through the content index
+    content_reuse: ContentReuse = field(default_factory=ContentReuse)
+    # bumped whenever the job's chunks or cards are replaced
+    revision: int = 0
     sources: list[SourceRecord] = field(default_factory=list)
-    chunks: list[Chunk] = field(default_factory=list)
-    cards: list[Card] = field(default_factory=list)
+    chunks: list[ChunkData] = field(default_factory=list)
+    topic_fingerprints: dict[str, str] = field(default_factory=dict)
+    card_records: list[CardRecord] = field(default_factory=list)
+    chunk_manifest: dict[str, ChunkManifestEntry] = field(default_factory=dict)
+    cards: list[CardData] = field(default_factory=list)
     validation_summary: ValidationSummary = field(default_factory=lambda: ValidationSummary(total=0, passed=0, failed=0))
-    failed_cards: list[ValidationErrorItem] = field(default_factory=list)
+    failed_cards: list[FailedCardData] = field(default_factory=list)
+    # a finished job's chunks and cards once packed (the lists above are then empty), or the file they spilled to
+    packed: PackedResults | None = None
+    spill_path: str | None = None
+
+
+def new_source_record(source_type: SourceType, filename: str, spooled: SpooledUpload) -> SourceRecord:
+    return SourceRecord(
+        source_id=f"src_{uuid4().hex[:10]}",
+        source_type=source_type,
+        filename=filename,
+        path=spooled.path,
+        size_bytes=spooled.size_bytes,
+        is_text=spooled.is_text,
+        sha256=spooled.sha256,
+    )
+
+
+@dataclass
+class NewJob:
+    """A job for ``create_batch``, with its already spooled sources as ``add_source`` arguments."""
+
+    course_name: str
+    output_format: list[OutputFormat]
+    tenant_id: str = "default"
+    sources: list[tuple[SourceType, str, SpooledUpload]] = field(default_factory=list)
+
+
+def new_job_record(new_job: NewJob, batch_id: str | None = None) -> JobRecord:
+    sources = [new_source_record(*source) for source in new_job.sources]
+    return JobRecord(
+        job_id=f"job_{uuid4().hex[:10]}",
+        course_name=new_job.course_name,
+        output_format=new_job.output_format,
+        tenant_id=new_job.tenant_id,
+        batch_id=batch_id,
+        sources=sources,
+        source_count=len(sources),
+    )
+
+
+def _card_lists(records: list[CardRecord]) -> dict[str, list]:
+    """``JobRecord`` fields derived from ``records``."""
+    return {
+        "card_records": records,
+        "cards": [record.card for record in records if record.reason is None],
+        "failed_cards": [
+            FailedCardData(reason=record.reason, card=record.card)
+            for record in records
+            if record.reason is not None
+        ],
+    }
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class JobStore(Protocol):
+    """Storage backend used by the API and the pipeline.
+
+    ``get_job`` only guarantees the scalar job fields; backends may leave
+    ``sources``, ``chunks``, ``topic_fingerprints``, ``card_records``,
+    ``chunk_manifest``, ``cards`` and ``failed_cards`` unloaded, so read those through the dedicated getters.
+    Writers raise ``JobNotFoundError`` for a job that does not exist (any more); readers may too.
+    """
+
+    def create_job(
+        self, course_name: str, output_format: list[OutputFormat], tenant_id: str = "default"
+    ) -> JobRecord: ...
+
+    def get_job(self, job_id: str) -> JobRecord | None: ...
+
+    def add_source(
+        self, job_id: str, source_type: SourceType, filename: str, spooled: SpooledUpload
+    ) -> SourceRecord: ...
+
+    def get_sources(self, job_id: str) -> list[SourceRecord]: ...
+
+    def update_progress(self, job_id: str, *, status: JobStatus, progress: int, current_step: str) -> None: ...
+
+    def update_progress_many(
+        self, job_ids: list[str], *, status: JobStatus, progress: int, current_step: str
+    ) -> None: ...
+
+    def create_batch(self, jobs: list[NewJob]) -> tuple[str, list[JobRecord]]: ...
+
+    def get_batch_jobs(self, batch_id: str) -> list[JobRecord]: ...
+
+    def set_chunks(
+        self, job_id: str, chunks: list[ChunkData], topic_fingerprints: dict[str, str] | None = None
+    ) -> None: ...
+
+    def get_chunks(self, job_id: str) -> list[ChunkData]: ...
+
+    def get_topic_fingerprints(self, job_id: str) -> dict[str, str]: ...
+
+    def set_validated_cards(
+        self,
+        job_id: str,
+        records: list[CardRecord],
+        summary: ValidationSummary,
+        manifest: list[ChunkManifestEntry] | None = None,
+    ) -> None: ...
+
+    def get_card_records(self, job_id: str) -> list[CardRecord]: ...
+
+    def get_chunk_manifest(self, job_id: str) -> dict[str, ChunkManifestEntry]: ...
+
+    def set_cache_stats(self, job_id: str, *, hits: int, misses: int) -> None: ...
+
+    def set_stage_spans(self, job_id: str, spans: list[StageSpan]) -> None: ...
+
+    def set_content_reuse(self, job_id: str, reuse: ContentReuse) -> None: ...
+
+    def get_cards(self, job_id: str) -> list[CardData]: ...
+
+    def get_chunks_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage: ...
+
+    def get_cards_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage: ...
+
+    def get_failed_cards_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage: ...
+
+    def iter_cards(self, job_id: str) -> Iterator[CardData]: ...
+
+    def get_failed_cards(self, job_id: str) -> list[FailedCardData]: ...
+
+    def mark_failed(self, job_id: str, reason: str) -> None: ...
+
+    def create_export(
+        self,
+        *,
+        job_id: str,
+        export_format: OutputFormat,
+        filename: str,
+        content_type: str,
+        path: str,
+        size_bytes: int,
+        etag: str,
+    ) -> ExportRecord: ...
+
+    def get_export(self, export_id: str) -> ExportRecord | None: ...
+
+    def metrics(self) -> StoreMetricsResponse: ...
+
+
+@dataclass(slots=True)
+class _ExportFile:
+    """One export file on disk and the exports serving it; identical content is only kept once."""
+
+    path: str
+    size_bytes: int
+    export_ids: list[str]
+    last_used: datetime
 
 
 class InMemoryStore:
-    def __init__(self) -> None:
+    """Process-local ``JobStore``.
+
+    Job records are treated as immutable snapshots: writers build a new record
+    under that job's own lock and swap it into ``_jobs``, so readers never take
+    a lock and always see a consistent record. Status changes are published to
+    ``events`` when given.
+
+    A job's chunks and cards are packed (see ``app.compact``) once it is done,
+    and unpacked again only if it is re-run. With ``spill_dir`` set, packed
+    results beyond ``memory_budget_bytes`` are spilled there, least recently
+    read first, and loaded back when next read.
+
+    ``retention`` bounds everything else: ``sweep`` drops finished jobs and
+    unused exports past their TTL, and exports beyond the disk budget are
+    dropped least recently used first as new ones arrive. Exports with
+    identical content share one file.
+    """
+
+    def __init__(
+        self,
+        events: ProgressBroker | None = None,
+        *,
+        memory_budget_bytes: int = 256 * 1024 * 1024,
+        spill_dir: str | None = None,
+        retention: RetentionPolicy | None = None,
+    ) -> None:
+        self._events = events
         self._jobs: dict[str, JobRecord] = {}
         self._exports: dict[str, ExportRecord] = {}
-        self._lock = Lock()
+        self._job_locks: dict[str, Lock] = {}
+        self._spill_dir = spill_dir
+        # without a spill directory the budget only keeps count
+        self._budget = MemoryBudget(memory_budget_bytes if spill_dir is not None else sys.maxsize)
+        self._retention = retention or RetentionPolicy()
+        # export files by content hash (their etag), least recently used first
+        self._export_files: OrderedDict[str, _ExportFile] = OrderedDict()
+        self._export_bytes = 0
+        self._exports_lock = Lock()
+        self._expired_jobs = 0
+        self._evicted_exports = 0
+        # job ids by batch, in creation order
+        self._batches: dict[str, list[str]] = {}
 
-    def create_job(self, course_name: str, output_format: list[OutputFormat]) -> JobRecord:
-        job = JobRecord(job_id=f"job_{uuid4().hex[:10]}", course_name=course_name, output_format=output_format)
-        with self._lock:
-            self._jobs[job.job_id] = job
+    def _job(self, job_id: str) -> JobRecord:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
         return job
 
-    def get_job(self, job_id: str) -> JobRecord | None:
-        with self._lock:
-            return self._jobs.get(job_id)
+    def _job_lock(self, job_id: str) -> Lock:
+        # a job and its lock go away together when it expires, possibly under a request still holding its id
+        lock = self._job_locks.get(job_id)
+        if lock is None:
+            raise JobNotFoundError(job_id)
+        return lock
+
+    def _swap(self, job_id: str, *, new_revision: bool = False, **changes: object) -> JobRecord:
+        with self._job_lock(job_id):
+            job = self._job(job_id)
+            if new_revision:
+                changes["revision"] = job.revision + 1
+            job = self._jobs[job_id] = replace(job, **changes)
+        return job
+
+    def _publish(self, job: JobRecord) -> None:
+        if self._events is not None:
+            self._events.publish(ProgressEvent(job.job_id, job.status, job.progress, job.current_step))
+
+    def _packed(self, job_id: str) -> tuple[JobRecord, PackedResults | None]:
+        """The job and its packed results, loading them back from disk if they were spilled."""
+        job = self._job(job_id)
+        packed = job.packed
+        if packed is None and job.spill_path is not None:
+            try:
+                loaded = read_spill(job.spill_path)
+            except FileNotFoundError:
+                # the job expired, taking its spill file, since it was read above
+                self._job(job_id)
+                raise
+            with self._job_lock(job_id):
+                current = self._job(job_id)
+                if current.packed is None and current.spill_path == job.spill_path:
+                    current = self._jobs[job_id] = replace(current, packed=loaded)
+            job, packed = current, current.packed
+        if packed is not None:
+            self._admit(job_id, packed)
+        return job, packed
 
-    def add_source(self, job_id: str, source_type: SourceType, filename: str, raw_text: str) -> SourceRecord:
-        source = SourceRecord(
-            source_id=f"src_{uuid4().hex[:10]}", source_type=source_type, filename=filename, raw_text=raw_text
+    def _admit(self, job_id: str, packed: PackedResults) -> None:
+        for victim in self._budget.admit(job_id, packed.nbytes):
+            self._spill(victim)
+
+    def _spill(self, job_id: str) -> None:
+        job, lock = self._jobs.get(job_id), self._job_locks.get(job_id)
+        # the budget may pick a job that is expiring
+        if job is None or lock is None or job.packed is None:
+            return
+        # the file outlives reloads, so a job is only ever written out once per pack
+        path = job.spill_path or write_spill(self._spill_dir, job_id, job.packed)
+        with lock:
+            current = self._jobs.get(job_id)
+            if current is not None and current.packed is job.packed:
+                self._jobs[job_id] = replace(current, packed=None, spill_path=path)
+                return
+        if current is None or path != current.spill_path:
+            _remove(path)
+
+    def _pack(self, job_id: str) -> None:
+        with self._job_lock(job_id):
+            job = self._job(job_id)
+            if job.packed is not None or job.spill_path is not None:
+                return
+            packed = pack_results(job.chunks, job.card_records, job.sources)
+            self._jobs[job_id] = replace(job, chunks=[], card_records=[], cards=[], failed_cards=[], packed=packed)
+        self._admit(job_id, packed)
+
+    def _unpacked(self, job_id: str) -> dict[str, object]:
+        """The list fields of a packed job, materialised again so they can be replaced one at a time."""
+        job, packed = self._packed(job_id)
+        if packed is None:
+            return {}
+        self._budget.discard(job_id)
+        if job.spill_path is not None:
+            _remove(job.spill_path)
+        records = [CardRecord(*record) for record in packed.cards.records()]
+        return {"chunks": packed.chunks.unpack(), "packed": None, "spill_path": None, **_card_lists(records)}
+
+    def create_job(
+        self, course_name: str, output_format: list[OutputFormat], tenant_id: str = "default"
+    ) -> JobRecord:
+        job = JobRecord(
+            job_id=f"job_{uuid4().hex[:10]}", course_name=course_name, output_format=output_format, tenant_id=tenant_id
         )
-        with self._lock:
-            self._jobs[job_id].sources.append(source)
+        self._job_locks[job.job_id] = Lock()
+        self._jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> JobRecord | None:
+        return self._jobs.get(job_id)
+
+    def create_batch(self, jobs: list[NewJob]) -> tuple[str, list[JobRecord]]:
+        """Create ``jobs`` with their sources at once; they are only listed by batch once all exist."""
+        batch_id = f"batch_{uuid4().hex[:10]}"
+        records = [new_job_record(new_job, batch_id) for new_job in jobs]
+        for job in records:
+            self._job_locks[job.job_id] = Lock()
+            self._jobs[job.job_id] = job
+        self._batches[batch_id] = [job.job_id for job in records]
+        return batch_id, records
+
+    def get_batch_jobs(self, batch_id: str) -> list[JobRecord]:
+        jobs = (self._jobs.get(job_id) for job_id in self._batches.get(batch_id, ()))
+        return [job for job in jobs if job is not None]
+
+    def add_source(
+        self, job_id: str, source_type: SourceType, filename: str, spooled: SpooledUpload
+    ) -> SourceRecord:
+        source = new_source_record(source_type, filename, spooled)
+        with self._job_lock(job_id):
+            job = self._job(job_id)
+            self._jobs[job_id] = replace(job, sources=[*job.sources, source], source_count=job.source_count + 1)
         return source
 
+    def get_sources(self, job_id: str) -> list[SourceRecord]:
+        return list(self._job(job_id).sources)
+
     def update_progress(self, job_id: str, *, status: JobStatus, progress: int, current_step: str) -> None:
-        with self._lock:
-            job = self._jobs[job_id]
-            job.status = status
-            job.progress = progress
-            job.current_step = current_step
+        finished_at = datetime.now(timezone.utc) if status in TERMINAL_STATUSES else None
+        self._publish(
+            self._swap(job_id, status=status, progress=progress, current_step=current_step, finished_at=finished_at)
+        )
+        if status == JobStatus.DONE:
+            self._pack(job_id)
 
-    def set_chunks(self, job_id: str, chunks: list[Chunk]) -> None:
-        with self._lock:
-            self._jobs[job_id].chunks = chunks
+    def update_progress_many(
+        self, job_ids: list[str], *, status: JobStatus, progress: int, current_step: str
+    ) -> None:
+        """``update_progress`` for every job in one pass, with their events published together.
+
+        Each snapshot is still swapped under its own job's lock; what the batch
+        saves is one broker lock and one event-loop wakeup per job.
+        """
+        finished_at = datetime.now(timezone.utc) if status in TERMINAL_STATUSES else None
+        updated: list[JobRecord] = []
+        for job_id in job_ids:
+            with self._job_lock(job_id):
+                job = self._jobs[job_id] = replace(
+                    self._job(job_id),
+                    status=status,
+                    progress=progress,
+                    current_step=current_step,
+                    finished_at=finished_at,
+                )
+            updated.append(job)
+        if self._events is not None:
+            self._events.publish_many(
+                ProgressEvent(job.job_id, job.status, job.progress, job.current_step) for job in updated
+            )
+        if status == JobStatus.DONE:
+            for job_id in job_ids:
+                self._pack(job_id)
+
+    def set_chunks(
+        self, job_id: str, chunks: list[ChunkData], topic_fingerprints: dict[str, str] | None = None
+    ) -> None:
+        self._swap(
+            job_id,
+            new_revision=True,
+            **{**self._unpacked(job_id), "chunks": chunks},
+            topic_fingerprints=dict(topic_fingerprints or {}),
+        )
+
+    def get_chunks(self, job_id: str) -> list[ChunkData]:
+        job, packed = self._packed(job_id)
+        return job.chunks if packed is None else packed.chunks.unpack()
+
+    def get_topic_fingerprints(self, job_id: str) -> dict[str, str]:
+        return self._job(job_id).topic_fingerprints
 
     def set_validated_cards(
         self,
         job_id: str,
-        cards: list[Card],
+        records: list[CardRecord],
         summary: ValidationSummary,
-        failed_cards: list[ValidationErrorItem],
+        manifest: list[ChunkManifestEntry] | None = None,
     ) -> None:
-        with self._lock:
-            self._jobs[job_id].cards = cards
-            self._jobs[job_id].validation_summary = summary
-            self._jobs[job_id].failed_cards = failed_cards
+        self._swap(
+            job_id,
+            new_revision=True,
+            **{**self._unpacked(job_id), **_card_lists(records)},
+            chunk_manifest={entry.chunk_id: entry for entry in manifest or ()},
+            validation_summary=summary,
+        )
+
+    def get_card_records(self, job_id: str) -> list[CardRecord]:
+        job, packed = self._packed(job_id)
+        return job.card_records if packed is None else [CardRecord(*record) for record in packed.cards.records()]
+
+    def get_chunk_manifest(self, job_id: str) -> dict[str, ChunkManifestEntry]:
+        return self._job(job_id).chunk_manifest
+
+    def set_cache_stats(self, job_id: str, *, hits: int, misses: int) -> None:
+        self._swap(job_id, cache_hits=hits, cache_misses=misses)
+
+    def set_stage_spans(self, job_id: str, spans: list[StageSpan]) -> None:
+        self._swap(job_id, stage_spans=spans)
+
+    def set_content_reuse(self, job_id: str, reuse: ContentReuse) -> None:
+        self._swap(job_id, content_reuse=reuse)
+
+    def get_cards(self, job_id: str) -> list[CardData]:
+        return list(self.iter_cards(job_id))
+
+    def iter_cards(self, job_id: str) -> Iterator[CardData]:
+        job, packed = self._packed(job_id)
+        if packed is None:
+            return iter(job.cards)
+        return (packed.cards.card(idx) for idx in packed.cards.passed)
+
+    def get_chunks_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage:
+        job, packed = self._packed(job_id)
+        if packed is None:
+            return _json_page(page_of(job.chunks, after=after, limit=limit), ChunkData, fields)
+        page = page_of(range(len(packed.chunks)), after=after, limit=limit)
+        return _json_page(Page(packed.chunks.unpack(page.items), page.next_after), ChunkData, fields)
+
+    def get_cards_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage:
+        job, packed = self._packed(job_id)
+        if packed is None:
+            return _json_page(page_of(job.cards, after=after, limit=limit), CardData, fields)
+        page = page_of(packed.cards.passed, after=after, limit=limit)
+        if fields:
+            return _json_page(Page([packed.cards.card(idx) for idx in page.items], page.next_after), CardData, fields)
+        return JsonPage(packed.cards.cards_json(page.items), page.next_after)
+
+    def get_failed_cards_page(
+        self, job_id: str, *, after: int | None = None, limit: int, fields: tuple[str, ...] | None = None
+    ) -> JsonPage:
+        job, packed = self._packed(job_id)
+        if packed is None:
+            return _json_page(page_of(job.failed_cards, after=after, limit=limit), FailedCardData, fields)
+        page = page_of(range(len(packed.cards.failed)), after=after, limit=limit)
+        if fields:
+            items = [packed.cards.failed_item(position) for position in page.items]
+            return _json_page(Page(items, page.next_after), FailedCardData, fields)
+        return JsonPage(packed.cards.failed_json(page.items), page.next_after)
+
+    def get_failed_cards(self, job_id: str) -> list[FailedCardData]:
+        job, packed = self._packed(job_id)
+        if packed is None:
+            return job.failed_cards
+        return [packed.cards.failed_item(position) for position in range(len(packed.cards.failed))]
 
     def mark_failed(self, job_id: str, reason: str) -> None:
-        with self._lock:
-            job = self._jobs[job_id]
-            job.status = JobStatus.FAILED
-            job.current_step = f"failed: {reason}"
+        self._publish(
+            self._swap(
+                job_id,
+                status=JobStatus.FAILED,
+                current_step=f"failed: {reason}",
+                finished_at=datetime.now(timezone.utc),
+            )
+        )
 
     def create_export(
         self,
@@ -103,20 +636,128 @@ class InMemoryStore:
         export_format: OutputFormat,
         filename: str,
         content_type: str,
-        content: str,
+        path: str,
+        size_bytes: int,
+        etag: str,
     ) -> ExportRecord:
-        export = ExportRecord(
-            export_id=f"exp_{uuid4().hex[:10]}",
-            job_id=job_id,
-            export_format=export_format,
-            filename=filename,
-            content_type=content_type,
-            content=content,
-        )
-        with self._lock:
+        """Record an export; identical content already on disk is served from the existing file instead.
+
+        Exporting the same job, format and content again returns the existing
+        export rather than adding another.
+        """
+        now = datetime.now(timezone.utc)
+        with self._exports_lock:
+            shared = self._export_files.get(etag)
+            if shared is not None:
+                if shared.path != path:
+                    _remove(path)
+                shared.last_used = now
+                self._export_files.move_to_end(etag)
+                same = (job_id, export_format, filename)
+                for export_id in shared.export_ids:
+                    existing = self._exports[export_id]
+                    if (existing.job_id, existing.export_format, existing.filename) == same:
+                        return existing
+                path = shared.path
+            else:
+                shared = self._export_files[etag] = _ExportFile(path, size_bytes, [], now)
+                self._export_bytes += size_bytes
+            export = ExportRecord(
+                export_id=f"exp_{uuid4().hex[:10]}",
+                job_id=job_id,
+                export_format=export_format,
+                filename=filename,
+                content_type=content_type,
+                path=path,
+                size_bytes=size_bytes,
+                etag=etag,
+                created_at=now,
+            )
             self._exports[export.export_id] = export
+            shared.export_ids.append(export.export_id)
+            budget = self._retention.max_export_bytes
+            while budget is not None and self._export_bytes > budget and len(self._export_files) > 1:
+                self._drop_export_file_locked(next(iter(self._export_files)))
         return export
 
     def get_export(self, export_id: str) -> ExportRecord | None:
-        with self._lock:
-            return self._exports.get(export_id)
+        export = self._exports.get(export_id)
+        if export is not None:
+            with self._exports_lock:
+                shared = self._export_files.get(export.etag)
+                if shared is not None:
+                    shared.last_used = datetime.now(timezone.utc)
+                    self._export_files.move_to_end(export.etag)
+        return export
+
+    def _drop_export_file_locked(self, etag: str) -> None:
+        shared = self._export_files.pop(etag)
+        self._export_bytes -= shared.size_bytes
+        for export_id in shared.export_ids:
+            del self._exports[export_id]
+        self._evicted_exports += len(shared.export_ids)
+        _remove(shared.path)
+
+    def _expire_job(self, job_id: str, cutoff: datetime) -> bool:
+        lock = self._job_locks.get(job_id)
+        if lock is None:
+            return False
+        with lock:
+            job = self._jobs.get(job_id)
+            # re-checked under the lock: the job may have been restarted or expired since it was listed
+            if job is None or job.finished_at is None or job.finished_at >= cutoff:
+                return False
+            del self._jobs[job_id]
+        del self._job_locks[job_id]
+        self._budget.discard(job_id)
+        for path in (job.spill_path, *(source.path for source in job.sources)):
+            if path is not None:
+                _remove(path)
+        with self._exports_lock:
+            for etag, shared in list(self._export_files.items()):
+                kept = [export_id for export_id in shared.export_ids if self._exports[export_id].job_id != job_id]
+                if not kept:
+                    self._drop_export_file_locked(etag)
+                    continue
+                for export_id in set(shared.export_ids) - set(kept):
+                    del self._exports[export_id]
+                    self._evicted_exports += 1
+                shared.export_ids = kept
+        self._expired_jobs += 1
+        if job.batch_id is not None and not self.get_batch_jobs(job.batch_id):
+            self._batches.pop(job.batch_id, None)
+        return True
+
+    def sweep(self, now: datetime | None = None) -> list[str]:
+        """Drop finished jobs and unused exports past their TTL; returns the ids of the jobs dropped.
+
+        A job takes its sources' spool files, spilled results and exports with it.
+        """
+        now = now or datetime.now(timezone.utc)
+        expired: list[str] = []
+        if self._retention.job_ttl_s is not None:
+            cutoff = now - timedelta(seconds=self._retention.job_ttl_s)
+            listed = [
+                job.job_id
+                for job in list(self._jobs.values())
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            expired = [job_id for job_id in listed if self._expire_job(job_id, cutoff)]
+        if self._retention.export_ttl_s is not None:
+            cutoff = now - timedelta(seconds=self._retention.export_ttl_s)
+            with self._exports_lock:
+                while self._export_files and next(iter(self._export_files.values())).last_used < cutoff:
+                    self._drop_export_file_locked(next(iter(self._export_files)))
+        return expired
+
+    def metrics(self) -> StoreMetricsResponse:
+        jobs = list(self._jobs.values())
+        return StoreMetricsResponse(
+            live_jobs=len(jobs),
+            live_exports=len(self._exports),
+            resident_bytes=self._budget.resident_bytes,
+            spilled_jobs=sum(job.packed is None and job.spill_path is not None for job in jobs),
+            export_bytes=self._export_bytes,
+            expired_jobs=self._expired_jobs,
+            evicted_exports=self._evicted_exports,
+        )
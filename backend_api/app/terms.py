@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Literal
+
+
+TERM_PATTERN = re.compile(r"\b[A-Za-z][A-Za-z0-9\-]{3,}\b")
+MAX_TERMS = 8
+
+TermRanking = Literal["first", "frequency", "tfidf"]
+TERM_RANKINGS: tuple[TermRanking, ...] = ("first", "frequency", "tfidf")
+
+
+@dataclass(frozen=True)
+class DocumentFrequencies:
+    """How many of a job's chunks contain each (lowercased) term; built once and shared by every chunk."""
+
+    documents: int
+    counts: dict[str, int]
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "DocumentFrequencies":
+        counts: Counter[str] = Counter()
+        documents = 0
+        for text in texts:
+            documents += 1
+            counts.update(set(map(str.lower, TERM_PATTERN.findall(text))))
+        return cls(documents=documents, counts=dict(counts))
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency of a lowercased term.
+
+        Zero for a term in every chunk, so with a single chunk every score ties
+        and ranking falls back to order of appearance.
+        """
+        return math.log((1 + self.documents) / (1 + self.counts.get(term, 0)))
+
+    def digest(self) -> str:
+        """Content hash of the statistics, for cache keys of anything ranked with them."""
+        hasher = hashlib.sha256(str(self.documents).encode("ascii"))
+        for term, count in sorted(self.counts.items()):
+            hasher.update(f"\x1f{term}\x1e{count}".encode("utf-8"))
+        return hasher.hexdigest()
+
+
+def first_terms(text: str, limit: int = MAX_TERMS) -> list[str]:
+    """The first ``limit`` distinct terms in order of appearance.
+
+    Matches are pulled lazily and the scan stops at the ``limit``-th new term,
+    so a long chunk costs no more than its opening lines.
+    """
+    terms: list[str] = []
+    seen: set[str] = set()
+    for match in TERM_PATTERN.finditer(text):
+        token = match.group()
+        lowered = token.lower()
+        if lowered not in seen:
+            seen.add(lowered)
+            terms.append(token)
+            if len(terms) >= limit:
+                break
+    return terms
+
+
+def ranked_terms(text: str, limit: int = MAX_TERMS, *, frequencies: DocumentFrequencies | None = None) -> list[str]:
+    """The ``limit`` highest-scoring distinct terms, ties broken by first appearance.
+
+    Scores are in-chunk counts, weighted by ``frequencies.idf`` when given.
+    Each term is returned as it was first written in the chunk.
+    """
+    tokens = TERM_PATTERN.findall(text)
+    # a Counter keeps insertion order, so ties come out in order of first appearance
+    counts = Counter(map(str.lower, tokens))
+    if frequencies is None:
+        top = heapq.nlargest(limit, counts, key=counts.__getitem__)
+    else:
+        idf = frequencies.idf
+        top = heapq.nlargest(limit, counts, key=lambda term: counts[term] * idf(term))
+
+    wanted = set(top)
+    surface: dict[str, str] = {}
+    for token in tokens:
+        term = token.lower()
+        if term in wanted and term not in surface:
+            surface[term] = token
+            if len(surface) == len(wanted):
+                break
+    return [surface[term] for term in top]
+
+
+def extract_terms(
+    text: str,
+    *,
+    limit: int = MAX_TERMS,
+    ranking: TermRanking = "first",
+    frequencies: DocumentFrequencies | None = None,
+) -> list[str]:
+    if ranking == "first":
+        return first_terms(text, limit)
+    if ranking == "tfidf" and frequencies is None:
+        raise ValueError("tfidf ranking needs document frequencies")
+    return ranked_terms(text, limit, frequencies=frequencies if ranking == "tfidf" else None)
+
@@ -1,50 +1,590 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+import re
+import time
+from collections import Counter
+from bisect import bisect_right
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from itertools import accumulate, chain, compress, islice, repeat
+from operator import attrgetter
+from threading import Lock
+from typing import Any
 
-from .schemas import Card
+from .records import CardData
 
 
 FORBIDDEN_QUESTION_PREFIXES = ("what ", "which ", "where ", "how ", "why ")
 
+# cards whose token sets overlap at least this much (Jaccard) are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+_NEAR_DUPLICATE_REASON = "near-duplicate of card "
+
+_TRUE_FALSE_SETS = (frozenset({"true", "false"}), frozenset({"t", "f"}), frozenset({"yes", "no"}))
+_TRUE_FALSE_TOKENS = frozenset().union(*_TRUE_FALSE_SETS)
+_WORD = re.compile(r"\w+")
+
 
 @dataclass
 class ValidationIssue:
     reason: str
-    card: Card
+    card: CardData
 
 
-def _is_true_false_style(card: Card) -> bool:
-    lowered_options = {o.strip().lower() for o in card.multiple_choice}
-    tf_sets = ({"true", "false"}, {"t", "f"}, {"yes", "no"})
-    return any(tf.issubset(lowered_options) for tf in tf_sets)
+# joins a column into one string; a column with a text holding it falls back to per-text work
+_SEPARATOR = "\x00"
 
 
-def _has_forbidden_question_prefix(question: str) -> bool:
-    return question.strip().lower().startswith(FORBIDDEN_QUESTION_PREFIXES)
+def _normalised_column(texts: list[str]) -> list[str]:
+    """``texts`` stripped and lowered, lowering them all in one call on their concatenation."""
+    joined = _SEPARATOR.join(texts)
+    lowered = joined.lower().split(_SEPARATOR)
+    if len(lowered) != len(texts):  # a text holds the separator itself, or there are no texts
+        lowered = list(map(str.lower, texts))
+    return list(map(str.strip, lowered))
 
 
-def validate_cards(cards: list[Card]) -> tuple[list[Card], list[ValidationIssue]]:
-    passed: list[Card] = []
-    failed: list[ValidationIssue] = []
+def _runs(column: list[Any], bounds: list[int], indexes: Sequence[int] | None = None) -> Iterator[list[Any]]:
+    """Each card's run of a flattened ``column``, for every card or those at ``indexes``.
 
-    for card in cards:
-        if _is_true_false_style(card):
-            failed.append(ValidationIssue(reason="true/false style options are forbidden", card=card))
-            continue
+    Card ``i`` owns ``column[bounds[i]:bounds[i + 1]]``. Slices are made as the
+    runs are read rather than kept per card, which would cost a long-lived
+    object per card.
+    """
+    if indexes is None:
+        return map(column.__getitem__, map(slice, bounds, islice(bounds, 1, None)))
+    starts = map(bounds.__getitem__, indexes)
+    stops = map(bounds.__getitem__, map((1).__add__, indexes))
+    return map(column.__getitem__, map(slice, starts, stops))
 
-        if _has_forbidden_question_prefix(card.question):
-            failed.append(ValidationIssue(reason="question starts with forbidden interrogative", card=card))
-            continue
 
-        if len(card.multiple_choice) < 6:
-            failed.append(ValidationIssue(reason="minimum of 6 choices required", card=card))
-            continue
+def _shortest(column: list[str], bounds: list[int], counts: list[int]) -> list[int]:
+    runs = _runs(list(map(len, column)), bounds)
+    # plain ``min`` is twice as fast as with ``default``, which only a card without options needs
+    return list(map(partial(min, default=0) if 0 in counts else min, runs))
+
+
+_questions = attrgetter("question")
+_extras = attrgetter("extra")
+_options = attrgetter("multiple_choice")
+_answers = attrgetter("correct_answers")
+
+
+class CardBatch:
+    """Normalised columns of a batch of cards, shared by every rule and by deduplication.
+
+    Each column is built for the whole batch in one bulk pass the first time
+    it is read, so rules work on lists rather than per-card objects. Texts
+    are stripped and lowered. Options and answers are flattened into one
+    column each, with ``option_bounds``/``answer_bounds`` marking each card's run.
+    """
+
+    def __init__(self, cards: Sequence[CardData]) -> None:
+        self.cards = cards
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    @cached_property
+    def question(self) -> list[str]:
+        return _normalised_column(list(map(_questions, self.cards)))
+
+    @cached_property
+    def extra(self) -> list[str]:
+        return _normalised_column(list(map(_extras, self.cards)))
+
+    @cached_property
+    def option_counts(self) -> list[int]:
+        return list(map(len, map(_options, self.cards)))
+
+    @cached_property
+    def answer_counts(self) -> list[int]:
+        return list(map(len, map(_answers, self.cards)))
+
+    @cached_property
+    def options(self) -> list[str]:
+        return _normalised_column(list(chain.from_iterable(map(_options, self.cards))))
+
+    @cached_property
+    def answers(self) -> list[str]:
+        return _normalised_column(list(chain.from_iterable(map(_answers, self.cards))))
+
+    @cached_property
+    def option_bounds(self) -> list[int]:
+        return list(accumulate(self.option_counts, initial=0))
+
+    @cached_property
+    def answer_bounds(self) -> list[int]:
+        return list(accumulate(self.answer_counts, initial=0))
+
+    @cached_property
+    def shortest_option(self) -> list[int]:
+        return _shortest(self.options, self.option_bounds, self.option_counts)
+
+    @cached_property
+    def shortest_answer(self) -> list[int]:
+        return _shortest(self.answers, self.answer_bounds, self.answer_counts)
+
+    def option_owner(self, position: int) -> int:
+        """The card whose run of ``options`` holds ``position``."""
+        return bisect_right(self.option_bounds, position) - 1
+
+    def option_sets(self, indexes: Sequence[int]) -> list[frozenset[str]]:
+        return list(map(frozenset, _runs(self.options, self.option_bounds, indexes))) if indexes else []
+
+    def answer_sets(self, indexes: Sequence[int]) -> list[frozenset[str]]:
+        return list(map(frozenset, _runs(self.answers, self.answer_bounds, indexes))) if indexes else []
+
+
+def _screened(
+    texts: list[str], indexes: list[int], *, prefixes: tuple[str, ...] = (), literals: Collection[str] = ()
+) -> list[int]:
+    """The ``indexes`` whose text starts with one of ``prefixes`` or contains one of ``literals``.
+
+    Prefixes take one ``str.startswith`` pass over the texts. For literals the
+    texts are joined and each literal found with repeated ``str.find``: one
+    C-level scan per literal rather than a regex call per text.
+    """
+    picked = list(map(texts.__getitem__, indexes))
+    found: set[int] = set()
+    if prefixes:
+        found.update(compress(range(len(picked)), map(str.startswith, picked, repeat(prefixes))))
+    if literals:
+        joined = _SEPARATOR.join(picked)
+        if joined.count(_SEPARATOR) != len(picked) - 1:
+            return list(indexes)
+        starts = list(accumulate(map((1).__add__, map(len, picked)), initial=0))
+        for literal in literals:
+            position = joined.find(literal)
+            while position != -1:
+                found.add(bisect_right(starts, position) - 1)
+                position = joined.find(literal, position + 1)
+    return [indexes[position] for position in sorted(found)]
+
+
+def near_duplicate_tokens(question: str, options: frozenset[str], answers: frozenset[str]) -> frozenset[str]:
+    """Question words plus options, with correct options marked.
+
+    Word unigrams, and answers folded into the options: correlated token
+    pairs would defeat the prefix filter in ``find_near_duplicates``.
+    """
+    tokens = {f"q:{word}" for word in _WORD.findall(question)}
+    tokens.update(f"o:{option}" for option in options - answers)
+    tokens.update(f"c:{answer}" for answer in answers)
+    return frozenset(tokens)
+
+
+@dataclass(frozen=True)
+class PredicateRule:
+    """Breaks for the cards ``find`` picks out of the given ones, reading whole columns of the batch."""
+
+    name: str
+    reason: str
+    find: Callable[[CardBatch, list[int]], Iterable[int]]
+
+    def rejects(self, batch: CardBatch, indexes: list[int]) -> list[int]:
+        """The ``indexes`` whose cards break the rule."""
+        return list(self.find(batch, indexes))
+
+
+@dataclass(frozen=True)
+class PatternRule:
+    """Breaks when ``pattern`` matches one of ``fields``; fields are already stripped and lowered.
+
+    ``anchored`` patterns only match at the start of the field. ``literals``
+    are substrings at least one of which every match contains (every match
+    starts with one, for an anchored pattern); the regex only runs on texts
+    holding one. With no literals it runs on every text. Patterns are merged
+    into one alternation per field, so they must not set their own flags.
+    """
+
+    name: str
+    reason: str
+    fields: tuple[str, ...]
+    pattern: re.Pattern[str]
+    anchored: bool = False
+    literals: tuple[str, ...] = ()
+
+    def matches(self, text: str) -> bool:
+        return (self.pattern.match if self.anchored else self.pattern.search)(text) is not None
+
+    def rejects(self, batch: CardBatch, indexes: list[int]) -> list[int]:
+        """The ``indexes`` whose cards break the rule."""
+        rejected: set[int] = set()
+        for name in self.fields:
+            rejected.update(_FieldMatcher(name, (self,)).run(batch, indexes))
+        return sorted(rejected)
+
+
+Rule = PredicateRule | PatternRule
+
+
+class _FieldMatcher:
+    """Every pattern rule on one field as a single matcher: one literal screen, then one combined regex."""
+
+    def __init__(self, field_name: str, rules: tuple[PatternRule, ...]) -> None:
+        self.field_name = field_name
+        self.rules = rules
+        # a rule without literals could match any text, so then every text goes to the regex
+        self._screen = all(rule.literals for rule in rules)
+        self._prefixes = tuple(literal for rule in rules if rule.anchored for literal in rule.literals)
+        self._literals = tuple(literal for rule in rules if not rule.anchored for literal in rule.literals)
+        # no capture groups: they slow every search, and only the rare hit needs to know which rule matched
+        self._search = re.compile(
+            "|".join(
+                f"\\A(?:{rule.pattern.pattern})" if rule.anchored else f"(?:{rule.pattern.pattern})" for rule in rules
+            )
+        ).search
+
+    def run(self, batch: CardBatch, indexes: list[int]) -> dict[int, Rule]:
+        """The cards at ``indexes`` whose field one of the rules matches, with the first such rule."""
+        texts = getattr(batch, self.field_name)
+        candidates = (
+            _screened(texts, indexes, prefixes=self._prefixes, literals=self._literals) if self._screen else indexes
+        )
+        search = self._search
+        return {
+            idx: next(rule for rule in self.rules if rule.matches(texts[idx]))
+            for idx in candidates
+            if search(texts[idx])
+        }
 
-        if len(card.multiple_choice) <= len(card.correct_answers):
-            failed.append(ValidationIssue(reason="choices must outnumber correct answers", card=card))
+
+def _true_false_style(batch: CardBatch, indexes: list[int]) -> list[int]:
+    # one set lookup per option over the flat column; only cards holding two true/false tokens get a closer look
+    if len(indexes) * 8 < len(batch):  # a few cards: cheaper to look at their options directly
+        return [
+            idx
+            for idx, option_set in zip(indexes, batch.option_sets(indexes))
+            if any(tf <= option_set for tf in _TRUE_FALSE_SETS)
+        ]
+    options = batch.options
+    if _TRUE_FALSE_TOKENS.isdisjoint(options):
+        return []
+    flagged = Counter(
+        map(batch.option_owner, compress(range(len(options)), map(_TRUE_FALSE_TOKENS.__contains__, options)))
+    )
+    candidates = sorted(idx for idx, count in flagged.items() if count >= 2)
+    if len(candidates) < len(indexes):
+        pending = set(indexes)
+        candidates = [idx for idx in candidates if idx in pending]
+    return [
+        idx
+        for idx, option_set in zip(candidates, batch.option_sets(candidates))
+        if any(tf <= option_set for tf in _TRUE_FALSE_SETS)
+    ]
+
+
+def _too_few_choices(batch: CardBatch, indexes: list[int]) -> list[int]:
+    counts = batch.option_counts
+    return [idx for idx in indexes if counts[idx] < 6]
+
+
+def _answers_not_outnumbered(batch: CardBatch, indexes: list[int]) -> list[int]:
+    options, answers = batch.option_counts, batch.answer_counts
+    return [idx for idx in indexes if options[idx] <= answers[idx]]
+
+
+def _answers_dwarf_distractors(batch: CardBatch, indexes: list[int]) -> list[int]:
+    # the longest distractor is at least the shortest option, so only cards whose
+    # shortest answer is over twice that long can break the rule
+    shortest_option, shortest_answer = batch.shortest_option, batch.shortest_answer
+    candidates = [idx for idx in indexes if shortest_answer[idx] > 2 * shortest_option[idx]]
+    broken = []
+    for idx, options, answers in zip(candidates, batch.option_sets(candidates), batch.answer_sets(candidates)):
+        longest_distractor = max(map(len, options - answers), default=0)
+        if longest_distractor > 0 and shortest_answer[idx] > 2 * longest_distractor:
+            broken.append(idx)
+    return broken
+
+
+# checked in this order; a card is reported under the first rule it breaks
+RULES: tuple[Rule, ...] = (
+    PredicateRule("true_false", "true/false style options are forbidden", _true_false_style),
+    PatternRule(
+        "interrogative_stem",
+        "question starts with forbidden interrogative",
+        ("question",),
+        re.compile("|".join(map(re.escape, FORBIDDEN_QUESTION_PREFIXES))),
+        anchored=True,
+        literals=FORBIDDEN_QUESTION_PREFIXES,
+    ),
+    PredicateRule("min_choices", "minimum of 6 choices required", _too_few_choices),
+    PredicateRule("choices_exceed_answers", "choices must outnumber correct answers", _answers_not_outnumbered),
+    PatternRule(
+        "according_to",
+        "phrases like 'according to the text' are forbidden",
+        ("question", "extra"),
+        re.compile(r"\baccording to the\b"),
+        literals=("according to the",),
+    ),
+    PatternRule(
+        "source_reference",
+        "question and extra must not refer to the text or image",
+        ("question", "extra"),
+        re.compile(r"\bthe (?:text|image)\b"),
+        literals=("the text", "the image"),
+    ),
+    PredicateRule(
+        "distractor_parity",
+        "correct answers are conspicuously longer than every distractor",
+        _answers_dwarf_distractors,
+    ),
+)
+
+
+@dataclass
+class RuleStats:
+    """Per-rule hit counts and cumulative seconds for one validation run."""
+
+    hits: dict[str, int] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+
+    def record(self, rule: str, *, hits: int = 0, seconds: float = 0.0) -> None:
+        self.hits[rule] = self.hits.get(rule, 0) + hits
+        self.seconds[rule] = self.seconds.get(rule, 0.0) + seconds
+
+
+# a step rejects cards out of the pending ones, naming the rule each broke
+StepRunner = Callable[[CardBatch, list[int]], dict[int, Rule]]
+
+
+@dataclass
+class _Step:
+    name: str
+    rules: tuple[Rule, ...]
+    run: StepRunner
+    checked: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+    @property
+    def cost_per_rejection(self) -> float:
+        return self.seconds / (self.rejected + 1)
+
+
+def _predicate_step(rule: PredicateRule) -> StepRunner:
+    def run(batch: CardBatch, indexes: list[int]) -> dict[int, Rule]:
+        return dict.fromkeys(rule.rejects(batch, indexes), rule)
+
+    return run
+
+
+class RuleRegistry:
+    """``rules`` compiled into steps that run cheapest-per-rejection first.
+
+    Pattern rules on the same field share one ``_FieldMatcher``, so each
+    field is screened and searched once however many patterns target it;
+    predicate rules are a step each. Steps keep their declared order until
+    every one has seen ``warmup_cards`` cards; after that they are sorted by
+    observed seconds per rejected card, accumulated over every batch this
+    process validates. Reported reasons never depend on that order.
+    """
+
+    def __init__(self, rules: Sequence[Rule], *, warmup_cards: int = 1000) -> None:
+        self.rules = tuple(rules)
+        self._position = {rule.name: position for position, rule in enumerate(self.rules)}
+        self._warmup_cards = warmup_cards
+        self._lock = Lock()
+
+        steps: list[_Step] = []
+        by_field: dict[str, list[PatternRule]] = {}
+        for rule in self.rules:
+            if isinstance(rule, PatternRule):
+                for field_name in rule.fields:
+                    by_field.setdefault(field_name, []).append(rule)
+            else:
+                steps.append(_Step(rule.name, (rule,), _predicate_step(rule)))
+        for field_name, field_rules in by_field.items():
+            matcher = _FieldMatcher(field_name, tuple(field_rules))
+            steps.append(_Step(f"{field_name}_patterns", matcher.rules, matcher.run))
+        steps.sort(key=lambda step: self._position[step.rules[0].name])
+        self._steps = steps
+
+    def plan(self) -> list[str]:
+        """Step names in the order the next batch will run them."""
+        return [step.name for step in self._ordered_steps()]
+
+    def _ordered_steps(self) -> list[_Step]:
+        with self._lock:
+            if any(step.checked < self._warmup_cards for step in self._steps):
+                return list(self._steps)
+            return sorted(self._steps, key=lambda step: step.cost_per_rejection)
+
+    def apply(self, batch: CardBatch, indexes: Iterable[int], stats: RuleStats | None = None) -> dict[int, Rule]:
+        """The first rule (in declared order) each of the cards at ``indexes`` breaks; passing cards are left out."""
+        steps = self._ordered_steps()
+        broken: dict[int, Rule] = {}
+        rejected_at: dict[int, int] = {}
+        pending = list(indexes)
+        observed: list[tuple[_Step, int, int, float]] = []
+        for order, step in enumerate(steps):
+            started = time.perf_counter()
+            rejected = step.run(batch, pending) if pending else {}
+            if rejected:
+                broken.update(rejected)
+                rejected_at.update(dict.fromkeys(rejected, order))
+                pending = [idx for idx in pending if idx not in rejected]
+            observed.append((step, len(pending) + len(rejected), len(rejected), time.perf_counter() - started))
+
+        # a step may have run before the steps holding rules declared ahead of the one it
+        # reported; only the cards it rejected need checking against those rules
+        last_run = {rule.name: order for order, step in enumerate(steps) for rule in step.rules}
+        recheck_seconds: dict[str, float] = {}
+        for rule in self.rules:
+            started = time.perf_counter()
+            position = self._position[rule.name]
+            unchecked = [
+                idx
+                for idx, other in broken.items()
+                if self._position[other.name] > position and last_run[rule.name] > rejected_at[idx]
+            ]
+            if unchecked:
+                broken.update(dict.fromkeys(rule.rejects(batch, unchecked), rule))
+            recheck_seconds[rule.name] = time.perf_counter() - started
+
+        with self._lock:
+            for step, checked, rejected_count, seconds in observed:
+                step.checked += checked
+                step.rejected += rejected_count
+                step.seconds += seconds
+        if stats is not None:
+            hits = Counter(rule.name for rule in broken.values())
+            for rule in self.rules:
+                stats.record(rule.name, hits=hits[rule.name], seconds=recheck_seconds[rule.name])
+            # rules sharing a field matcher split its time evenly
+            for step, _, _, seconds in observed:
+                for rule in step.rules:
+                    stats.record(rule.name, seconds=seconds / len(step.rules))
+        return broken
+
+
+REGISTRY = RuleRegistry(RULES)
+
+
+def find_near_duplicates(
+    token_sets: list[frozenset[str]], threshold: float = NEAR_DUPLICATE_THRESHOLD, *, known: int = 0
+) -> dict[int, int]:
+    """Map each near-duplicate's index to the index of an earlier set it repeats.
+
+    The first ``known`` sets are already free of duplicates among themselves:
+    they are indexed without being checked, so only the rest is compared.
+
+    Uses prefix filtering over a token index instead of comparing all
+    pairs. Tokens are ordered rarest first; two sets with Jaccard >=
+    ``threshold`` share at least ``ceil(threshold * len)`` tokens, so the first
+    ``len - ceil(threshold * len) + 2`` tokens of each contain their two
+    rarest common tokens. Only those prefixes are indexed, and only sets
+    meeting in two prefix tokens are compared exactly. Sets too small for
+    that guarantee are matched through a separate one-token index.
+    """
+    frequency = Counter(chain.from_iterable(token_sets))
+    rank = {token: order for order, token in enumerate(sorted(frequency, key=lambda t: (frequency[t], t)))}
+    # ints in global rarity order: sorting a set gives its prefix, and comparisons skip string equality
+    ranked = [sorted(map(rank.__getitem__, tokens)) for tokens in token_sets]
+    id_sets = [frozenset(ids) for ids in ranked]
+
+    index: dict[int, list[int]] = {}
+    small_index: dict[int, list[int]] = {}
+    duplicates: dict[int, int] = {}
+    for position, ids in enumerate(ranked):
+        size = len(ids)
+        if not size:
             continue
+        small = math.ceil(threshold * size) < 2
+        prefix = ids[: size - math.ceil(threshold * size) + (1 if small else 2)]
+        if position < known:
+            for token in prefix:
+                (small_index if small else index).setdefault(token, []).append(position)
+            continue
+        shared: Counter[int] = Counter()
+        for token in prefix:
+            postings = index.get(token)
+            if postings:
+                shared.update(postings)
+        candidates = set(shared) if small else {other for other, count in shared.items() if count >= 2}
+        for token in prefix:
+            candidates.update(small_index.get(token, ()))
+
+        current = id_sets[position]
+        # length filter: Jaccard >= t needs t * |larger| <= |smaller|
+        min_size, max_size = threshold * size, size / threshold
+        for other in candidates:
+            other_ids = id_sets[other]
+            if not min_size <= len(other_ids) <= max_size:
+                continue
+            overlap = len(current & other_ids)
+            if overlap >= threshold * (size + len(other_ids) - overlap):
+                duplicates[position] = other
+                break
+        else:
+            for token in prefix:
+                (small_index if small else index).setdefault(token, []).append(position)
+    return duplicates
+
+
+def is_near_duplicate(reason: str | None) -> bool:
+    return reason is not None and reason.startswith(_NEAR_DUPLICATE_REASON)
+
+
+def check_cards(
+    cards: list[CardData],
+    *,
+    registry: RuleRegistry = REGISTRY,
+    stats: RuleStats | None = None,
+    known_reasons: Mapping[int, str | None] | None = None,
+    prechecked: Collection[int] = (),
+) -> list[str | None]:
+    """Why each card fails validation, or None where it passes.
+
+    Cards are checked against the registry's rules, then near-duplicates are
+    dropped across the whole batch. Both read the same ``CardBatch`` columns,
+    each built once for the batch; ``stats`` collects per-rule hits and
+    time, with deduplication recorded as ``near_duplicate``.
+
+    ``known_reasons`` carries outcomes from an earlier run, by card index
+    (None for a card that passed). Those cards are not checked again: known
+    failures keep their reason, and known passes are only used as earlier
+    cards that new ones may duplicate. ``prechecked`` cards passed the rules
+    elsewhere (in another job, say): the rules are skipped for them, but they
+    are deduplicated like new cards.
+    """
+    known = known_reasons or {}
+    skipped = set(prechecked)
+    reasons: list[str | None] = [known.get(idx) for idx in range(len(cards))]
+    batch = CardBatch(cards)
+    pending = [idx for idx in range(len(cards)) if idx not in known and idx not in skipped]
+    for idx, rule in registry.apply(batch, pending, stats).items():
+        reasons[idx] = rule.reason
+
+    started = time.perf_counter()
+    kept = sorted(idx for idx, reason in known.items() if reason is None)
+    fresh = sorted(idx for idx in skipped.union(pending) if reasons[idx] is None)
+    survivors = kept + fresh
+    questions = batch.question
+    token_sets = list(
+        map(
+            near_duplicate_tokens,
+            map(questions.__getitem__, survivors),
+            batch.option_sets(survivors),
+            batch.answer_sets(survivors),
+        )
+    )
+    duplicates = find_near_duplicates(token_sets, known=len(kept))
+    for dup, original in duplicates.items():
+        reasons[survivors[dup]] = f"{_NEAR_DUPLICATE_REASON}{survivors[original] + 1}"
+    if stats is not None:
+        stats.record("near_duplicate", hits=len(duplicates), seconds=time.perf_counter() - started)
+    return reasons
 
-        passed.append(card)
 
+def validate_cards(
+    cards: list[CardData], *, registry: RuleRegistry = REGISTRY, stats: RuleStats | None = None
+) -> tuple[list[CardData], list[ValidationIssue]]:
+    """``check_cards`` split into passing cards and issues, both in input order."""
+    reasons = check_cards(cards, registry=registry, stats=stats)
+    passed = [card for card, reason in zip(cards, reasons) if reason is None]
+    failed = [ValidationIssue(reason=reason, card=card) for card, reason in zip(cards, reasons) if reason is not None]
     return passed, failed
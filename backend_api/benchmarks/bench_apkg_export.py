@@ -0,0 +1,63 @@
+"""Time .apkg exports: a cold build, an unchanged re-export, and one with a small delta.
+
+Each size gets its own persistent collection, like one job regenerated and
+exported again::
+
+    python -m benchmarks.bench_apkg_export --cards 10000 100000 --changed 0.01
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from app.apkg import write_apkg
+from app.records import CardData
+
+
+def _cards(count: int, *, revision: int = 0, changed: float = 0.0) -> list[CardData]:
+    changed_every = int(1 / changed) if changed else 0
+    cards = []
+    for i in range(count):
+        extra = f"Rationale {i}"
+        if changed_every and i % changed_every == 0:
+            extra += f" (revision {revision})"
+        cards.append(
+            CardData(
+                question=f"High-yield term associated with topic {i}",
+                multiple_choice=[f"Term{i}-{k}" for k in range(6)],
+                correct_answers=[f"Term{i}-0"],
+                extra=extra,
+            )
+        )
+    return cards
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction of notes edited before the delta run")
+    args = parser.parse_args()
+
+    print(f"{'cards':>8} {'run':>9} {'seconds':>8} {'inserted':>9} {'updated':>8} {'unchanged':>10} {'apkg_mb':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.cards:
+            collection = os.path.join(tmp, "collections", f"job_{count}.anki2")
+            runs = [
+                ("cold", _cards(count)),
+                ("unchanged", _cards(count)),
+                ("delta", _cards(count, revision=1, changed=args.changed)),
+            ]
+            for run, cards in runs:
+                started = time.perf_counter()
+                written, delta = write_apkg(cards, tmp, deck_name="Bench::Default", collection_path=collection)
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{count:>8} {run:>9} {elapsed:>8.2f} {delta.inserted:>9} {delta.updated:>8} "
+                    f"{delta.unchanged:>10} {written.size_bytes / 1e6:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
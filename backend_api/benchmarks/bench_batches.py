@@ -0,0 +1,103 @@
+"""Creating many jobs one request at a time vs as one batch, over HTTP and in each store.
+
+Over HTTP, ``--jobs`` jobs sharing one handout are created and given their
+source with ``POST /v1/jobs`` and ``POST /sources`` per job, then with a
+single ``POST /v1/batches``. Jobs are not started, so the pipeline doesn't
+run in the background of the timing. Underneath, each store creates the
+jobs, adds their sources and queues them per job, then with
+``create_batch`` and ``update_progress_many``; store timings are the best
+of ``--repeat`` runs on fresh stores::
+
+    python -m benchmarks.bench_batches --jobs 500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from app.ingest import spool_text
+from app.schemas import JobStatus, OutputFormat, SourceType
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore, JobStore, NewJob
+
+from .synthetic import synthetic_course_text
+
+
+def _http(jobs: int, handout: str) -> tuple[float, float]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        for i in range(jobs):
+            job_id = client.post("/v1/jobs", json={"course_name": f"Course {i}"}).json()["job_id"]
+            client.post(
+                f"/v1/jobs/{job_id}/sources",
+                data={"source_type": "text"},
+                files={"file": ("handout.txt", handout, "text/plain")},
+            )
+        single = time.perf_counter() - started
+
+        manifest = {
+            "jobs": [{"course_name": f"Course {i}", "sources": [{"filename": "handout.txt"}]} for i in range(jobs)]
+        }
+        started = time.perf_counter()
+        response = client.post(
+            "/v1/batches",
+            data={"manifest": json.dumps(manifest)},
+            files=[("files", ("handout.txt", handout, "text/plain"))],
+        )
+        batched = time.perf_counter() - started
+        response.raise_for_status()
+    return single, batched
+
+
+def _store(store: JobStore, jobs: int, handout: str, spool_dir: str) -> tuple[float, float]:
+    uploads = [spool_text(handout, spool_dir) for _ in range(2 * jobs)]
+    started = time.perf_counter()
+    for i in range(jobs):
+        job = store.create_job(course_name=f"Course {i}", output_format=[OutputFormat.CSV])
+        store.add_source(job.job_id, source_type=SourceType.TEXT, filename="handout.txt", spooled=uploads[i])
+        store.update_progress(job.job_id, status=JobStatus.QUEUED, progress=0, current_step="waiting for worker")
+    single = time.perf_counter() - started
+
+    new_jobs = [
+        NewJob(f"Course {i}", [OutputFormat.CSV], sources=[(SourceType.TEXT, "handout.txt", uploads[jobs + i])])
+        for i in range(jobs)
+    ]
+    started = time.perf_counter()
+    _, records = store.create_batch(new_jobs)
+    store.update_progress_many(
+        [job.job_id for job in records], status=JobStatus.QUEUED, progress=0, current_step="waiting for worker"
+    )
+    batched = time.perf_counter() - started
+    return single, batched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--handout-kb", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    handout = synthetic_course_text(args.handout_kb * 1024, lines_per_topic=20)
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = [("http", *_http(args.jobs, handout))]
+        for name, make_store in (
+            ("memory", InMemoryStore),
+            ("sqlite", lambda: SQLiteStore(os.path.join(tempfile.mkdtemp(dir=tmp), "jobs.db"))),
+        ):
+            runs = [_store(make_store(), args.jobs, handout, tmp) for _ in range(args.repeat)]
+            rows.append((name, min(single for single, _ in runs), min(batched for _, batched in runs)))
+    print(f"{'path':>7} {'per_job_ms':>11} {'batch_ms':>9} {'speedup':>8}")
+    for name, single, batched in rows:
+        print(f"{name:>7} {single * 1000:>11.1f} {batched * 1000:>9.1f} {single / batched:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
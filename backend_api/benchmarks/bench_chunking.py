@@ -0,0 +1,108 @@
+"""Compare the legacy quadratic chunker with the streaming chunker.
+
+Run from ``backend_api``::
+
+    python -m benchmarks.bench_chunking --sizes 1 10 50
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from uuid import uuid4
+
+from app.chunking import build_chunks, estimate_tokens
+from app.pipeline import extract_topics
+from app.records import ChunkData
+
+from .synthetic import synthetic_course_text
+
+
+def legacy_build_chunks(
+    sections: dict[str, list[str]], target_min_tokens: int = 5000, target_max_tokens: int = 10000
+) -> list[ChunkData]:
+    """The original implementation, kept verbatim as the benchmark reference."""
+    chunks: list[ChunkData] = []
+    for topic, lines in sections.items():
+        if not lines:
+            continue
+
+        buffer: list[str] = []
+        for line in lines:
+            prospective = "\n".join(buffer + [line])
+            if buffer and estimate_tokens(prospective) > target_max_tokens:
+                text = "\n".join(buffer)
+                chunks.append(
+                    ChunkData(
+                        chunk_id=f"chk_{uuid4().hex[:10]}",
+                        topic=topic,
+                        subtopic="default",
+                        token_estimate=estimate_tokens(text),
+                        text=text,
+                    )
+                )
+                buffer = [line]
+            else:
+                buffer.append(line)
+
+        if buffer:
+            text = "\n".join(buffer)
+            chunks.append(
+                ChunkData(
+                    chunk_id=f"chk_{uuid4().hex[:10]}",
+                    topic=topic,
+                    subtopic="default",
+                    token_estimate=estimate_tokens(text),
+                    text=text,
+                )
+            )
+
+    merged: list[ChunkData] = []
+    for chunk in chunks:
+        if merged and merged[-1].topic == chunk.topic and merged[-1].token_estimate < target_min_tokens:
+            combined_text = f"{merged[-1].text}\n{chunk.text}".strip()
+            merged[-1] = ChunkData(
+                chunk_id=f"chk_{uuid4().hex[:10]}",
+                topic=chunk.topic,
+                subtopic="default",
+                token_estimate=estimate_tokens(combined_text),
+                text=combined_text,
+            )
+        else:
+            merged.append(chunk)
+
+    return merged
+
+
+def _boundaries(chunks: list[ChunkData]) -> list[tuple[str, int, str]]:
+    return [(c.topic, c.token_estimate, c.text) for c in chunks]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50], help="source sizes in MB")
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the streaming chunker")
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'chunks':>7} {'legacy_s':>10} {'stream_s':>10} {'speedup':>8}")
+    for size_mb in args.sizes:
+        sections = extract_topics(synthetic_course_text(size_mb * 1024 * 1024))
+
+        started = time.perf_counter()
+        streamed = build_chunks(sections)
+        stream_s = time.perf_counter() - started
+
+        if args.skip_legacy:
+            print(f"{size_mb:>4}MB {len(streamed):>7} {'-':>10} {stream_s:>10.3f} {'-':>8}")
+            continue
+
+        started = time.perf_counter()
+        legacy = legacy_build_chunks(sections)
+        legacy_s = time.perf_counter() - started
+
+        if _boundaries(legacy) != _boundaries(streamed):
+            raise SystemExit(f"chunk boundaries differ at {size_mb}MB")
+        print(f"{size_mb:>4}MB {len(streamed):>7} {legacy_s:>10.3f} {stream_s:>10.3f} {legacy_s / stream_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Many students in one course uploading the same handouts, with and without the cross-job content index.
+
+Every job uploads ``--handouts`` shared files of ``--handout-kb`` each;
+``--edited`` of the ``--jobs`` also prepend a short note of their own to
+the first handout, so their uploads are near-identical rather than
+identical. The generator is a fake backend with ``--latency-ms`` per chunk;
+``--cache`` adds the chunk-to-cards cache to both runs::
+
+    python -m benchmarks.bench_content_index --jobs 40 --edited 10 --latency-ms 50
+    python -m benchmarks.bench_content_index --jobs 40 --edited 10 --latency-ms 50 --cache
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+from app.cache import CardCache
+from app.content_index import ContentIndex
+from app.generation import FakeSlowGenerator, GenerationStage
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.schemas import OutputFormat, SourceType
+from app.store import InMemoryStore
+
+from .synthetic import synthetic_course_material
+
+
+def _run_jobs(
+    handouts: list[str], args: argparse.Namespace, spool_dir: str, index: ContentIndex | None
+) -> tuple[float, int, int]:
+    """Seconds and generator calls for every job, and the cards of the last one."""
+    generator = FakeSlowGenerator(latency_s=args.latency_ms / 1000)
+    stage = GenerationStage(generator=generator, cache=CardCache() if args.cache else None)
+    store = InMemoryStore()
+    started = time.perf_counter()
+    job_id = ""
+    for job in range(args.jobs):
+        job_id = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV]).job_id
+        for number, text in enumerate(handouts):
+            if number == 0 and job < args.edited:
+                text = f"# Notes of student {job}\nReview the mechanism tables before the exam\n{text}"
+            spooled = spool_text(text, spool_dir)
+            store.add_source(job_id, source_type=SourceType.TEXT, filename=f"handout{number}.txt", spooled=spooled)
+        run_job(store, job_id, generation=stage, content_index=index)
+    return time.perf_counter() - started, generator.calls, store.get_job(job_id).validation_summary.total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--edited", type=int, default=10)
+    parser.add_argument("--handouts", type=int, default=3)
+    parser.add_argument("--handout-kb", type=int, default=256)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--cache", action="store_true")
+    args = parser.parse_args()
+
+    spool_dir = tempfile.mkdtemp(prefix="bench-content-index-")
+    handouts = [synthetic_course_material(args.handout_kb * 1024, seed=seed) for seed in range(args.handouts)]
+
+    print(f"{'run':>10} {'seconds':>8} {'generator_calls':>16} {'cards/job':>10}")
+    baseline_s, baseline_calls, baseline_cards = _run_jobs(handouts, args, spool_dir, None)
+    print(f"{'no index':>10} {baseline_s:>8.2f} {baseline_calls:>16} {baseline_cards:>10}")
+    index = ContentIndex()
+    indexed_s, indexed_calls, indexed_cards = _run_jobs(handouts, args, spool_dir, index)
+    print(f"{'index':>10} {indexed_s:>8.2f} {indexed_calls:>16} {indexed_cards:>10}")
+    assert indexed_cards == baseline_cards
+
+    fleet = index.metrics()
+    print(
+        f"\n{fleet.segmentations_reused}/{fleet.jobs} segmentations reused "
+        f"({fleet.source_bytes_reused / 1024 / 1024:.1f} MiB not read), "
+        f"{fleet.chunks_reused}/{fleet.chunks} chunks reused ({fleet.reuse_ratio:.0%}), "
+        f"{fleet.cards_reused} cards not generated or checked again"
+    )
+
+
+if __name__ == "__main__":
+    main()
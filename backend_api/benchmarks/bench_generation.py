@@ -0,0 +1,51 @@
+"""Time the generation stage against a slow fake backend at several concurrency caps.
+
+With ``--cache`` each configuration runs twice through one card cache, so the
+second (warm) run shows the cost of regenerating an unchanged document::
+
+    python -m benchmarks.bench_generation --chunks 40 --latency-ms 200 --concurrency 1 8 32 --cache
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.cache import CacheStats, CardCache
+from app.generation import FakeSlowGenerator, GenerationStage, RetryPolicy
+from app.records import ChunkData
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--latency-ms", type=int, default=200)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--cache", action="store_true", help="also time a warm re-run through the card cache")
+    args = parser.parse_args()
+
+    chunks = [
+        ChunkData(chunk_id=f"chk_{i}", topic=f"Topic {i}", subtopic="default", token_estimate=1, text=f"Term{i} alpha")
+        for i in range(args.chunks)
+    ]
+    print(f"{'concurrency':>11} {'run':>5} {'wall_s':>8} {'calls':>6} {'cards':>6} {'hits':>5}")
+    for concurrency in args.concurrency:
+        generator = FakeSlowGenerator(latency_s=args.latency_ms / 1000, failure_rate=args.failure_rate, seed=1)
+        stage = GenerationStage(
+            generator=generator,
+            concurrency=concurrency,
+            retry=RetryPolicy(max_attempts=8, base_delay_s=args.latency_ms / 1000),
+            cache=CardCache() if args.cache else None,
+        )
+        for run in ("cold", "warm") if args.cache else ("cold",):
+            stats = CacheStats()
+            calls_before = generator.calls
+            started = time.perf_counter()
+            cards = sum(map(len, stage.run_by_chunk(chunks, course_name="Bench", cache_stats=stats)))
+            elapsed = time.perf_counter() - started
+            calls = generator.calls - calls_before
+            print(f"{concurrency:>11} {run:>5} {elapsed:>8.3f} {calls:>6} {cards:>6} {stats.hits:>5}")
+
+
+if __name__ == "__main__":
+    main()
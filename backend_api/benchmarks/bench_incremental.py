@@ -0,0 +1,77 @@
+"""Re-running a finished job after adding one more lecture, against a full rebuild.
+
+Each week is its own source with ``--topics-per-week`` headed topics; the
+generator is a fake backend with ``--latency-ms`` per chunk and no card
+cache, so every generated chunk costs a call::
+
+    python -m benchmarks.bench_incremental --weeks 12 --latency-ms 200
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+
+from app.generation import FakeSlowGenerator, GenerationStage
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.schemas import OutputFormat, SourceType
+from app.store import InMemoryStore
+
+from .synthetic import synthetic_course_text
+
+
+def _week_text(week: int, topics: int, topic_bytes: int) -> str:
+    parts = []
+    for topic in range(topics):
+        body = synthetic_course_text(topic_bytes, seed=week * 1000 + topic).partition("\n")[2]
+        parts.append(f"# Week {week} topic {topic}\n{body}")
+    return "\n".join(parts) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--topics-per-week", type=int, default=4)
+    parser.add_argument("--topic-kb", type=int, default=40)
+    parser.add_argument("--latency-ms", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    spool_dir = tempfile.mkdtemp(prefix="bench-incremental-")
+    weeks = [_week_text(week, args.topics_per_week, args.topic_kb * 1024) for week in range(args.weeks + 1)]
+    generator = FakeSlowGenerator(latency_s=args.latency_ms / 1000)
+    stage = GenerationStage(generator=generator, concurrency=args.concurrency)
+
+    def add_week(store: InMemoryStore, job_id: str, week: int) -> None:
+        spooled = spool_text(weeks[week], spool_dir)
+        store.add_source(job_id, source_type=SourceType.TEXT, filename=f"week{week}.txt", spooled=spooled)
+
+    def timed_run(store: InMemoryStore, job_id: str) -> tuple[float, int]:
+        calls = generator.calls
+        started = time.perf_counter()
+        run_job(store, job_id, generation=stage)
+        return time.perf_counter() - started, generator.calls - calls
+
+    store = InMemoryStore()
+    job = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+    for week in range(args.weeks):
+        add_week(store, job.job_id, week)
+    timed_run(store, job.job_id)
+    add_week(store, job.job_id, args.weeks)
+    incremental_s, incremental_calls = timed_run(store, job.job_id)
+
+    fresh = InMemoryStore()
+    rebuild = fresh.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+    for week in range(args.weeks + 1):
+        add_week(fresh, rebuild.job_id, week)
+    rebuild_s, rebuild_calls = timed_run(fresh, rebuild.job_id)
+
+    print(f"{'run':>12} {'seconds':>8} {'generator_calls':>16} {'chunks':>7}")
+    print(f"{'full rebuild':>12} {rebuild_s:>8.2f} {rebuild_calls:>16} {len(fresh.get_chunks(rebuild.job_id)):>7}")
+    print(f"{'incremental':>12} {incremental_s:>8.2f} {incremental_calls:>16} {len(store.get_chunks(job.job_id)):>7}")
+    assert store.get_job(job.job_id).validation_summary.total == fresh.get_job(rebuild.job_id).validation_summary.total
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Memory held by a finished job's chunks and cards: model lists against the packed form.
+
+Runs one job of ``--source-kb`` synthetic notes through the pipeline, then
+measures each form by unpickling it under ``tracemalloc``, so every string
+and model is a fresh allocation. Also times a page read from each form and
+a read that has to load a spilled job back from disk::
+
+    python -m benchmarks.bench_job_memory --source-kb 4096 --lines-per-topic 40
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+from app.compact import pack_cards, pack_chunks, read_spill, write_spill
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.schemas import OutputFormat, SourceType
+from app.store import InMemoryStore, _card_lists
+
+from .synthetic import synthetic_course_text
+
+
+def _resident_bytes(payload: bytes) -> int:
+    tracemalloc.start()
+    try:
+        loaded = pickle.loads(payload)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del loaded
+    return size
+
+
+def _time_ms(fn, repeat: int = 20) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source-kb", type=int, default=4096)
+    parser.add_argument("--lines-per-topic", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    spool_dir = tempfile.mkdtemp(prefix="bench-job-memory-")
+    text = synthetic_course_text(args.source_kb * 1024, lines_per_topic=args.lines_per_topic)
+    store = InMemoryStore()
+    job = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+    store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spool_text(text, spool_dir))
+    run_job(store, job.job_id)
+
+    sources = store.get_sources(job.job_id)
+    chunks = store.get_chunks(job.job_id)
+    records = store.get_card_records(job.job_id)
+    card_lists = _card_lists(records)
+    packed_chunks = pack_chunks(chunks, sources)
+    packed_cards = pack_cards(records)
+
+    rows = [
+        ("chunks", len(chunks), pickle.dumps(chunks), pickle.dumps(packed_chunks)),
+        ("cards", len(records), pickle.dumps(card_lists), pickle.dumps(packed_cards)),
+    ]
+    print(f"{'kind':>7} {'count':>7} {'models_B/item':>14} {'packed_B/item':>14} {'ratio':>6}")
+    for kind, count, models, packed in rows:
+        before, after = _resident_bytes(models) / count, _resident_bytes(packed) / count
+        print(f"{kind:>7} {count:>7} {before:>14.0f} {after:>14.0f} {before / after:>6.1f}")
+    print(f"chunks with text kept inline: {len(packed_chunks.texts)}/{len(chunks)}")
+
+    unpacked = InMemoryStore()
+    copy = unpacked.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+    unpacked.set_chunks(copy.job_id, chunks)
+    unpacked.set_validated_cards(copy.job_id, records, store.get_job(job.job_id).validation_summary)
+    limit = args.page_size
+    print(f"\n{'read':>24} {'models_ms':>10} {'packed_ms':>10}")
+    for name, read in (
+        ("cards page", lambda s, job_id: s.get_cards_page(job_id, limit=limit)),
+        ("failed cards page", lambda s, job_id: s.get_failed_cards_page(job_id, limit=limit)),
+        ("chunks page", lambda s, job_id: s.get_chunks_page(job_id, limit=limit)),
+        ("all cards (export)", lambda s, job_id: list(s.iter_cards(job_id))),
+    ):
+        models_ms = _time_ms(lambda: read(unpacked, copy.job_id))
+        packed_ms = _time_ms(lambda: read(store, job.job_id))
+        print(f"{name:>24} {models_ms:>10.2f} {packed_ms:>10.2f}")
+
+    spill_dir = tempfile.mkdtemp(prefix="bench-job-spill-")
+    path = write_spill(spill_dir, job.job_id, store.get_job(job.job_id).packed)
+    print(f"\nspilled job: {len(open(path, 'rb').read()) / 1024:.0f} KiB on disk, "
+          f"load back in {_time_ms(lambda: read_spill(path)):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Response time of the chunk and card list endpoints as jobs grow.
+
+Each size is a done job with that many ~``--chunk-kb`` chunks and one card
+per chunk, stored in the chosen backend. ``full`` serialises the whole list
+in one response, as the endpoints did before pagination. The other rows go
+through the API with one default-size page::
+
+    python -m benchmarks.bench_pages --chunks 1000 10000 50000 --store sqlite
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+
+from app import main as api
+from app.generation import create_cards_from_chunk
+from app.pages import DEFAULT_PAGE_SIZE, encode_cursor
+from app.records import ChunkData
+from app.schemas import ChunksResponse, JobPreviewResponse, JobStatus, OutputFormat, ValidationSummary
+from app.sqlite_store import SQLiteStore
+from app.store import CardRecord, InMemoryStore, JobStore
+
+from .synthetic import synthetic_course_text
+
+
+def _populate(store: JobStore, chunks: int, chunk_kb: int) -> str:
+    body = synthetic_course_text(chunk_kb * 1024).partition("\n")[2]
+    job = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+    chunk_list = [
+        ChunkData(f"chk_{i:08x}", f"Topic {i}", "default", chunk_kb * 256, body)
+        for i in range(chunks)
+    ]
+    records = [CardRecord(chunk.chunk_id, card) for chunk in chunk_list for card in create_cards_from_chunk(chunk)]
+    store.set_chunks(job.job_id, chunk_list)
+    store.set_validated_cards(job.job_id, records, ValidationSummary(total=len(records), passed=len(records), failed=0))
+    store.update_progress(job.job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+    return job.job_id
+
+
+def _time(fn: Callable[[], int], repeat: int) -> tuple[float, int]:
+    size = fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--chunk-kb", type=int, default=2)
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client = TestClient(api.app)
+    print(f"{'chunks':>7} {'request':>28} {'ms':>9} {'kib':>9}")
+    for chunks in args.chunks:
+        store = api.store = (
+            SQLiteStore(tempfile.mktemp(suffix=".db")) if args.store == "sqlite" else InMemoryStore()
+        )
+        job_id = _populate(store, chunks, args.chunk_kb)
+        job = store.get_job(job_id)
+        last_page = encode_cursor(job.revision, chunks - DEFAULT_PAGE_SIZE - 1)
+
+        def full_chunks() -> int:
+            chunk_models = [chunk.to_model() for chunk in store.get_chunks(job_id)]
+            response = ChunksResponse(job_id=job_id, status=job.status, chunks=chunk_models)
+            return len(response.model_dump_json())
+
+        def full_cards() -> int:
+            response = JobPreviewResponse(
+                job_id=job_id,
+                status=job.status,
+                cards=[card.to_model() for card in store.get_cards(job_id)],
+                validation=job.validation_summary,
+            )
+            return len(response.model_dump_json())
+
+        def get(path: str, **params: str) -> Callable[[], int]:
+            return lambda: len(client.get(path, params=params).content)
+
+        revalidate = {"If-None-Match": client.get(f"/v1/jobs/{job_id}/chunks").headers["etag"]}
+        rows = [
+            ("full chunk list", full_chunks),
+            ("chunks, first page", get(f"/v1/jobs/{job_id}/chunks")),
+            ("chunks, last page", get(f"/v1/jobs/{job_id}/chunks", cursor=last_page)),
+            ("chunks, page without text", get(f"/v1/jobs/{job_id}/chunks", fields="chunk_id,topic,token_estimate")),
+            ("chunks, 304", lambda: len(client.get(f"/v1/jobs/{job_id}/chunks", headers=revalidate).content)),
+            ("full card list", full_cards),
+            ("cards, last page", get(f"/v1/jobs/{job_id}/preview", cursor=last_page)),
+        ]
+        for name, fn in rows:
+            ms, size = _time(fn, args.repeat)
+            print(f"{chunks:>7} {name:>28} {ms:>9.2f} {size / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Segmentation time of one large job: a single task vs spread over a process pool.
+
+Spools ``--sources`` files of synthetic course material adding up to
+``--size-mb``, then runs ``segment_changed_topics`` as one pool task, the
+way smaller jobs still are, and ``segment_changed_topics_parallel`` with
+each of ``--workers`` pool sizes, checking that every run produces the same
+topics and chunks::
+
+    python -m benchmarks.bench_parallel_segmentation --size-mb 200 --sources 1 --workers 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.ingest import spool_text
+from app.schemas import SourceType
+from app.segmentation import ParallelSegmentation, segment_changed_topics, segment_changed_topics_parallel
+from app.store import new_source_record
+
+from .synthetic import synthetic_course_material
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--sources", type=int, default=1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_bytes = args.size_mb * 1024 * 1024 // args.sources
+        sources = [
+            new_source_record(
+                SourceType.TEXT, f"notes{i}.txt", spool_text(synthetic_course_material(source_bytes, seed=i), tmp)
+            )
+            for i in range(args.sources)
+        ]
+        print(f"corpus: {args.size_mb} MB in {args.sources} sources, {os.cpu_count()} CPUs")
+        print(f"{'mode':>12} {'topics':>7} {'chunks':>7} {'seconds':>8} {'speedup':>8}")
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pool.submit(abs, 0).result()
+            started = time.perf_counter()
+            expected = pool.submit(segment_changed_topics, sources, {}).result()
+            baseline = time.perf_counter() - started
+        chunks = sum(len(topic_chunks) for topic_chunks in expected[1].values())
+        print(f"{'single task':>12} {len(expected[0]):>7} {chunks:>7} {baseline:>8.2f} {1:>8.2f}")
+
+        for workers in args.workers:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # start every worker before timing, as the scheduler's long-lived pool would have
+                list(pool.map(abs, range(workers * 4)))
+
+                def map_tasks(fn, arg_tuples):
+                    return [future.result() for future in [pool.submit(fn, *args) for args in arg_tuples]]
+
+                started = time.perf_counter()
+                result = segment_changed_topics_parallel(
+                    sources, {}, map_tasks=map_tasks, parallel=ParallelSegmentation(workers=workers)
+                )
+                elapsed = time.perf_counter() - started
+            if result != expected:
+                raise RuntimeError(f"parallel segmentation with {workers} workers differs from the single task")
+            print(
+                f"{f'{workers} workers':>12} {len(result[0]):>7} {chunks:>7} {elapsed:>8.2f} "
+                f"{baseline / elapsed:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
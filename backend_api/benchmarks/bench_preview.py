@@ -0,0 +1,105 @@
+"""Rendering a 10k-card preview: Pydantic models against plain rows and a fast JSON encoder.
+
+Each row renders all ``--cards`` passed cards of one done job at once,
+except the API rows, which fetch them as pages of 1000 through the app.
+``models`` is the path before this change: a ``Card`` is built (and
+validated) per row and the response model serialises them.
+``json page`` is the store encoding the cards itself, as the endpoints now
+do::
+
+    python -m benchmarks.bench_preview --cards 10000 --store sqlite
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+
+from fastapi.testclient import TestClient
+
+from app import fastjson
+from app import main as api
+from app.pages import MAX_PAGE_SIZE, RenderedPages
+from app.schemas import JobPreviewResponse
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore
+
+from .bench_pages import _populate
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=10000)
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    store = api.store = SQLiteStore(tempfile.mktemp(suffix=".db")) if args.store == "sqlite" else InMemoryStore()
+    job_id = _populate(store, args.cards, 1)
+    job = store.get_job(job_id)
+
+    def models() -> bytes:
+        cards = [card.to_model() for card in store.get_cards(job_id)]
+        return JobPreviewResponse(
+            job_id=job_id, status=job.status, cards=cards, validation=job.validation_summary
+        ).model_dump_json().encode("utf-8")
+
+    def page() -> bytes:
+        return store.get_cards_page(job_id, limit=args.cards).items
+
+    def without_orjson(fn: Callable[[], object]) -> Callable[[], object]:
+        def run() -> object:
+            saved, fastjson.orjson = fastjson.orjson, None
+            try:
+                return fn()
+            finally:
+                fastjson.orjson = saved
+
+        return run
+
+    rendered = RenderedPages(max_bytes=256 * 1024 * 1024)
+    rendered.put("bench", models())
+
+    client = TestClient(api.app)
+    cursors: list[str | None] = [None]
+    while True:
+        params = {"limit": MAX_PAGE_SIZE} | ({"cursor": cursors[-1]} if cursors[-1] else {})
+        cursor = client.get(f"/v1/jobs/{job_id}/preview", params=params).json()["next_cursor"]
+        if cursor is None:
+            break
+        cursors.append(cursor)
+
+    def api_pages(cold: bool) -> Callable[[], None]:
+        def run() -> None:
+            if cold:
+                api.rendered_pages = RenderedPages(max_bytes=api.settings.page_cache_mb * 1024 * 1024)
+            for cursor in cursors:
+                params = {"limit": MAX_PAGE_SIZE} | ({"cursor": cursor} if cursor else {})
+                client.get(f"/v1/jobs/{job_id}/preview", params=params).content
+
+        return run
+
+    results = [
+        ("models", _time(models, args.repeat)),
+        ("json page, stdlib json", _time(without_orjson(page), args.repeat)),
+        ("json page", _time(page, args.repeat)),
+        ("rendered cache hit", _time(lambda: rendered.get("bench"), args.repeat)),
+        ("api pages, cold", _time(api_pages(cold=True), args.repeat)),
+        ("api pages, cached", _time(api_pages(cold=False), args.repeat)),
+    ]
+    print(f"{'path':>22} {'ms':>9}  ({args.cards} cards, {args.store} store, {len(models()) / 1024:.0f} KiB)")
+    for name, ms in results:
+        print(f"{name:>22} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
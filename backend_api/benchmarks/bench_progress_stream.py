@@ -0,0 +1,149 @@
+"""Following job progress with status polling against the server-sent events stream.
+
+``--watchers`` clients follow one job through the real ASGI app, in process
+and without sockets. A publisher thread walks the job through its stages
+over ``--duration-s``, with one progress update per generated chunk. Polling
+clients GET the status every ``--poll-ms``. SSE clients hold one
+``/events`` stream each. ``updates/watcher`` counts the distinct states a
+client saw, out of ``--chunks`` + 5::
+
+    python -m benchmarks.bench_progress_stream --watchers 5000 --duration-s 10 --chunks 40
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from app.main import app, store
+from app.schemas import JobStatus, OutputFormat
+
+
+@dataclass
+class Traffic:
+    requests: int = 0
+    response_bytes: int = 0
+    updates_seen: int = 0
+
+
+async def _get(path: str, traffic: Traffic, on_chunk: Callable[[bytes], None] | None = None) -> bytes:
+    """One GET through the ASGI app; ``on_chunk`` sees each body chunk as it is sent."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "", "headers": [],
+        "client": ("bench", 0), "server": ("bench", 80),
+    }
+    requested = False
+    finished = asyncio.Event()
+    body = bytearray()
+
+    async def receive() -> dict:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            traffic.response_bytes += len(chunk)
+            body.extend(chunk)
+            if on_chunk is not None and chunk:
+                on_chunk(chunk)
+
+    traffic.requests += 1
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    return bytes(body)
+
+
+def _drive_job(job_id: str, duration_s: float, chunks: int, started: threading.Event) -> None:
+    started.wait()
+    steps = [(JobStatus.PARSING, 20, "parsing source text"), (JobStatus.CHUNKING, 45, "topic segmentation")]
+    steps += [
+        (JobStatus.GENERATING, 75 + (20 * done) // chunks, f"card generation ({done}/{chunks} chunks)")
+        for done in range(chunks + 1)
+    ]
+    steps.append((JobStatus.DONE, 100, "completed"))
+    for status, progress, step in steps:
+        time.sleep(duration_s / len(steps))
+        store.update_progress(job_id, status=status, progress=progress, current_step=step)
+
+
+async def _poll(job_id: str, poll_s: float, traffic: Traffic) -> None:
+    await asyncio.sleep(random.random() * poll_s)
+    last = None
+    while True:
+        body = json.loads(await _get(f"/v1/jobs/{job_id}", traffic))
+        state = (body["status"], body["progress"], body["current_step"])
+        traffic.updates_seen += state != last
+        last = state
+        if body["status"] == JobStatus.DONE.value:
+            return
+        await asyncio.sleep(poll_s)
+
+
+async def _watch(job_id: str, traffic: Traffic) -> None:
+    def on_chunk(chunk: bytes) -> None:
+        traffic.updates_seen += chunk.count(b"event: progress")
+
+    await _get(f"/v1/jobs/{job_id}/events", traffic, on_chunk)
+
+
+def _run(mode: str, args: argparse.Namespace) -> tuple[Traffic, float, float]:
+    job = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+    store.update_progress(job.job_id, status=JobStatus.QUEUED, progress=0, current_step="waiting for worker")
+    traffic = Traffic()
+    started = threading.Event()
+    publisher = threading.Thread(target=_drive_job, args=(job.job_id, args.duration_s, args.chunks, started))
+    publisher.start()
+
+    async def main() -> None:
+        if mode == "polling":
+            watchers = [_poll(job.job_id, args.poll_ms / 1000, traffic) for _ in range(args.watchers)]
+        else:
+            watchers = [_watch(job.job_id, traffic) for _ in range(args.watchers)]
+        tasks = [asyncio.ensure_future(watcher) for watcher in watchers]
+        await asyncio.sleep(0)
+        started.set()
+        await asyncio.gather(*tasks)
+
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    asyncio.run(main())
+    publisher.join()
+    return traffic, time.process_time() - cpu, time.perf_counter() - wall
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--watchers", type=int, default=5000)
+    parser.add_argument("--duration-s", type=float, default=10.0)
+    parser.add_argument("--chunks", type=int, default=40)
+    parser.add_argument("--poll-ms", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>8} {'requests':>9} {'req/s':>7} {'kib_sent':>9} {'updates/watcher':>16} "
+        f"{'cpu_s':>7} {'cpu_us/update':>14} {'wall_s':>7}"
+    )
+    for mode in ("polling", "sse"):
+        traffic, cpu_s, wall_s = _run(mode, args)
+        print(
+            f"{mode:>8} {traffic.requests:>9} {traffic.requests / wall_s:>7.0f} {traffic.response_bytes / 1024:>9.0f} "
+            f"{traffic.updates_seen / args.watchers:>16.1f} {cpu_s:>7.2f} "
+            f"{cpu_s * 1e6 / max(traffic.updates_seen, 1):>14.0f} {wall_s:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Memory and disk of a long-running in-memory store, with and without retention.
+
+Pushes ``--jobs`` small jobs through the pipeline, one after another, and
+exports each one as CSV twice, the way clients retry an export. Every
+``--sweep-every`` jobs the store is swept, with a job TTL of
+``--ttl-ms``. Reports traced Python memory, export files on disk and the
+store's gauges at the end::
+
+    python -m benchmarks.bench_retention --jobs 2000 --ttl-ms 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.exporters import iter_pipe_csv, write_export
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.retention import RetentionPolicy
+from app.schemas import OutputFormat, SourceType
+from app.store import InMemoryStore
+
+from .synthetic import synthetic_course_text
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _churn(store: InMemoryStore, args: argparse.Namespace, notes: str) -> tuple[float, int, float]:
+    spool_dir = tempfile.mkdtemp(prefix="bench-retention-spool-")
+    export_dir = tempfile.mkdtemp(prefix="bench-retention-exports-")
+    tracemalloc.start()
+    started = time.perf_counter()
+    for i in range(args.jobs):
+        job = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+        spooled = spool_text(notes, spool_dir)
+        store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+        run_job(store, job.job_id)
+        for _ in range(2):
+            written = write_export(iter_pipe_csv(store.iter_cards(job.job_id)), export_dir, suffix=".csv")
+            store.create_export(
+                job_id=job.job_id,
+                export_format=OutputFormat.CSV,
+                filename=f"{job.job_id}.csv",
+                content_type="text/csv",
+                path=written.path,
+                size_bytes=written.size_bytes,
+                etag=written.etag,
+            )
+        if (i + 1) % args.sweep_every == 0:
+            store.sweep()
+    elapsed = time.perf_counter() - started
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return traced / 1024 / 1024, _dir_bytes(export_dir) + _dir_bytes(spool_dir), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--source-kb", type=int, default=16)
+    parser.add_argument("--ttl-ms", type=int, default=200)
+    parser.add_argument("--sweep-every", type=int, default=50)
+    args = parser.parse_args()
+
+    notes = synthetic_course_text(args.source_kb * 1024, lines_per_topic=20)
+    ttl_s = args.ttl_ms / 1000
+    stores = [
+        ("no retention", InMemoryStore()),
+        ("retention", InMemoryStore(retention=RetentionPolicy(job_ttl_s=ttl_s, export_ttl_s=ttl_s))),
+    ]
+    print(f"{'store':>13} {'traced_mib':>11} {'disk_mib':>9} {'live_jobs':>10} {'live_exports':>13} {'seconds':>8}")
+    for name, store in stores:
+        traced_mib, disk_bytes, elapsed = _churn(store, args, notes)
+        metrics = store.metrics()
+        print(
+            f"{name:>13} {traced_mib:>11.1f} {disk_bytes / 1024 / 1024:>9.1f} {metrics.live_jobs:>10} "
+            f"{metrics.live_exports:>13} {elapsed:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
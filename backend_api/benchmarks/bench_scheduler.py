@@ -0,0 +1,101 @@
+"""Measure API status latency while large jobs run, per scheduler worker mode.
+
+Each mode runs in a subprocess with ``MCQ_WORKER_MODE`` set, starts
+``--jobs`` jobs through the HTTP API and polls ``GET /v1/jobs/{id}`` until
+they finish::
+
+    python -m benchmarks.bench_scheduler --jobs 24 --source-mb 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def _run_child(jobs: int, source_mb: int) -> None:
+    from fastapi.testclient import TestClient
+
+    from app.main import app, scheduler
+
+    from .synthetic import synthetic_course_text
+
+    client = TestClient(app)
+    text = synthetic_course_text(source_mb * 1024 * 1024)
+    job_ids = []
+    for idx in range(jobs):
+        job_id = client.post("/v1/jobs", json={"course_name": "Bench", "tenant_id": f"t{idx % 4}"}).json()["job_id"]
+        client.post(
+            f"/v1/jobs/{job_id}/sources",
+            data={"source_type": "text"},
+            files={"file": ("notes.txt", text, "text/plain")},
+        )
+        job_ids.append(job_id)
+
+    started = time.perf_counter()
+    for job_id in job_ids:
+        client.post(f"/v1/jobs/{job_id}/start")
+
+    latencies: list[float] = []
+    pending = set(job_ids)
+    while pending:
+        for job_id in list(pending):
+            t0 = time.perf_counter()
+            status = client.get(f"/v1/jobs/{job_id}").json()["status"]
+            latencies.append(time.perf_counter() - t0)
+            if status in {"done", "failed"}:
+                pending.discard(job_id)
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    metrics = scheduler.metrics()
+    scheduler.shutdown()
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "wall_s": elapsed,
+                "polls": len(latencies),
+                "p50_ms": latencies[len(latencies) // 2] * 1000,
+                "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+                "wait_ms_p95": metrics.wait_ms_p95,
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--source-mb", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.jobs, args.source_mb)
+        return
+
+    print(f"{'mode':>8} {'wall_s':>8} {'polls':>7} {'p50_ms':>8} {'p99_ms':>8} {'queue_wait_p95_ms':>18}")
+    for mode in ("thread", "process"):
+        env = {**os.environ, "MCQ_WORKER_MODE": mode, "MCQ_MAX_WORKERS": str(args.workers)}
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_scheduler", "--child",
+             "--jobs", str(args.jobs), "--source-mb", str(args.source_mb)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout
+        r = json.loads(out.splitlines()[-1])
+        print(
+            f"{mode:>8} {r['wall_s']:>8.2f} {r['polls']:>7} {r['p50_ms']:>8.2f} "
+            f"{r['p99_ms']:>8.2f} {r['wait_ms_p95']:>18.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Peak RSS of source segmentation: old in-memory path vs the streaming pipeline.
+
+Spools ``--sources`` synthetic files once, then segments them in a fresh
+subprocess per mode and reports peak RSS above the post-import baseline::
+
+    python -m benchmarks.bench_segmentation_memory --sources 4 --source-mb 25
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_child(mode: str, paths: list[str]) -> None:
+    from app.chunking import build_chunks
+    from app.pipeline import extract_topics
+    from app.segmentation import segment_sources
+    from app.schemas import SourceType
+    from app.store import SourceRecord
+
+    sources = [
+        SourceRecord(f"src_{i}", SourceType.TEXT, f"notes{i}.txt", path, 0, True, sha256=f"bench-{i}")
+        for i, path in enumerate(paths)
+    ]
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "legacy":
+        # what run_job used to do: every source's raw_text in memory, then one merged copy
+        raw_texts = [open(source.path, encoding="utf-8").read() for source in sources]
+        chunks = build_chunks(extract_topics("\n".join(raw_texts)))
+    else:
+        chunks = segment_sources(sources)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"chunks": len(chunks), "seconds": elapsed, "peak_rss_mb": _peak_rss_mb() - baseline}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, default=4)
+    parser.add_argument("--source-mb", type=int, default=25)
+    parser.add_argument("--child", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.child, args.paths)
+        return
+
+    from app.ingest import spool_text
+
+    from .synthetic import synthetic_course_text
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [
+            spool_text(synthetic_course_text(args.source_mb * 1024 * 1024, seed=i), tmp).path
+            for i in range(args.sources)
+        ]
+        corpus_mb = args.sources * args.source_mb
+        print(f"corpus: {corpus_mb} MB in {args.sources} sources")
+        print(f"{'mode':>10} {'chunks':>7} {'seconds':>8} {'peak_rss_mb':>12} {'x_corpus':>9}")
+        for mode in ("legacy", "streaming"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_segmentation_memory", "--child", mode, *paths],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            r = json.loads(out)
+            print(
+                f"{mode:>10} {r['chunks']:>7} {r['seconds']:>8.2f} {r['peak_rss_mb']:>12.1f} "
+                f"{r['peak_rss_mb'] / corpus_mb:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
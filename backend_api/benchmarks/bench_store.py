@@ -0,0 +1,98 @@
+"""Compare job-store throughput and peak RSS for the in-memory and SQLite backends.
+
+Each backend runs in its own subprocess so peak RSS is measured independently::
+
+    python -m benchmarks.bench_store --jobs 10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.chunking import build_chunks
+from app.generation import create_cards_from_chunk
+from app.pipeline import extract_topics
+from app.ingest import spool_text
+from app.schemas import JobStatus, OutputFormat, SourceType, ValidationSummary
+from app.sqlite_store import SQLiteStore
+from app.store import CardRecord, InMemoryStore, JobStore
+
+from .synthetic import synthetic_course_text
+
+
+def _exercise(store: JobStore, jobs: int, source_bytes: int, spool_dir: str) -> dict[str, float]:
+    base_text = synthetic_course_text(source_bytes, lines_per_topic=20)
+    write_s = 0.0
+    job_ids = []
+    for idx in range(jobs):
+        # every job gets its own payload objects, as real uploads would
+        text = f"{base_text}\nJob {idx} appendix"
+        chunks = build_chunks(extract_topics(text), target_min_tokens=100, target_max_tokens=200)
+        records = [CardRecord(chunk.chunk_id, card) for chunk in chunks for card in create_cards_from_chunk(chunk)]
+        summary = ValidationSummary(total=len(records), passed=len(records), failed=0)
+        spooled = spool_text(text, spool_dir)
+
+        started = time.perf_counter()
+        job = store.create_job(course_name="Bench", output_format=[OutputFormat.CSV])
+        store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+        store.update_progress(job.job_id, status=JobStatus.CHUNKING, progress=45, current_step="topic segmentation")
+        store.set_chunks(job.job_id, chunks)
+        store.set_validated_cards(job.job_id, records, summary)
+        store.update_progress(job.job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+        write_s += time.perf_counter() - started
+        job_ids.append(job.job_id)
+
+    started = time.perf_counter()
+    for job_id in job_ids:
+        store.get_job(job_id)
+    read_s = time.perf_counter() - started
+
+    return {
+        "jobs": jobs,
+        "write_jobs_per_s": jobs / write_s,
+        "status_reads_per_s": jobs / read_s,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _run_child(backend: str, jobs: int, source_bytes: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        store: JobStore = InMemoryStore() if backend == "memory" else SQLiteStore(str(Path(tmp) / "bench.db"))
+        print(json.dumps({"backend": backend, **_exercise(store, jobs, source_bytes, tmp)}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10_000)
+    parser.add_argument("--source-bytes", type=int, default=20_000)
+    parser.add_argument("--child", choices=["memory", "sqlite"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.child, args.jobs, args.source_bytes)
+        return
+
+    print(f"{'backend':>8} {'jobs':>6} {'writes/s':>10} {'reads/s':>10} {'peak_rss_mb':>12}")
+    for backend in ("memory", "sqlite"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_store", "--child", backend,
+             "--jobs", str(args.jobs), "--source-bytes", str(args.source_bytes)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(out)
+        print(
+            f"{backend:>8} {result['jobs']:>6} {result['write_jobs_per_s']:>10.0f} "
+            f"{result['status_reads_per_s']:>10.0f} {result['peak_rss_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
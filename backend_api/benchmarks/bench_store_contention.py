@@ -0,0 +1,121 @@
+"""Measure ``get_job`` latency while pipelines write to other jobs.
+
+Runs ``--pipelines`` threads that execute ``run_job`` back to back and
+``--readers`` threads that poll ``get_job`` for idle jobs, then reports
+p50/p99 read latency per backend. ``global-lock`` wraps the in-memory store
+in one lock, which is how the store used to behave::
+
+    python -m benchmarks.bench_store_contention --pipelines 8 --readers 32
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from threading import Lock
+
+from app.pipeline import run_job
+from app.ingest import spool_text
+from app.schemas import OutputFormat, SourceType
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore, JobStore
+
+from .synthetic import synthetic_course_text
+
+
+class _GlobalLockStore:
+    """Serialises every call through one lock, like the original InMemoryStore."""
+
+    def __init__(self, inner: JobStore) -> None:
+        self._inner = inner
+        self._lock = Lock()
+
+    def __getattr__(self, name: str):
+        method = getattr(self._inner, name)
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return method(*args, **kwargs)
+
+        return locked
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _run(
+    store: JobStore, pipelines: int, readers: int, seconds: float, source_bytes: int, spool_dir: str
+) -> dict[str, float]:
+    spooled = spool_text(synthetic_course_text(source_bytes, lines_per_topic=200), spool_dir)
+    idle_jobs = [store.create_job(course_name="Idle", output_format=[OutputFormat.CSV]).job_id for _ in range(64)]
+    stop = threading.Event()
+    latencies: list[list[float]] = [[] for _ in range(readers)]
+    completed = [0] * pipelines
+
+    def pipeline_worker(idx: int) -> None:
+        while not stop.is_set():
+            job = store.create_job(course_name="Busy", output_format=[OutputFormat.CSV])
+            store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+            run_job(store, job.job_id)
+            completed[idx] += 1
+
+    def reader(idx: int) -> None:
+        samples = latencies[idx]
+        n = 0
+        while not stop.is_set():
+            job_id = idle_jobs[n % len(idle_jobs)]
+            started = time.perf_counter()
+            store.get_job(job_id)
+            samples.append(time.perf_counter() - started)
+            n += 1
+            time.sleep(0.001)
+
+    threads = [threading.Thread(target=pipeline_worker, args=(i,)) for i in range(pipelines)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples = [s for per_reader in latencies for s in per_reader]
+    return {
+        "reads": len(samples),
+        "pipelines_done": sum(completed),
+        "p50_us": _percentile(samples, 0.50) * 1e6,
+        "p99_us": _percentile(samples, 0.99) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pipelines", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--source-bytes", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    print(f"{'backend':>12} {'reads':>8} {'jobs':>5} {'p50_us':>9} {'p99_us':>9} {'mean_us':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        backends: dict[str, JobStore] = {
+            "global-lock": _GlobalLockStore(InMemoryStore()),
+            "memory": InMemoryStore(),
+            "sqlite": SQLiteStore(str(Path(tmp) / "bench.db")),
+        }
+        for name, store in backends.items():
+            r = _run(store, args.pipelines, args.readers, args.seconds, args.source_bytes, tmp)
+            print(
+                f"{name:>12} {r['reads']:>8} {r['pipelines_done']:>5} "
+                f"{r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {r['mean_us']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
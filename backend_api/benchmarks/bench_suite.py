@@ -0,0 +1,207 @@
+"""End-to-end pipeline benchmark suite with a regression check against a stored baseline.
+
+For each ``--sizes-mb`` of synthetic course material (headings of several
+styles, lists, long sections) it times every pipeline stage on its own:
+``extract_topics``, ``build_chunks``, ``segment_sources`` (the streaming
+path ``run_job`` uses), ``create_cards_from_chunk`` over every chunk,
+``validate_cards``, the CSV and ``.apkg`` exporters, and the whole HTTP flow
+through the FastAPI app (create, upload, start, wait, preview, both exports,
+both downloads). Each stage reports the median of ``--repeat`` runs and the
+peak traced memory of one more run. Results are written as JSON::
+
+    python -m benchmarks.bench_suite --sizes-mb 1 10 --output bench.json
+    python -m benchmarks.bench_suite --sizes-mb 1 10 --compare bench.json
+
+``--compare`` flags any stage slower than the baseline by more than
+``--time-tolerance`` (and by at least ``--min-delta-ms``), or using more
+than ``--memory-tolerance`` extra peak memory, and exits with status 1.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from app.apkg import write_apkg
+from app.chunking import build_chunks
+from app.exporters import iter_pipe_csv, write_export
+from app.generation import create_cards_from_chunk
+from app.ingest import spool_text
+from app.pipeline import extract_topics
+from app.schemas import SourceType
+from app.segmentation import segment_sources
+from app.store import new_source_record
+from app.validation import validate_cards
+
+from .synthetic import synthetic_course_material
+
+
+@dataclass
+class StageResult:
+    size_mb: int
+    stage: str
+    seconds: float
+    peak_mib: float
+    items: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.size_mb}mb/{self.stage}"
+
+
+def _measure(size_mb: int, stage: str, run: Callable[[], int], repeat: int) -> StageResult:
+    """Median wall time of ``repeat`` runs, then the traced peak of one more; ``run`` returns its item count."""
+    timings = []
+    items = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return StageResult(size_mb, stage, statistics.median(timings), peak / 1024 / 1024, items)
+
+
+def _http_flow(client, text: str) -> int:
+    job_id = client.post("/v1/jobs", json={"course_name": "Bench", "output_format": ["csv", "apkg"]}).json()["job_id"]
+    client.post(
+        f"/v1/jobs/{job_id}/sources",
+        data={"source_type": "text"},
+        files={"file": ("notes.txt", text.encode("utf-8"), "text/plain")},
+    )
+    client.post(f"/v1/jobs/{job_id}/start")
+    while (status := client.get(f"/v1/jobs/{job_id}").json()["status"]) not in {"done", "failed"}:
+        time.sleep(0.01)
+    if status != "done":
+        raise RuntimeError(f"benchmark job {job_id} failed")
+    cards = len(client.get(f"/v1/jobs/{job_id}/preview", params={"limit": 1000}).json()["cards"])
+    for export_format in ("csv", "apkg"):
+        export_id = client.post(f"/v1/jobs/{job_id}/export", json={"format": export_format}).json()["export_id"]
+        client.get(f"/v1/exports/{export_id}/download").content
+    return cards
+
+
+def run_suite(args: argparse.Namespace) -> list[StageResult]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    work_dir = tempfile.mkdtemp(prefix="bench-suite-")
+    results: list[StageResult] = []
+    with TestClient(app) as client:
+        for size_mb in args.sizes_mb:
+            text = synthetic_course_material(size_mb * 1024 * 1024, seed=size_mb)
+            sources = [new_source_record(SourceType.TEXT, "notes.txt", spool_text(text, work_dir))]
+            sections = extract_topics(text)
+            chunks = build_chunks(sections)
+            cards = [card for chunk in chunks for card in create_cards_from_chunk(chunk)]
+            runs = 0
+
+            def csv() -> int:
+                write_export(iter_pipe_csv(cards), work_dir, suffix=".csv")
+                return len(cards)
+
+            def apkg() -> int:
+                nonlocal runs
+                runs += 1
+                # a fresh collection each run: the cold export, not the incremental re-export
+                collection = os.path.join(work_dir, f"collection-{size_mb}-{runs}.anki2")
+                write_apkg(cards, work_dir, deck_name="Bench::Default", collection_path=collection)
+                return len(cards)
+
+            stages: list[tuple[str, Callable[[], int]]] = [
+                ("extract_topics", lambda: len(extract_topics(text))),
+                ("build_chunks", lambda: len(build_chunks(sections))),
+                ("segment_sources", lambda: len(segment_sources(sources))),
+                ("create_cards_from_chunk", lambda: sum(len(create_cards_from_chunk(chunk)) for chunk in chunks)),
+                ("validate_cards", lambda: len(validate_cards(cards)[0])),
+                ("export_csv", csv),
+                ("export_apkg", apkg),
+                ("http_flow", lambda: _http_flow(client, text)),
+            ]
+            for stage, run in stages:
+                result = _measure(size_mb, stage, run, args.repeat)
+                results.append(result)
+                print(
+                    f"{size_mb:>8} {stage:>24} {result.seconds * 1000:>10.1f} "
+                    f"{result.peak_mib:>9.1f} {result.items:>8}",
+                    flush=True,
+                )
+    return results
+
+
+def compare(results: list[StageResult], baseline: dict, args: argparse.Namespace) -> list[str]:
+    """Stages that regressed against ``baseline``, as printable lines."""
+    previous = {f"{row['size_mb']}mb/{row['stage']}": row for row in baseline["results"]}
+    regressions = []
+    print(f"\n{'stage':>32} {'base_ms':>9} {'ms':>9} {'time':>7} {'base_mib':>9} {'mib':>7} {'memory':>7}")
+    for result in results:
+        base = previous.get(result.key)
+        if base is None:
+            print(f"{result.key:>32} {'(new)':>9}")
+            continue
+        base_ms, ms = base["seconds"] * 1000, result.seconds * 1000
+        time_change = ms / base_ms - 1 if base_ms else 0.0
+        memory_change = result.peak_mib / base["peak_mib"] - 1 if base["peak_mib"] else 0.0
+        slower = time_change > args.time_tolerance and ms - base_ms >= args.min_delta_ms
+        heavier = memory_change > args.memory_tolerance and result.peak_mib - base["peak_mib"] >= 1
+        flag = " REGRESSION" if slower or heavier else ""
+        print(
+            f"{result.key:>32} {base_ms:>9.1f} {ms:>9.1f} {time_change:>+7.0%} "
+            f"{base['peak_mib']:>9.1f} {result.peak_mib:>7.1f} {memory_change:>+7.0%}{flag}"
+        )
+        if flag:
+            regressions.append(
+                f"{result.key}: {base_ms:.1f} -> {ms:.1f} ms, {base['peak_mib']:.1f} -> {result.peak_mib:.1f} MiB"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON written by an earlier --output")
+    parser.add_argument("--time-tolerance", type=float, default=0.2)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    parser.add_argument("--min-delta-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'size_mb':>8} {'stage':>24} {'median_ms':>10} {'peak_mib':>9} {'items':>8}")
+    results = run_suite(args)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {"sizes_mb": args.sizes_mb, "repeat": args.repeat},
+        "results": [asdict(result) for result in results],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args)
+        if regressions:
+            print("\nregressions against the baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
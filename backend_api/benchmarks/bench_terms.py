@@ -0,0 +1,72 @@
+"""Micro-benchmarks for term extraction: early-exit scan, frequency and tf-idf ranking.
+
+Each chunk is about ``--chunk-tokens`` words of synthetic course notes; a job
+is ``--chunks`` such chunks. The tf-idf rows compare document frequencies
+built once per job with rebuilding them for every chunk::
+
+    python -m benchmarks.bench_terms --chunk-tokens 1000 10000 --chunks 200
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import time
+from collections.abc import Callable
+
+from app.terms import DocumentFrequencies, first_terms, ranked_terms
+from benchmarks.synthetic import synthetic_course_text
+
+
+def legacy_terms(text: str) -> list[str]:
+    """The findall-then-break loop ``create_cards_from_chunk`` used before ``app.terms``."""
+    unique_terms: list[str] = []
+    seen = set()
+    for token in re.findall(r"\b[A-Za-z][A-Za-z0-9\-]{3,}\b", text):
+        lowered = token.lower()
+        if lowered not in seen:
+            seen.add(lowered)
+            unique_terms.append(token)
+        if len(unique_terms) >= 8:
+            break
+    return unique_terms
+
+
+def _time_job(texts: list[str], extract: Callable[[str], list[str]]) -> float:
+    started = time.perf_counter()
+    for text in texts:
+        extract(text)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-tokens", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--chunks", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>7} {'mode':>20} {'ms_per_chunk':>13}")
+    for tokens in args.chunk_tokens:
+        texts = [
+            synthetic_course_text(tokens * 10, seed=seed).partition("\n")[2] for seed in range(args.chunks)
+        ]
+        started = time.perf_counter()
+        shared = DocumentFrequencies.from_texts(texts)
+        build_s = time.perf_counter() - started
+        rows = [
+            ("legacy findall", _time_job(texts, legacy_terms)),
+            ("first (early exit)", _time_job(texts, first_terms)),
+            ("frequency", _time_job(texts, ranked_terms)),
+            ("tfidf, shared df", build_s + _time_job(texts, lambda text: ranked_terms(text, frequencies=shared))),
+        ]
+        # quadratic in the job size, so only a sample of chunks is timed
+        sample = texts[:10]
+        per_chunk_s = _time_job(
+            sample, lambda text: ranked_terms(text, frequencies=DocumentFrequencies.from_texts(texts))
+        )
+        rows.append(("tfidf, df per chunk", per_chunk_s * len(texts) / len(sample)))
+        for mode, elapsed in rows:
+            print(f"{tokens:>7} {mode:>20} {elapsed * 1000 / len(texts):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Validation throughput on synthetic cards, with and without near-duplicate detection.
+
+``--dup-rate`` of the cards are reworded copies of earlier ones, spread across
+the batch the way repeated content shows up in different chunks. "registry 4
+rules" runs the legacy loop's rules through the registry, for a like-for-like
+comparison. Timings are the best of ``--repeat`` runs. Also prints the
+per-rule hits and time the registry records for a job::
+
+    python -m benchmarks.bench_validation --cards 100000 --dup-rate 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from dataclasses import replace
+
+from app.records import CardData
+from app.validation import (
+    FORBIDDEN_QUESTION_PREFIXES,
+    REGISTRY,
+    RULES,
+    CardBatch,
+    RuleRegistry,
+    RuleStats,
+    validate_cards,
+)
+
+
+def synthetic_cards(count: int, *, dup_rate: float, vocabulary_size: int = 5000, seed: int = 11) -> list[CardData]:
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(vocabulary_size)]
+    cards: list[CardData] = []
+    for i in range(count):
+        if cards and rng.random() < dup_rate:
+            source = rng.choice(cards)
+            options = list(source.multiple_choice)
+            rng.shuffle(options)
+            cards.append(replace(source, multiple_choice=options, extra=f"Copy {i}"))
+            continue
+        options = rng.sample(vocabulary, 6)
+        question = f"High-yield mechanism of {rng.choice(vocabulary)} in {rng.choice(vocabulary)} therapy"
+        if rng.random() < 0.02:
+            question = "Which " + question
+        extra = f"Card {i}: rationale for {options[0]} over {options[1]}"
+        if rng.random() < 0.01:
+            extra += ", according to the text"
+        cards.append(CardData(question=question, multiple_choice=options, correct_answers=options[:1], extra=extra))
+    return cards
+
+
+def legacy_validate_cards(cards: list[CardData]) -> int:
+    """The per-card loop validation used before the batch engine (rules only, no dedup)."""
+    failed = 0
+    for card in cards:
+        lowered_options = {o.strip().lower() for o in card.multiple_choice}
+        tf_sets = ({"true", "false"}, {"t", "f"}, {"yes", "no"})
+        if any(tf.issubset(lowered_options) for tf in tf_sets):
+            failed += 1
+        elif card.question.strip().lower().startswith(FORBIDDEN_QUESTION_PREFIXES):
+            failed += 1
+        elif len(card.multiple_choice) < 6 or len(card.multiple_choice) <= len(card.correct_answers):
+            failed += 1
+    return failed
+
+
+def registry_only(cards: list[CardData], registry: RuleRegistry = REGISTRY) -> int:
+    """Rules only, no dedup: ``registry`` over the columns of one ``CardBatch``."""
+    return len(registry.apply(CardBatch(cards), range(len(cards))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=100_000)
+    parser.add_argument("--dup-rate", type=float, default=0.05)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="distinct terms shared by all cards")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode; the best is reported")
+    args = parser.parse_args()
+
+    cards = synthetic_cards(args.cards, dup_rate=args.dup_rate, vocabulary_size=args.vocabulary)
+    # the same four rules as the legacy loop, in the same order
+    legacy_rules = RuleRegistry(RULES[:4])
+    print(f"{'mode':>16} {'seconds':>8} {'cards_per_s':>12} {'vs_legacy':>9} {'failed':>7}")
+
+    legacy_s = 0.0
+    for mode, run in (
+        ("legacy 4 rules", legacy_validate_cards),
+        ("registry 4 rules", lambda batch: registry_only(batch, legacy_rules)),
+        ("registry", registry_only),
+        ("registry+dedup", lambda batch: len(validate_cards(batch)[1])),
+    ):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            failed = run(cards)
+            timings.append(time.perf_counter() - started)
+        elapsed = min(timings)
+        legacy_s = legacy_s or elapsed
+        print(f"{mode:>16} {elapsed:>8.2f} {len(cards) / elapsed:>12,.0f} {legacy_s / elapsed:>8.2f}x {failed:>7}")
+
+    stats = RuleStats()
+    validate_cards(cards, stats=stats)
+    print(f"\n{'rule':>22} {'hits':>7} {'ms':>8}")
+    for rule, hits in stats.hits.items():
+        print(f"{rule:>22} {hits:>7} {stats.seconds[rule] * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import random
+
+_WORDS = (
+    "penicillin cephalosporin vancomycin ribosome peptidoglycan transpeptidase beta-lactamase "
+    "aminoglycoside macrolide tetracycline fluoroquinolone gyrase topoisomerase nephrotoxicity "
+    "ototoxicity hepatotoxicity clearance bioavailability half-life receptor agonist antagonist "
+    "inhibitor synthesis membrane cytochrome metabolism excretion absorption distribution"
+).split()
+
+
+def synthetic_course_text(size_bytes: int, *, seed: int = 7, lines_per_topic: int = 4000) -> str:
+    """Generate heading-structured course notes of roughly ``size_bytes`` characters."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    total = 0
+    topic_idx = 0
+    line_idx = lines_per_topic
+    while total < size_bytes:
+        if line_idx >= lines_per_topic:
+            topic_idx += 1
+            line_idx = 0
+            heading = f"# Topic {topic_idx}"
+            parts.append(heading)
+            total += len(heading) + 1
+        line = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 14))).capitalize()
+        parts.append(line)
+        total += len(line) + 1
+        line_idx += 1
+    return "\n".join(parts)
+
+
+def _sentence(rng: random.Random, low: int = 8, high: int = 20) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+
+def synthetic_course_material(size_bytes: int, *, seed: int = 7, section_bytes: int = 24_000) -> str:
+    """Course notes shaped like real lecture material, of roughly ``size_bytes`` characters.
+
+    Chapters and sections use markdown headings of several levels or
+    ``Title:`` lines, and mix long paragraphs, bullet and numbered lists and
+    blank lines. Some sections run several times ``section_bytes`` long.
+    """
+    rng = random.Random(seed)
+    parts: list[str] = []
+    total = 0
+    chapter = section = 0
+    while total < size_bytes:
+        if section % 6 == 0:
+            chapter += 1
+            heading = f"# Chapter {chapter}: {rng.choice(_WORDS).capitalize()} pharmacology"
+        elif rng.random() < 0.3:
+            heading = f"{rng.choice(_WORDS).capitalize()} Review {chapter} {section}:"
+        else:
+            heading = f"{'#' * rng.randint(2, 4)} {rng.choice(_WORDS).capitalize()} and {rng.choice(_WORDS)} {section}"
+        section += 1
+        block = [heading, ""]
+        budget = section_bytes * (rng.choice((1, 1, 1, 4)))
+        written = 0
+        while written < budget:
+            kind = rng.random()
+            if kind < 0.5:
+                lines = [" ".join(_sentence(rng) for _ in range(rng.randint(3, 12)))]
+            elif kind < 0.8:
+                lines = [f"- {_sentence(rng, 4, 10)}" for _ in range(rng.randint(3, 8))]
+            else:
+                lines = [f"{i}. {_sentence(rng, 4, 12)}" for i in range(1, rng.randint(3, 7))]
+            lines.append("")
+            block.extend(lines)
+            written += sum(len(line) + 1 for line in lines)
+        parts.extend(block)
+        total += written + len(heading) + 2
+    return "\n".join(parts)
@@ -1,11 +1,28 @@
+import io
+import json
+import time
+import zipfile
+
+import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app import main
+from app.main import app, store
+from app.profiling import SlowJobProfiler
 
 
 client = TestClient(app)
 
 
+def _wait_for_status(job_id: str, statuses: set[str], timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        body = client.get(f"/v1/jobs/{job_id}").json()
+        if body["status"] in statuses or time.monotonic() > deadline:
+            return body
+        time.sleep(0.05)
+
+
 def test_end_to_end_job_pipeline_and_exports() -> None:
     create_resp = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv", "apkg"]})
     assert create_resp.status_code == 200
@@ -26,6 +43,7 @@ def test_end_to_end_job_pipeline_and_exports() -> None:
 
     start_resp = client.post(f"/v1/jobs/{job_id}/start")
     assert start_resp.status_code == 200
+    assert _wait_for_status(job_id, {"done", "failed"})["status"] == "done"
 
     chunks_resp = client.get(f"/v1/jobs/{job_id}/chunks")
     assert chunks_resp.status_code == 200
@@ -49,10 +67,22 @@ def test_end_to_end_job_pipeline_and_exports() -> None:
 
     download_csv_resp = client.get(f"/v1/exports/{export_csv_id}/download")
     assert download_csv_resp.status_code == 200
-    csv_payload = download_csv_resp.json()
-    assert csv_payload["filename"].endswith(".csv")
-    assert csv_payload["content_type"] == "text/csv"
-    assert "|" in csv_payload["content"]
+    assert download_csv_resp.headers["content-type"].startswith("text/csv")
+    assert download_csv_resp.headers["content-disposition"].endswith('.csv"')
+    assert download_csv_resp.headers["accept-ranges"] == "bytes"
+    csv_body = download_csv_resp.content
+    assert b"|" in csv_body
+
+    etag = download_csv_resp.headers["etag"]
+    assert client.get(f"/v1/exports/{export_csv_id}/download", headers={"If-None-Match": etag}).status_code == 304
+
+    resume_resp = client.get(f"/v1/exports/{export_csv_id}/download", headers={"Range": "bytes=5-", "If-Range": etag})
+    assert resume_resp.status_code == 206
+    assert resume_resp.headers["content-range"] == f"bytes 5-{len(csv_body) - 1}/{len(csv_body)}"
+    assert resume_resp.content == csv_body[5:]
+
+    reexport_resp = client.post(f"/v1/jobs/{job_id}/export", json={"format": "csv"})
+    assert reexport_resp.json()["export_id"] == export_csv_id
 
     export_apkg_resp = client.post(f"/v1/jobs/{job_id}/export", json={"format": "apkg"})
     assert export_apkg_resp.status_code == 200
@@ -60,9 +90,9 @@ def test_end_to_end_job_pipeline_and_exports() -> None:
 
     download_apkg_resp = client.get(f"/v1/exports/{export_apkg_id}/download")
     assert download_apkg_resp.status_code == 200
-    apkg_payload = download_apkg_resp.json()
-    assert apkg_payload["filename"].endswith(".apkg")
-    assert "DECK=" in apkg_payload["content"]
+    assert download_apkg_resp.headers["content-disposition"].endswith('.apkg"')
+    with zipfile.ZipFile(io.BytesIO(download_apkg_resp.content)) as package:
+        assert set(package.namelist()) == {"collection.anki2", "media"}
 
 
 def test_cannot_start_without_sources() -> None:
@@ -88,3 +118,229 @@ def test_source_type_validation() -> None:
 def test_download_missing_export() -> None:
     missing_resp = client.get("/v1/exports/exp_unknown/download")
     assert missing_resp.status_code == 404
+
+
+def test_cancel_requires_active_job() -> None:
+    create_resp = client.post("/v1/jobs", json={"course_name": "Biochem", "output_format": ["csv"]})
+    job_id = create_resp.json()["job_id"]
+
+    cancel_resp = client.post(f"/v1/jobs/{job_id}/cancel")
+    assert cancel_resp.status_code == 409
+
+
+def test_scheduler_metrics() -> None:
+    metrics_resp = client.get("/v1/scheduler/metrics")
+    assert metrics_resp.status_code == 200
+    body = metrics_resp.json()
+    assert body["queue_depth"] >= 0
+    assert body["max_workers"] >= 1
+
+
+def test_store_metrics() -> None:
+    client.post("/v1/jobs", json={"course_name": "Biochem", "output_format": ["csv"]})
+    body = client.get("/v1/store/metrics").json()
+    assert body["live_jobs"] >= 1
+    assert body["live_exports"] >= 0
+    assert body["resident_bytes"] >= 0
+
+
+def test_job_events_stream_until_the_job_finishes() -> None:
+    job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+    client.post(
+        f"/v1/jobs/{job_id}/sources",
+        data={"source_type": "text"},
+        files={"file": ("notes.txt", "# Antibiotics\nPenicillin inhibits cell wall synthesis\n", "text/plain")},
+    )
+    assert client.get("/v1/jobs/job_missing/events").status_code == 404
+
+    client.post(f"/v1/jobs/{job_id}/start")
+    with client.stream("GET", f"/v1/jobs/{job_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [json.loads(line[len("data: "):]) for line in response.iter_lines() if line.startswith("data: ")]
+
+    assert events[-1]["status"] == "done"
+    assert events[-1]["progress"] == 100
+    assert [event["progress"] for event in events] == sorted(event["progress"] for event in events)
+
+
+def test_chunk_pages_projection_and_revalidation() -> None:
+    job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+    notes = "".join(f"# Topic {i}\nPenicillin inhibits cell wall synthesis {i}\n" for i in range(5))
+    client.post(
+        f"/v1/jobs/{job_id}/sources", data={"source_type": "text"}, files={"file": ("notes.txt", notes, "text/plain")}
+    )
+    client.post(f"/v1/jobs/{job_id}/start")
+    assert _wait_for_status(job_id, {"done", "failed"})["status"] == "done"
+
+    topics, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "chunk_id,topic"} | ({"cursor": cursor} if cursor else {})
+        body = client.get(f"/v1/jobs/{job_id}/chunks", params=params).json()
+        assert all(set(chunk) == {"chunk_id", "topic"} for chunk in body["chunks"])
+        topics += [chunk["topic"] for chunk in body["chunks"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert topics == [f"Topic {i}" for i in range(5)]
+
+    first = client.get(f"/v1/jobs/{job_id}/preview", params={"limit": 1})
+    assert len(first.json()["cards"]) == 1
+    assert client.get(f"/v1/jobs/{job_id}/preview", params={"limit": 1}).content == first.content
+    revalidate = {"If-None-Match": first.headers["etag"]}
+    assert client.get(f"/v1/jobs/{job_id}/preview", params={"limit": 1}, headers=revalidate).status_code == 304
+    assert client.get(f"/v1/jobs/{job_id}/preview", params={"limit": 2}, headers=revalidate).status_code == 200
+
+    assert client.get(f"/v1/jobs/{job_id}/chunks", params={"fields": "text,bogus"}).status_code == 400
+    assert client.get(f"/v1/jobs/{job_id}/chunks", params={"cursor": "!!"}).status_code == 400
+    assert client.get(f"/v1/jobs/{job_id}/validation", params={"limit": 0}).status_code == 422
+
+
+def test_job_metrics_and_prometheus_endpoint() -> None:
+    job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+    client.post(
+        f"/v1/jobs/{job_id}/sources",
+        data={"source_type": "text"},
+        files={"file": ("notes.txt", "# Antibiotics\nPenicillin inhibits cell wall synthesis\n", "text/plain")},
+    )
+    client.post(f"/v1/jobs/{job_id}/start")
+    _wait_for_status(job_id, {"done"})
+
+    body = client.get(f"/v1/jobs/{job_id}/metrics").json()
+    stages = [stage["stage"] for stage in body["stages"]]
+    assert stages == ["parsing", "chunking", "generating", "validating", "storing"]
+    assert body["wall_ms"] == pytest.approx(sum(stage["wall_ms"] for stage in body["stages"]))
+    assert client.get("/v1/jobs/job_missing/metrics").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'mcq_stage_runs_total{stage="generating"}' in response.text
+    assert "process_resident_memory_bytes" in response.text
+    assert "mcq_scheduler_submitted_total" in response.text
+    assert "mcq_retention_sweep_errors_total 0.0" in response.text
+
+
+def test_job_profile_is_flagged_in_metrics_and_served_by_id(monkeypatch, tmp_path) -> None:
+    job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+    assert client.get(f"/v1/jobs/{job_id}/metrics").json()["profile_available"] is False
+    assert client.get(f"/v1/jobs/{job_id}/profile").status_code == 404
+
+    profiler = SlowJobProfiler(str(tmp_path), threshold_s=0, interval_s=0.001)
+    monkeypatch.setattr(main, "profiler", profiler)
+    with open(profiler.path_for(job_id), "w", encoding="utf-8") as handle:
+        handle.write("pipeline.py:run_job;chunking.py:chunk 12\n")
+
+    body = client.get(f"/v1/jobs/{job_id}/metrics").json()
+    assert body["profile_available"] is True and "profile_path" not in body
+    response = client.get(f"/v1/jobs/{job_id}/profile")
+    assert response.status_code == 200
+    assert response.text == "pipeline.py:run_job;chunking.py:chunk 12\n"
+    assert client.get("/v1/jobs/job_missing/profile").status_code == 404
+
+
+def test_identical_uploads_reuse_earlier_jobs_through_the_content_index() -> None:
+    notes = f"# Antifungals {time.time_ns()}\nFluconazole inhibits ergosterol synthesis\n"
+    job_ids = []
+    for _ in range(2):
+        job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+        files = {"file": ("notes.txt", notes, "text/plain")}
+        client.post(f"/v1/jobs/{job_id}/sources", data={"source_type": "text"}, files=files)
+        client.post(f"/v1/jobs/{job_id}/start")
+        _wait_for_status(job_id, {"done"})
+        job_ids.append(job_id)
+
+    first, second = (client.get(f"/v1/jobs/{job_id}/metrics").json()["reuse"] for job_id in job_ids)
+    assert first["segmentation_reused"] is False and first["chunks_reused"] == 0
+    assert second["segmentation_reused"] is True
+    assert second["reuse_ratio"] == 1.0
+    assert client.get(f"/v1/jobs/{job_ids[1]}/preview").json()["cards"] == (
+        client.get(f"/v1/jobs/{job_ids[0]}/preview").json()["cards"]
+    )
+    fleet = client.get("/v1/content-index/metrics").json()
+    assert fleet["chunks_reused"] >= 1 and fleet["segmentations_reused"] >= 1
+    assert "mcq_content_index_chunks_reused_total" in client.get("/metrics").text
+
+
+def test_batch_create_start_and_status() -> None:
+    manifest = {
+        "jobs": [
+            {"course_name": "Pharma", "sources": [{"filename": "handout.txt"}, {"filename": "week1.txt"}]},
+            {"course_name": "Pharma B", "tenant_id": "tenant-b", "sources": [{"filename": "handout.txt"}]},
+            {"course_name": "Empty"},
+        ],
+        "start": True,
+    }
+    files = [
+        ("files", ("handout.txt", "# Antibiotics\nPenicillin inhibits cell wall synthesis\n", "text/plain")),
+        ("files", ("week1.txt", "# Analgesics\nIbuprofen reduces inflammation\n", "text/plain")),
+    ]
+    response = client.post("/v1/batches", data={"manifest": json.dumps(manifest)}, files=files)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 3
+    assert [job["source_count"] for job in body["jobs"]] == [2, 1, 0]
+    assert body["jobs"][2]["detail"] == "at least one source is required"
+
+    for job in body["jobs"][:2]:
+        assert _wait_for_status(job["job_id"], {"done"})["status"] == "done"
+    status = client.get(f"/v1/batches/{body['batch_id']}").json()
+    assert status["status_counts"] == {"done": 2, "queued": 1}
+    assert not status["finished"]
+
+    restarted = client.post(f"/v1/batches/{body['batch_id']}/start").json()
+    assert [job["detail"] for job in restarted["jobs"]][2] == "at least one source is required"
+    assert client.get("/v1/batches/batch_missing").status_code == 404
+
+    missing = client.post("/v1/batches", data={"manifest": json.dumps(manifest)}, files=files[:1])
+    assert missing.status_code == 400
+    invalid = client.post("/v1/batches", data={"manifest": json.dumps({"jobs": []})})
+    assert invalid.status_code == 422
+
+
+def test_batch_from_an_archive_makes_one_job_per_folder() -> None:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        bundle.writestr("Pharma/week1.txt", "# Antibiotics\nPenicillin inhibits cell wall synthesis\n")
+        bundle.writestr("Pharma/week2.txt", "# Analgesics\nIbuprofen reduces inflammation\n")
+        bundle.writestr("Anatomy/bones.txt", "# Skeleton\nThe femur is the longest bone\n")
+        bundle.writestr("syllabus.txt", "# Course\nWeekly quizzes\n")
+
+    response = client.post(
+        "/v1/batches",
+        files={"archive": ("term.zip", buffer.getvalue(), "application/zip")},
+        data={"start": "true"},
+    )
+    assert response.status_code == 200
+    jobs = response.json()["jobs"]
+    assert [(job["course_name"], job["source_count"]) for job in jobs] == [("Pharma", 2), ("Anatomy", 1), ("term", 1)]
+    for job in jobs:
+        assert _wait_for_status(job["job_id"], {"done"})["status"] == "done"
+    chunks = client.get(f"/v1/jobs/{jobs[0]['job_id']}/chunks").json()["chunks"]
+    assert [chunk["topic"] for chunk in chunks] == ["Antibiotics", "Analgesics"]
+
+    bad = client.post("/v1/batches", files={"archive": ("term.zip", b"not a zip", "application/zip")})
+    assert bad.status_code == 400
+
+
+def test_job_expiring_mid_request_is_not_found(monkeypatch) -> None:
+    job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+    # the handler's own lookup still sees the job; the sweeper drops it before the store write
+    stale = store.get_job(job_id)
+    monkeypatch.setattr(store, "get_job", lambda _: stale)
+    resp = client.post(
+        "/v1/jobs/job_gone/sources",
+        data={"source_type": "text"},
+        files={"file": ("notes.txt", "# Antibiotics\nPenicillin\n", "text/plain")},
+    )
+
+    assert resp.status_code == 404
+    assert resp.json() == {"detail": "job not found"}
+
+
+def test_events_for_a_job_expiring_before_the_stream_starts_end_cleanly(monkeypatch) -> None:
+    job_id = client.post("/v1/jobs", json={"course_name": "Pharma", "output_format": ["csv"]}).json()["job_id"]
+    lookups = iter([store.get_job(job_id)])
+    monkeypatch.setattr(store, "get_job", lambda _: next(lookups, None))
+
+    with client.stream("GET", f"/v1/jobs/{job_id}/events") as response:
+        assert response.status_code == 200
+        assert list(response.iter_lines()) == []
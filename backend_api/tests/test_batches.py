@@ -0,0 +1,45 @@
+import io
+import zipfile
+
+import pytest
+
+from app.batches import BatchError, spool_archive
+from app.ingest import UploadTooLargeError
+
+
+def _archive(members: dict[str, bytes]) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for name, data in members.items():
+            bundle.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def _spool(members: dict[str, bytes], spool_dir, *, max_total_bytes: int = 10_000, max_members: int = 10):
+    return spool_archive(
+        _archive(members),
+        set(members),
+        str(spool_dir),
+        max_bytes=500,
+        max_total_bytes=max_total_bytes,
+        max_members=max_members,
+    )
+
+
+def test_archive_is_held_to_a_total_decompressed_budget(tmp_path) -> None:
+    members = {f"Pharma/week{i}.txt": b"x" * 400 for i in range(3)}
+
+    spooled = _spool(members, tmp_path, max_total_bytes=1200)
+    assert sum(upload.size_bytes for upload in spooled.values()) == 1200
+
+    with pytest.raises(UploadTooLargeError, match="archive decompresses"):
+        _spool(members, tmp_path / "over", max_total_bytes=1000)
+    assert list((tmp_path / "over").iterdir()) == []
+
+
+def test_archive_with_too_many_members_is_rejected(tmp_path) -> None:
+    members = {f"Pharma/week{i}.txt": b"notes" for i in range(3)}
+
+    with pytest.raises(BatchError, match="at most 2 files"):
+        _spool(members, tmp_path, max_members=2)
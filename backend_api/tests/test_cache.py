@@ -0,0 +1,103 @@
+import threading
+
+from app.cache import CacheStats, CardCache, card_cache_key
+from app.generation import FakeSlowGenerator, GenerationStage, create_cards_from_chunk
+from app.records import ChunkData
+
+
+def _chunk(chunk_id: str, text: str = "Penicillin inhibits transpeptidase") -> ChunkData:
+    return ChunkData(chunk_id=chunk_id, topic="Antibiotics", subtopic="default", token_estimate=1, text=text)
+
+
+def _key(chunk: ChunkData) -> str:
+    return card_cache_key(chunk, course_name="Pharma", generator_name="heuristic", prompt_version="1")
+
+
+def test_lru_evicts_oldest_entry() -> None:
+    cache = CardCache(max_entries=2)
+    chunks = [_chunk(f"chk_{i}", text=f"Term{i} alpha beta") for i in range(3)]
+    for chunk in chunks:
+        cache.put(_key(chunk), chunk.chunk_id, create_cards_from_chunk(chunk))
+
+    assert cache.get(_key(chunks[0]), "chk_0") is None
+    assert cache.get(_key(chunks[2]), "chk_2") is not None
+    assert cache.evictions == 1
+
+
+def test_disk_tier_serves_after_restart_and_reanchors(tmp_path) -> None:
+    chunk = _chunk("chk_old")
+    CardCache(disk_dir=str(tmp_path)).put(_key(chunk), chunk.chunk_id, create_cards_from_chunk(chunk))
+
+    cards = CardCache(disk_dir=str(tmp_path)).get(_key(chunk), "chk_new")
+
+    assert cards is not None
+    assert cards[0].extra.endswith("Source Anchor: chk_new")
+
+
+def test_regenerating_unchanged_chunks_skips_the_generator() -> None:
+    generator = FakeSlowGenerator(latency_s=0)
+    stage = GenerationStage(generator=generator, cache=CardCache())
+    chunks = [_chunk(f"chk_{i}", text=f"Term{i} alpha beta") for i in range(4)]
+    stage.run_by_chunk(chunks, course_name="Pharma")
+
+    stats = CacheStats()
+    edited = chunks[:3] + [_chunk("chk_9", text="Edited slide text")]
+    stage.run_by_chunk(edited, course_name="Pharma", cache_stats=stats)
+
+    assert (stats.hits, stats.misses) == (3, 1)
+    assert generator.calls == 5
+
+
+def test_concurrent_writers_of_one_key_do_not_collide(tmp_path) -> None:
+    chunk = _chunk("chk_0")
+    cache = CardCache(disk_dir=str(tmp_path))
+    cards = create_cards_from_chunk(chunk)
+    barrier = threading.Barrier(8)
+    errors: list[BaseException] = []
+
+    def write() -> None:
+        barrier.wait()
+        try:
+            for _ in range(20):
+                cache.put(_key(chunk), chunk.chunk_id, cards)
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert CardCache(disk_dir=str(tmp_path)).get(_key(chunk), "chk_0") == cards
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_corrupt_disk_entry_is_dropped_and_counted_as_a_miss(tmp_path) -> None:
+    chunk = _chunk("chk_0")
+    CardCache(disk_dir=str(tmp_path)).put(_key(chunk), chunk.chunk_id, create_cards_from_chunk(chunk))
+    (path,) = tmp_path.rglob("*.json")
+    path.write_text(path.read_text()[:40])
+    cache = CardCache(disk_dir=str(tmp_path))
+
+    assert cache.get(_key(chunk), "chk_0") is None
+    assert (cache.stats.hits, cache.stats.misses) == (0, 1)
+    assert not path.exists()
+
+
+def test_disk_tier_evicts_least_recently_used_files_over_budget(tmp_path) -> None:
+    chunks = [_chunk(f"chk_{i}", text=f"Term{i} alpha beta") for i in range(4)]
+    cache = CardCache(max_entries=1, disk_dir=str(tmp_path))
+    cache.put(_key(chunks[0]), "chk_0", create_cards_from_chunk(chunks[0]))
+    entry_bytes = cache.disk_bytes
+
+    cache = CardCache(max_entries=1, disk_dir=str(tmp_path), max_disk_bytes=int(entry_bytes * 2.5))
+    assert cache.disk_bytes == entry_bytes
+    cache.put(_key(chunks[1]), "chk_1", create_cards_from_chunk(chunks[1]))
+    assert cache.get(_key(chunks[0]), "chk_0") is not None
+    cache.put(_key(chunks[2]), "chk_2", create_cards_from_chunk(chunks[2]))
+
+    assert cache.disk_evictions == 1
+    assert sorted(path.stem for path in tmp_path.rglob("*.json")) == sorted([_key(chunks[0]), _key(chunks[2])])
+    assert cache.disk_bytes <= entry_bytes * 2.5
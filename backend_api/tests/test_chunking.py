@@ -0,0 +1,132 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from app.chunking import build_chunks, iter_chunks
+from app.ingest import spool_text
+from app.pipeline import extract_topics
+from app.segmentation import (
+    ParallelSegmentation,
+    segment_changed_topics,
+    segment_changed_topics_parallel,
+    segment_sources,
+)
+from app.schemas import SourceType
+from app.store import SourceRecord, new_source_record
+
+
+def test_splits_when_next_line_exceeds_max() -> None:
+    sections = {"Antibiotics": ["a" * 40, "b" * 40, "c" * 40, "d" * 8]}
+
+    chunks = build_chunks(sections, target_min_tokens=5, target_max_tokens=15)
+
+    assert [c.text for c in chunks] == ["a" * 40, "b" * 40, f"{'c' * 40}\n{'d' * 8}"]
+    assert [c.token_estimate for c in chunks] == [10, 10, 12]
+
+
+def test_merges_chunks_below_min_into_the_next() -> None:
+    sections = {"Antibiotics": ["a" * 40, "b" * 40, "c" * 40, "d" * 8]}
+
+    chunks = build_chunks(sections, target_min_tokens=11, target_max_tokens=15)
+
+    assert [c.text for c in chunks] == [f"{'a' * 40}\n{'b' * 40}", f"{'c' * 40}\n{'d' * 8}"]
+    assert [c.token_estimate for c in chunks] == [20, 12]
+
+
+def test_undersized_chunks_merge_within_topic_only() -> None:
+    sections = {"A": ["x" * 8, "y" * 8], "B": ["z" * 8]}
+
+    chunks = build_chunks(sections, target_min_tokens=100, target_max_tokens=3)
+
+    assert [(c.topic, c.text) for c in chunks] == [("A", f"{'x' * 8}\n{'y' * 8}"), ("B", "z" * 8)]
+
+
+def test_iter_chunks_is_lazy() -> None:
+    sections = {"A": ["x" * 40] * 3}
+
+    stream = iter_chunks(sections, target_min_tokens=1, target_max_tokens=10)
+
+    assert next(stream).text == "x" * 40
+
+
+def test_segment_sources_matches_merged_text_and_records_offsets(tmp_path) -> None:
+    texts = [
+        "# Antibiotics\r\n  Penicillin inhibits cell wall synthesis\r\n\r\nVancomycin binds D-Ala-D-Ala",
+        "Macrolides block the 50S subunit\n# Analgesics\nIbuprofen reduces inflammation\n",
+    ]
+    sources = [
+        new_source_record(SourceType.TEXT, f"notes{i}.txt", spool_text(text, str(tmp_path)))
+        for i, text in enumerate(texts)
+    ]
+
+    chunks = segment_sources(sources)
+
+    legacy = build_chunks(extract_topics("\n".join(texts)))
+    assert [(c.topic, c.text) for c in chunks] == [(c.topic, c.text) for c in legacy]
+    antibiotics = chunks[0]
+    assert [ref.source_id for ref in antibiotics.source_refs] == [sources[0].source_id, sources[1].source_id]
+    first, second = antibiotics.source_refs
+    assert texts[0][first.start_char : first.end_char].startswith("Penicillin")
+    assert texts[0][first.start_char : first.end_char].endswith("D-Ala-D-Ala")
+    assert texts[1][second.start_char : second.end_char] == "Macrolides block the 50S subunit"
+
+
+def test_chunk_ids_follow_content_not_upload(tmp_path) -> None:
+    text = "# Antibiotics\nPenicillin inhibits cell wall synthesis\n# Analgesics\nIbuprofen reduces inflammation\n"
+
+    def upload(name: str) -> list[str]:
+        source = new_source_record(SourceType.TEXT, name, spool_text(text, str(tmp_path)))
+        return [chunk.chunk_id for chunk in segment_sources([source])]
+
+    first = upload("week1.txt")
+    assert upload("copy.txt") == first
+    assert len(set(first)) == 2
+    assert all(chunk_id.startswith("chk_") for chunk_id in first)
+
+    edited = new_source_record(
+        SourceType.TEXT, "week1.txt", spool_text(text.replace("Ibuprofen", "Naproxen"), str(tmp_path))
+    )
+    assert [chunk.chunk_id for chunk in segment_sources([edited])] != first
+
+
+def test_identical_chunks_get_distinct_ids() -> None:
+    chunks = build_chunks({"General": ["same"] * 4}, target_min_tokens=1, target_max_tokens=1)
+    assert [chunk.text for chunk in chunks] == ["same"] * 4
+    assert chunks[1].chunk_id == f"{chunks[0].chunk_id}_2"
+    assert len({chunk.chunk_id for chunk in chunks}) == 4
+
+
+def _inline(fn, arg_tuples):
+    return [fn(*args) for args in arg_tuples]
+
+
+def test_parallel_segmentation_matches_sequential(tmp_path) -> None:
+    texts = [
+        "Intro line before any heading\n"
+        "# Antibiotics\r\n  Pénicilline inhibe la paroi\r\n\r\nVancomycin binds\rD-Ala\n",
+        "Macrolides block the 50S subunit\n# Analgesics\nIbuprofen — reduces inflammation\n\n" * 5,
+        "# Antibiotics\nTetracyclines bind 30S\nDosing:\nTwice daily with water",
+    ]
+    sources = [
+        new_source_record(SourceType.TEXT, f"notes{i}.txt", spool_text(text, str(tmp_path)))
+        for i, text in enumerate(texts)
+    ]
+    sources.insert(1, SourceRecord("src_scan", SourceType.PDF, "scan.pdf", "", 10, False, "0" * 64))
+    expected = segment_changed_topics(sources, {})
+    parallel = ParallelSegmentation(workers=2)
+
+    for range_bytes in (1, 7, 64, 1 << 20):
+        result = segment_changed_topics_parallel(
+            sources, {}, map_tasks=_inline, parallel=parallel, range_bytes=range_bytes
+        )
+        assert result == expected
+
+    reusable = {"Analgesics": expected[0]["Analgesics"], "Dosing": "stale"}
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        fingerprints, rebuilt = segment_changed_topics_parallel(
+            sources,
+            reusable,
+            map_tasks=lambda fn, arg_tuples: [pool.submit(fn, *args).result() for args in arg_tuples],
+            parallel=parallel,
+            range_bytes=16,
+        )
+    assert fingerprints == expected[0]
+    assert rebuilt == {topic: chunks for topic, chunks in expected[1].items() if topic != "Analgesics"}
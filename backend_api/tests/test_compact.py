@@ -0,0 +1,50 @@
+from dataclasses import asdict
+
+from app import fastjson
+from app.compact import pack_results
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.records import CardData
+from app.schemas import OutputFormat, SourceType
+from app.segmentation import segment_sources
+from app.store import CardRecord, InMemoryStore, new_source_record
+
+
+def test_packed_results_round_trip_without_copying_chunk_text(tmp_path) -> None:
+    notes = "# Pharmakologie\r\nPénicilline hemmt  Zellwand ✓\r\n\r\n   Ibuprofen 炎症\r\n# Analgesics:\nAspirin\n"
+    sources = [new_source_record(SourceType.TEXT, "notes.txt", spool_text(notes, str(tmp_path)))]
+    chunks = segment_sources(sources)
+    card = CardData(question="Qué?", multiple_choice=list("abcdef"), correct_answers=["a"], extra="x")
+    # failed cards need not satisfy the API model: they are read back without validating them
+    short = CardData(question="Qué?", multiple_choice=["a", "b"], correct_answers=["a"], extra="x")
+    records = [CardRecord(chunks[0].chunk_id, card), CardRecord(chunks[1].chunk_id, short, reason="duplicate ✓")]
+
+    packed = pack_results(chunks, records, sources)
+
+    assert packed.chunks.texts == {}
+    assert packed.chunks.unpack() == chunks
+    assert packed.chunks.unpack([1]) == chunks[1:]
+    assert [CardRecord(*record) for record in packed.cards.records()] == records
+    assert fastjson.loads(packed.cards.cards_json(packed.cards.passed)) == [card.to_model().model_dump()]
+    failed = [{"reason": "duplicate ✓", "card": asdict(short)}]
+    assert fastjson.loads(packed.cards.failed_json([0])) == failed
+
+
+def test_finished_jobs_spill_over_the_memory_budget_and_load_back(tmp_path) -> None:
+    store = InMemoryStore(memory_budget_bytes=1, spill_dir=str(tmp_path / "spill"))
+    jobs = []
+    for topic in ("Antibiotics", "Analgesics"):
+        job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+        spooled = spool_text(f"# {topic}\nPenicillin inhibits cell wall synthesis\n", str(tmp_path))
+        store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+        run_job(store, job.job_id)
+        jobs.append(job.job_id)
+
+    first, second = (store.get_job(job_id) for job_id in jobs)
+    assert first.packed is None and first.spill_path is not None
+    assert second.packed is not None
+
+    assert [chunk.topic for chunk in store.get_chunks(jobs[0])] == ["Antibiotics"]
+    assert store.get_job(jobs[0]).packed is not None
+    assert store.get_job(jobs[1]).packed is None
+    assert len(store.get_cards(jobs[1])) == store.get_job(jobs[1]).validation_summary.passed
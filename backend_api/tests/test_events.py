@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+from app.events import ProgressBroker, ProgressEvent
+from app.schemas import JobStatus, OutputFormat
+from app.store import InMemoryStore
+
+
+def test_watchers_get_the_latest_event_published_from_another_thread() -> None:
+    broker = ProgressBroker()
+
+    async def watch() -> list[ProgressEvent]:
+        with broker.subscribe("job_1") as first, broker.subscribe("job_1") as second:
+            assert broker.watchers("job_1") == 2
+            assert await first.next(timeout=0.01) is None
+
+            def publish() -> None:
+                for progress in (10, 20, 30):
+                    broker.publish(ProgressEvent("job_1", JobStatus.GENERATING, progress, "card generation"))
+
+            thread = threading.Thread(target=publish)
+            thread.start()
+            thread.join()
+            return [await first.next(timeout=1), await second.next(timeout=1)]
+
+    events = asyncio.run(watch())
+    assert [event.progress for event in events] == [30, 30]
+    assert broker.watchers("job_1") == 0
+
+
+def test_store_publishes_status_changes() -> None:
+    broker = ProgressBroker()
+    store = InMemoryStore(events=broker)
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+
+    async def watch() -> ProgressEvent | None:
+        with broker.subscribe(job.job_id) as subscription:
+            store.mark_failed(job.job_id, "boom")
+            return await subscription.next(timeout=1)
+
+    event = asyncio.run(watch())
+    assert event == ProgressEvent(job.job_id, JobStatus.FAILED, 0, "failed: boom")
+    assert event.terminal
+    assert event.sse_message.startswith("event: progress\ndata: {")
+
+
+def test_batched_progress_updates_wake_every_watcher() -> None:
+    broker = ProgressBroker()
+    store = InMemoryStore(events=broker)
+    job_ids = [store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV]).job_id for _ in range(3)]
+
+    async def watch() -> list[ProgressEvent | None]:
+        with broker.subscribe(job_ids[0]) as first, broker.subscribe(job_ids[2]) as third:
+            waiting = [asyncio.create_task(first.next(timeout=1)), asyncio.create_task(third.next(timeout=1))]
+            await asyncio.sleep(0)
+            thread = threading.Thread(
+                target=store.update_progress_many,
+                args=(job_ids,),
+                kwargs={"status": JobStatus.QUEUED, "progress": 0, "current_step": "waiting for worker"},
+            )
+            thread.start()
+            thread.join()
+            return list(await asyncio.gather(*waiting))
+
+    events = asyncio.run(watch())
+    assert [event.job_id for event in events] == [job_ids[0], job_ids[2]]
+    assert all(event.current_step == "waiting for worker" for event in events)
+    assert store.get_job(job_ids[1]).current_step == "waiting for worker"
@@ -0,0 +1,94 @@
+import sqlite3
+import zipfile
+from dataclasses import replace
+
+import pytest
+
+from app.apkg import note_guid, write_apkg
+from app.downloads import RangeNotSatisfiable, parse_range
+from app.exporters import iter_pipe_csv, write_export
+from app.records import CardData
+
+
+def _card(question: str) -> CardData:
+    return CardData(question=question, multiple_choice=list("ABCDEF"), correct_answers=["A"], extra="Extra")
+
+
+def test_write_export_streams_rows_to_disk(tmp_path) -> None:
+    cards = [_card("Q1"), _card("Q2")]
+
+    written = write_export(iter_pipe_csv(cards), str(tmp_path), suffix=".csv")
+
+    expected = "Q1|A<br>B<br>C<br>D<br>E<br>F|A|Extra\nQ2|A<br>B<br>C<br>D<br>E<br>F|A|Extra"
+    with open(written.path, encoding="utf-8") as handle:
+        assert handle.read() == expected
+    assert written.size_bytes == len(expected)
+    assert written.etag.startswith('"') and written.etag.endswith('"')
+    assert [p.suffix for p in tmp_path.iterdir()] == [".csv"]
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=95-200", (95, 99)),
+        ("bytes=0-1,5-6", None),
+        ("items=0-1", None),
+        ("bytes=abc", None),
+    ],
+)
+def test_parse_range(header: str, expected: tuple[int, int] | None) -> None:
+    assert parse_range(header, 100) == expected
+
+
+def test_parse_range_past_end_is_unsatisfiable() -> None:
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def _apkg_notes(path: str, tmp_path) -> dict[str, str]:
+    with zipfile.ZipFile(path) as package:
+        package.extract("collection.anki2", tmp_path / "unpacked")
+    conn = sqlite3.connect(tmp_path / "unpacked" / "collection.anki2")
+    try:
+        (card_count,) = conn.execute("SELECT count(*) FROM cards").fetchone()
+        assert card_count == conn.execute("SELECT count(*) FROM notes").fetchone()[0]
+        return dict(conn.execute("SELECT guid, flds FROM notes"))
+    finally:
+        conn.close()
+
+
+def test_apkg_reexport_only_writes_the_delta(tmp_path) -> None:
+    collection = str(tmp_path / "collections" / "job.anki2")
+    first = [_card("Q1"), _card("Q2"), _card("Q3")]
+
+    written, delta = write_apkg(first, str(tmp_path), deck_name="Pharma::Default", collection_path=collection)
+    assert (delta.inserted, delta.updated, delta.deleted, delta.unchanged) == (3, 0, 0, 0)
+    assert set(_apkg_notes(written.path, tmp_path)) == {note_guid(card) for card in first}
+
+    reworded = replace(_card("Q2"), extra="New rationale")
+    second = [first[0], reworded, _card("Q4")]
+    written, delta = write_apkg(second, str(tmp_path), deck_name="Pharma::Default", collection_path=collection)
+
+    assert (delta.inserted, delta.updated, delta.deleted, delta.unchanged) == (1, 1, 1, 1)
+    notes = _apkg_notes(written.path, tmp_path)
+    assert set(notes) == {note_guid(card) for card in second}
+    assert notes[note_guid(reworded)].endswith("\x1fNew rationale")
+
+
+def test_apkg_numbers_new_cards_by_inserted_notes_only(tmp_path) -> None:
+    collection = str(tmp_path / "collections" / "job.anki2")
+    first = [_card("Q1"), _card("Q1"), _card("Q2")]
+    write_apkg(first, str(tmp_path), deck_name="Pharma::Default", collection_path=collection)
+    second = first + [_card("Q2"), _card("Q3")]
+    write_apkg(second, str(tmp_path), deck_name="Pharma::Default", collection_path=collection)
+
+    conn = sqlite3.connect(collection)
+    try:
+        due = dict(conn.execute("SELECT notes.sfld, cards.due FROM cards JOIN notes ON notes.id = cards.nid"))
+    finally:
+        conn.close()
+    # the duplicate Q1 and the kept Q1/Q2 leave no gaps
+    assert due == {"Q1": 0, "Q2": 1, "Q3": 2}
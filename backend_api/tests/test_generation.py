@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.generation import (
+    ChunkGenerationError,
+    GenerationStage,
+    RetryPolicy,
+    TransientGenerationError,
+    create_cards_from_chunk,
+)
+from app.records import CardData, ChunkData
+
+
+def _chunks(n: int) -> list[ChunkData]:
+    return [
+        ChunkData(
+            chunk_id=f"chk_{i}", topic=f"Topic {i}", subtopic="default", token_estimate=1, text=f"Term{i} alpha beta"
+        )
+        for i in range(n)
+    ]
+
+
+class _FlakyGenerator:
+    name = "flaky"
+
+    def __init__(self, failures_per_chunk: int, delay_s: float = 0.0) -> None:
+        self.failures_per_chunk = failures_per_chunk
+        self.delay_s = delay_s
+        self.attempts: dict[str, int] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate(self, chunk: ChunkData, *, course_name: str) -> list[CardData]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # later chunks finish first, so ordering has to be restored by the stage
+            await asyncio.sleep(self.delay_s / (1 + int(chunk.chunk_id.split("_")[1])))
+            self.attempts[chunk.chunk_id] = self.attempts.get(chunk.chunk_id, 0) + 1
+            if self.attempts[chunk.chunk_id] <= self.failures_per_chunk:
+                raise TransientGenerationError(chunk.chunk_id)
+            return create_cards_from_chunk(chunk)
+        finally:
+            self.in_flight -= 1
+
+
+def test_concurrency_cap_order_and_progress() -> None:
+    generator = _FlakyGenerator(failures_per_chunk=0, delay_s=0.02)
+    stage = GenerationStage(generator=generator, concurrency=3)
+    progress: list[tuple[int, int]] = []
+
+    by_chunk = stage.run_by_chunk(
+        _chunks(10), course_name="Pharma", on_progress=lambda done, total: progress.append((done, total))
+    )
+
+    assert generator.max_in_flight == 3
+    assert [[card.question for card in cards] for cards in by_chunk] == [
+        [f"High-yield term associated with Topic {i}"] for i in range(10)
+    ]
+    assert progress[-1] == (10, 10)
+    assert len(progress) == 10
+
+
+def test_retries_transient_failures_per_chunk() -> None:
+    generator = _FlakyGenerator(failures_per_chunk=2)
+    stage = GenerationStage(generator=generator, retry=RetryPolicy(max_attempts=3, base_delay_s=0.001))
+
+    by_chunk = stage.run_by_chunk(_chunks(4), course_name="Pharma")
+
+    assert [len(cards) for cards in by_chunk] == [1, 1, 1, 1]
+    assert set(generator.attempts.values()) == {3}
+
+
+def test_exhausted_retries_fail_with_chunk_id() -> None:
+    stage = GenerationStage(
+        generator=_FlakyGenerator(failures_per_chunk=5), retry=RetryPolicy(max_attempts=2, base_delay_s=0.001)
+    )
+
+    with pytest.raises(ChunkGenerationError, match="chk_0 after 2 attempts"):
+        stage.run_by_chunk(_chunks(1), course_name="Pharma")
@@ -0,0 +1,62 @@
+import asyncio
+import io
+import threading
+
+import pytest
+from fastapi import UploadFile
+
+from app import ingest
+from app.ingest import UploadTooLargeError, spool_text, spool_upload
+from app.schemas import SourceType
+from app.store import new_source_record
+
+
+def _spool(data: bytes, tmp_path, **kwargs):
+    upload = UploadFile(file=io.BytesIO(data), filename="notes.txt")
+    return asyncio.run(spool_upload(upload, str(tmp_path), **kwargs))
+
+
+def test_multibyte_text_split_across_blocks_stays_text(tmp_path) -> None:
+    data = "Überblick: β-Lactam antibiotics".encode("utf-8")
+
+    spooled = _spool(data, tmp_path, max_bytes=1024, block_size=1)
+
+    assert spooled.is_text
+    assert spooled.size_bytes == len(data)
+
+
+def test_invalid_utf8_is_spooled_as_binary(tmp_path) -> None:
+    spooled = _spool(b"%PDF-1.7\xff\xfe", tmp_path, max_bytes=1024)
+    source = new_source_record(SourceType.PDF, "slides.pdf", spooled)
+
+    assert not spooled.is_text
+    assert list(source.iter_lines()) == ["Binary source (slides.pdf) uploaded. OCR pipeline pending."]
+
+
+def test_size_limit_aborts_and_removes_partial_file(tmp_path) -> None:
+    with pytest.raises(UploadTooLargeError):
+        _spool(b"x" * 100, tmp_path, max_bytes=10, block_size=4)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spool_file_is_written_off_the_event_loop_thread(tmp_path, monkeypatch) -> None:
+    writers: set[int] = set()
+    write = ingest._Spooler.write
+
+    def recording(self, block: bytes) -> None:
+        writers.add(threading.get_ident())
+        write(self, block)
+
+    monkeypatch.setattr(ingest._Spooler, "write", recording)
+    spooled = _spool(b"x" * 100, tmp_path, max_bytes=1024, block_size=10)
+
+    assert spooled.size_bytes == 100
+    assert writers and threading.get_ident() not in writers
+
+
+def test_iter_lines_matches_splitlines(tmp_path) -> None:
+    text = "# Topic\r\nline one\rline two\x0cline three \n\nlast"
+    source = new_source_record(SourceType.TEXT, "notes.txt", spool_text(text, str(tmp_path)))
+
+    assert list(source.iter_lines()) == text.splitlines()
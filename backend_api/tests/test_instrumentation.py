@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.instrumentation import JobSpans, prometheus_text
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.profiling import SlowJobProfiler
+from app.schemas import OutputFormat, SourceType
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore
+
+
+NOTES = (
+    "# Antibiotics\nPenicillin inhibits cell wall synthesis\n"
+    "# Antivirals\nAcyclovir inhibits viral DNA polymerase\n"
+)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_run_job_records_a_span_per_stage(tmp_path, backend) -> None:
+    store = InMemoryStore() if backend == "memory" else SQLiteStore(str(tmp_path / "jobs.db"))
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+    spooled = spool_text(NOTES, str(tmp_path))
+    store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        run_job(store, job.job_id, executor=executor)
+
+    spans = {span.stage: span for span in store.get_job(job.job_id).stage_spans}
+    assert list(spans) == ["parsing", "chunking", "generating", "validating", "storing"]
+    assert spans["parsing"].bytes_out == len(NOTES)
+    assert spans["chunking"].items_out == spans["generating"].items_in == 2
+    assert spans["validating"].items_in == spans["generating"].items_out > 0
+    assert spans["storing"].items_in == spans["validating"].items_in
+    assert all(span.wall_ms >= 0 and span.cpu_ms >= 0 for span in spans.values())
+
+
+def test_failed_stage_still_leaves_its_span() -> None:
+    recorded = []
+    spans = JobSpans(on_record=recorded.append)
+    with pytest.raises(RuntimeError):
+        with spans.stage("parsing") as span:
+            span.items_in = 3
+            raise RuntimeError("boom")
+
+    assert [span.stage for span in recorded[-1]] == ["parsing"]
+    assert recorded[-1][0].items_in == 3
+
+
+def test_prometheus_text_escapes_label_values() -> None:
+    text = prometheus_text([("mcq_runs_total", "counter", "Runs.", [({"stage": 'a"b\n'}, 2)])])
+    assert text == '# HELP mcq_runs_total Runs.\n# TYPE mcq_runs_total counter\nmcq_runs_total{stage="a\\"b\\n"} 2.0\n'
+
+
+def test_slow_jobs_leave_a_folded_profile(tmp_path) -> None:
+    store = InMemoryStore()
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+    store.add_source(
+        job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spool_text(NOTES * 200, str(tmp_path))
+    )
+    profiler = SlowJobProfiler(str(tmp_path / "profiles"), threshold_s=0, interval_s=0.001)
+    fast = SlowJobProfiler(str(tmp_path / "fast"), threshold_s=60, interval_s=0.001)
+
+    run_job(store, job.job_id, profiler=profiler)
+    run_job(store, job.job_id, profiler=fast)
+
+    path = profiler.existing_profile(job.job_id)
+    assert path is not None
+    with open(path, encoding="utf-8") as handle:
+        lines = handle.read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("pipeline.py:run_job" in line for line in lines)
+    assert fast.existing_profile(job.job_id) is None
@@ -0,0 +1,32 @@
+import pytest
+
+from app.pages import RenderedPages, StaleCursor, decode_cursor, encode_cursor, parse_fields
+from app.schemas import Chunk
+
+
+def test_cursor_round_trip_and_staleness() -> None:
+    cursor = encode_cursor(3, 199)
+    assert decode_cursor(cursor, 3) == 199
+    with pytest.raises(StaleCursor):
+        decode_cursor(cursor, 4)
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor", 3)
+
+
+def test_fields_come_back_in_model_order() -> None:
+    assert parse_fields("topic, chunk_id", Chunk) == ("chunk_id", "topic")
+    assert parse_fields(None, Chunk) is None
+    with pytest.raises(ValueError):
+        parse_fields("topic,bogus", Chunk)
+
+
+def test_rendered_pages_evict_least_recently_used() -> None:
+    pages = RenderedPages(max_bytes=10)
+    pages.put('"a"', b"1234")
+    pages.put('"b"', b"1234")
+    assert pages.get('"a"') == b"1234"
+    pages.put('"c"', b"1234")
+    assert pages.get('"b"') is None
+    assert pages.get('"a"') == pages.get('"c"') == b"1234"
+    pages.put('"huge"', b"x" * 11)
+    assert pages.get('"huge"') is None
@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.retention import RetentionPolicy, RetentionSweeper
+from app.schemas import JobStatus, OutputFormat, SourceType
+from app.store import InMemoryStore, JobNotFoundError
+
+
+def _finished_job(store: InMemoryStore, tmp_path) -> str:
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+    spooled = spool_text("# Antibiotics\nPenicillin inhibits cell wall synthesis\n", str(tmp_path))
+    store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+    run_job(store, job.job_id)
+    return job.job_id
+
+
+def _export(store: InMemoryStore, tmp_path, job_id: str, content: str, name: str):
+    path = tmp_path / name
+    path.write_text(content)
+    return store.create_export(
+        job_id=job_id,
+        export_format=OutputFormat.CSV,
+        filename=f"{job_id}.csv",
+        content_type="text/csv",
+        path=str(path),
+        size_bytes=len(content),
+        etag=f'"{content}"',
+    )
+
+
+def test_identical_exports_share_one_file(tmp_path) -> None:
+    store = InMemoryStore()
+    first_job, second_job = _finished_job(store, tmp_path), _finished_job(store, tmp_path)
+
+    first = _export(store, tmp_path, first_job, "same", "a.csv")
+    again = _export(store, tmp_path, first_job, "same", "b.csv")
+    other = _export(store, tmp_path, second_job, "same", "c.csv")
+
+    assert again == first
+    assert other.export_id != first.export_id and other.path == first.path
+    assert not os.path.exists(tmp_path / "b.csv") and not os.path.exists(tmp_path / "c.csv")
+    assert store.metrics().export_bytes == 4
+    assert store.metrics().live_exports == 2
+
+
+def test_exports_over_the_byte_budget_are_dropped_least_recently_used_first(tmp_path) -> None:
+    store = InMemoryStore(retention=RetentionPolicy(max_export_bytes=10))
+    job_id = _finished_job(store, tmp_path)
+    oldest = _export(store, tmp_path, job_id, "aaaa", "a.csv")
+    read = _export(store, tmp_path, job_id, "bbbb", "b.csv")
+    store.get_export(oldest.export_id)
+    _export(store, tmp_path, job_id, "cccc", "c.csv")
+
+    assert store.get_export(read.export_id) is None
+    assert not os.path.exists(read.path)
+    assert store.get_export(oldest.export_id) == oldest
+    assert store.metrics().evicted_exports == 1
+
+
+def test_sweep_drops_finished_jobs_and_their_files_past_the_ttl(tmp_path) -> None:
+    store = InMemoryStore(retention=RetentionPolicy(job_ttl_s=60, export_ttl_s=60))
+    job_id = _finished_job(store, tmp_path)
+    running = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+    spool_path = store.get_sources(job_id)[0].path
+    export = _export(store, tmp_path, job_id, "same", "a.csv")
+
+    assert store.sweep() == []
+    assert store.sweep(datetime.now(timezone.utc) + timedelta(minutes=5)) == [job_id]
+
+    assert store.get_job(job_id) is None
+    assert store.get_job(running.job_id) is not None
+    assert store.get_export(export.export_id) is None
+    assert not os.path.exists(spool_path) and not os.path.exists(export.path)
+    assert store.metrics().live_jobs == 1 and store.metrics().expired_jobs == 1
+
+
+def test_store_calls_for_an_expired_job_raise_not_found(tmp_path) -> None:
+    store = InMemoryStore(retention=RetentionPolicy(job_ttl_s=60))
+    job_id = _finished_job(store, tmp_path)
+    spooled = spool_text("late upload", str(tmp_path))
+    assert store.sweep(datetime.now(timezone.utc) + timedelta(minutes=5)) == [job_id]
+
+    with pytest.raises(JobNotFoundError):
+        store.add_source(job_id, source_type=SourceType.TEXT, filename="late.txt", spooled=spooled)
+    with pytest.raises(JobNotFoundError):
+        store.update_progress(job_id, status=JobStatus.QUEUED, progress=0, current_step="queued")
+    with pytest.raises(JobNotFoundError):
+        store.get_cards(job_id)
+
+
+def test_sweeper_runs_until_stopped() -> None:
+    swept = threading.Event()
+    sweeper = RetentionSweeper(swept.set, interval_s=0.01)
+    sweeper.start()
+    assert swept.wait(5)
+    sweeper.stop()
+    assert sweeper.sweeps >= 1 and sweeper.errors == 0
+
+
+def test_failed_sweeps_are_logged_and_counted(caplog) -> None:
+    calls = 0
+    failed = threading.Event()
+
+    def sweep() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            failed.set()
+        raise OSError("disk gone")
+
+    sweeper = RetentionSweeper(sweep, interval_s=0.01)
+    with caplog.at_level(logging.ERROR, logger="app.retention"):
+        sweeper.start()
+        assert failed.wait(5)
+        sweeper.stop()
+
+    assert sweeper.errors >= 1 and sweeper.sweeps >= 1
+    assert "retention sweep failed" in caplog.text and "disk gone" in caplog.text
+
+
+def test_sweeper_rejects_a_non_positive_interval() -> None:
+    with pytest.raises(ValueError):
+        RetentionSweeper(lambda: None, interval_s=0)
@@ -0,0 +1,122 @@
+from threading import Barrier, Event, Thread
+
+import pytest
+
+from app.scheduler import JobAlreadyActiveError, JobScheduler, QueueFullError
+from app.schemas import JobStatus, OutputFormat
+from app.store import InMemoryStore, JobStore
+
+
+def _job(store: JobStore, tenant_id: str) -> str:
+    return store.create_job(course_name="Course", output_format=[OutputFormat.CSV], tenant_id=tenant_id).job_id
+
+
+def test_dispatch_is_round_robin_across_tenants() -> None:
+    store = InMemoryStore()
+    gate = Event()
+    started: list[str] = []
+
+    def runner(store: JobStore, job_id: str, **_: object) -> None:
+        gate.wait(5)
+        started.append(store.get_job(job_id).tenant_id)
+        store.update_progress(job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+
+    scheduler = JobScheduler(store, max_workers=1, mode="thread", runner=runner)
+    for tenant_id in ["a", "a", "a", "b", "b", "c"]:
+        scheduler.submit(_job(store, tenant_id), tenant_id=tenant_id)
+    gate.set()
+
+    assert scheduler.wait_idle(timeout=5)
+    # the first "a" job was dispatched immediately; the rest alternate between tenants
+    assert started == ["a", "a", "b", "c", "a", "b"]
+    assert scheduler.metrics().completed == 6
+    scheduler.shutdown()
+
+
+def test_queue_is_bounded_and_queued_jobs_can_be_cancelled() -> None:
+    store = InMemoryStore()
+    gate = Event()
+
+    def runner(store: JobStore, job_id: str, *, cancel_event: Event, **_: object) -> None:
+        gate.wait(5)
+        status = JobStatus.CANCELLED if cancel_event.is_set() else JobStatus.DONE
+        store.update_progress(job_id, status=status, progress=100, current_step=status.value)
+
+    scheduler = JobScheduler(store, max_workers=1, max_queue=1, mode="thread", runner=runner)
+    running, queued = _job(store, "a"), _job(store, "a")
+    scheduler.submit(running)
+    scheduler.submit(queued)
+    with pytest.raises(QueueFullError):
+        scheduler.submit(_job(store, "a"))
+
+    assert scheduler.cancel(queued)
+    assert store.get_job(queued).status == JobStatus.CANCELLED
+    assert scheduler.cancel(running)
+    gate.set()
+
+    assert scheduler.wait_idle(timeout=5)
+    assert store.get_job(running).status == JobStatus.CANCELLED
+    assert scheduler.metrics().rejected == 1
+    scheduler.shutdown()
+
+
+def test_concurrent_starts_of_one_job_queue_it_once() -> None:
+    store = InMemoryStore()
+    gate = Event()
+    runs: list[str] = []
+
+    def runner(store: JobStore, job_id: str, **_: object) -> None:
+        runs.append(job_id)
+        gate.wait(5)
+        store.update_progress(job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+
+    scheduler = JobScheduler(store, max_workers=2, mode="thread", runner=runner)
+    job_id = _job(store, "a")
+    barrier = Barrier(2)
+    outcomes: list[str] = []
+
+    def start() -> None:
+        barrier.wait()
+        try:
+            scheduler.submit(job_id)
+            outcomes.append("queued")
+        except JobAlreadyActiveError:
+            outcomes.append("already active")
+
+    threads = [Thread(target=start) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gate.set()
+
+    assert scheduler.wait_idle(timeout=5)
+    assert sorted(outcomes) == ["already active", "queued"]
+    assert runs == [job_id]
+    assert store.get_job(job_id).status == JobStatus.DONE
+    assert scheduler.metrics().completed == 1
+    scheduler.shutdown()
+
+
+def test_submit_many_skips_jobs_already_queued_or_running() -> None:
+    store = InMemoryStore()
+    gate = Event()
+
+    def runner(store: JobStore, job_id: str, **_: object) -> None:
+        gate.wait(5)
+        store.update_progress(job_id, status=JobStatus.DONE, progress=100, current_step="completed")
+
+    scheduler = JobScheduler(store, max_workers=1, max_queue=2, mode="thread", runner=runner)
+    running, first, second, third = (_job(store, "a") for _ in range(4))
+    scheduler.submit(running)
+
+    active, rejected = scheduler.submit_many([(running, "a"), (first, "a"), (first, "a"), (second, "a"), (third, "a")])
+
+    assert active == [running, first]
+    assert rejected == [third]
+    assert store.get_job(second).current_step == "waiting for worker"
+    assert store.get_job(third).current_step == "queued"
+    gate.set()
+    assert scheduler.wait_idle(timeout=5)
+    assert scheduler.metrics().completed == 3
+    scheduler.shutdown()
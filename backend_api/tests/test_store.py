@@ -0,0 +1,200 @@
+import pytest
+
+from app import fastjson
+from app.content_index import ContentIndex
+from app.generation import FakeSlowGenerator, GenerationStage
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.records import CardData
+from app.schemas import JobStatus, OutputFormat, SourceType, ValidationSummary
+from app.sqlite_store import SQLiteStore
+from app.store import InMemoryStore, JobNotFoundError, JobStore, NewJob
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path) -> JobStore:
+    if request.param == "memory":
+        return InMemoryStore()
+    return SQLiteStore(str(tmp_path / "jobs.db"))
+
+
+def test_pipeline_round_trip(store: JobStore, tmp_path) -> None:
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV, OutputFormat.APKG])
+    store.add_source(
+        job.job_id,
+        source_type=SourceType.TEXT,
+        filename="notes.txt",
+        spooled=spool_text(
+            "# Antibiotics\nPenicillin inhibits cell wall synthesis\n# Analgesics\nIbuprofen reduces inflammation\n",
+            str(tmp_path),
+        ),
+    )
+
+    run_job(store, job.job_id)
+
+    loaded = store.get_job(job.job_id)
+    assert loaded is not None
+    assert loaded.status == JobStatus.DONE
+    assert loaded.source_count == 1
+    assert loaded.output_format == [OutputFormat.CSV, OutputFormat.APKG]
+    assert [c.topic for c in store.get_chunks(job.job_id)] == ["Antibiotics", "Analgesics"]
+    assert loaded.validation_summary.passed == len(store.get_cards(job.job_id))
+    assert list(store.iter_cards(job.job_id)) == store.get_cards(job.job_id)
+    assert {type(card) for card in store.get_cards(job.job_id)} == {CardData}
+    assert loaded.validation_summary.failed == len(store.get_failed_cards(job.job_id))
+    assert {stat.rule for stat in loaded.validation_summary.rule_stats} >= {"true_false", "near_duplicate"}
+
+
+def test_rerun_after_adding_a_source_only_processes_the_delta(store: JobStore, tmp_path) -> None:
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+    first = "# Antibiotics\nPenicillin inhibits cell wall synthesis\n# Analgesics\nIbuprofen reduces inflammation\n"
+    spooled = spool_text(first, str(tmp_path))
+    store.add_source(job.job_id, source_type=SourceType.TEXT, filename="week1.txt", spooled=spooled)
+    generator = FakeSlowGenerator(latency_s=0)
+    run_job(store, job.job_id, generation=GenerationStage(generator=generator))
+    before = {chunk.topic: chunk.chunk_id for chunk in store.get_chunks(job.job_id)}
+    cards_before = store.get_cards(job.job_id)
+
+    second = "# Antivirals\nOseltamivir inhibits neuraminidase\n"
+    spooled = spool_text(second, str(tmp_path))
+    store.add_source(job.job_id, source_type=SourceType.TEXT, filename="week2.txt", spooled=spooled)
+    run_job(store, job.job_id, generation=GenerationStage(generator=generator))
+
+    after = {chunk.topic: chunk.chunk_id for chunk in store.get_chunks(job.job_id)}
+    assert store.get_job(job.job_id).status == JobStatus.DONE
+    assert list(after) == ["Antibiotics", "Analgesics", "Antivirals"]
+    assert {topic: after[topic] for topic in before} == before
+    assert generator.calls == 3
+    assert store.get_cards(job.job_id)[:2] == cards_before
+    assert [record.chunk_id for record in store.get_card_records(job.job_id)] == list(after.values())
+    assert store.get_job(job.job_id).validation_summary.total == 3
+    assert {entry.topic: entry.card_count for entry in store.get_chunk_manifest(job.job_id).values()} == {
+        "Antibiotics": 1,
+        "Analgesics": 1,
+        "Antivirals": 1,
+    }
+
+    run_job(store, job.job_id, generation=GenerationStage(generator=generator))
+    assert generator.calls == 3
+
+
+def test_jobs_reuse_earlier_segmentation_and_cards_by_content(store: JobStore, tmp_path) -> None:
+    notes = "# Antibiotics\nPenicillin inhibits cell wall synthesis\n# Analgesics\nIbuprofen reduces inflammation\n"
+    generator = FakeSlowGenerator(latency_s=0)
+    index = ContentIndex()
+
+    def run(text: str) -> str:
+        job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+        store.add_source(
+            job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spool_text(text, str(tmp_path))
+        )
+        run_job(store, job.job_id, generation=GenerationStage(generator=generator), content_index=index)
+        return job.job_id
+
+    first = run(notes)
+    second = run(notes)
+    assert generator.calls == 2
+    assert store.get_job(second).content_reuse.segmentation_reused
+    assert store.get_job(second).content_reuse.reuse_ratio == 1.0
+    assert store.get_cards(second) == store.get_cards(first)
+    (source,) = store.get_sources(second)
+    assert {ref.source_id for chunk in store.get_chunks(second) for ref in chunk.source_refs} == {source.source_id}
+
+    # a near-identical upload: the new topic shifts every offset, so only the chunk texts still match
+    third = run("# Antivirals\nOseltamivir inhibits neuraminidase\n" + notes)
+    reuse = store.get_job(third).content_reuse
+    assert generator.calls == 3
+    assert not reuse.segmentation_reused
+    assert (reuse.chunks, reuse.chunks_reused, reuse.cards_reused) == (3, 2, 2)
+    chunk_ids = {chunk.chunk_id for chunk in store.get_chunks(third)}
+    assert {record.chunk_id for record in store.get_card_records(third)} == chunk_ids
+    assert all(card.extra.endswith(tuple(chunk_ids)) for card in store.get_cards(third))
+    assert index.metrics().chunks_reused == 4
+
+
+def test_pages_follow_position_and_stale_revisions(store: JobStore, tmp_path) -> None:
+    job = store.create_job(course_name="Pharma", output_format=[OutputFormat.CSV])
+    notes = "".join(f"# Topic {i}\nPenicillin inhibits cell wall synthesis {i}\n" for i in range(5))
+    spooled = spool_text(notes, str(tmp_path))
+    store.add_source(job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spooled)
+    run_job(store, job.job_id)
+
+    chunks, after = [], None
+    while True:
+        page = store.get_chunks_page(job.job_id, after=after, limit=2)
+        chunks += fastjson.loads(page.items)
+        after = page.next_after
+        if after is None:
+            break
+    assert chunks == [chunk.to_model().model_dump() for chunk in store.get_chunks(job.job_id)]
+
+    cards = fastjson.loads(store.get_cards_page(job.job_id, limit=1000).items)
+    assert cards == [card.to_model().model_dump() for card in store.get_cards(job.job_id)]
+    failed = fastjson.loads(store.get_failed_cards_page(job.job_id, limit=1000).items)
+    assert failed == [item.to_model().model_dump() for item in store.get_failed_cards(job.job_id)]
+    metadata = fastjson.loads(store.get_chunks_page(job.job_id, limit=1000, fields=("chunk_id", "topic")).items)
+    assert metadata == [{"chunk_id": chunk["chunk_id"], "topic": chunk["topic"]} for chunk in chunks]
+
+    revision = store.get_job(job.job_id).revision
+    run_job(store, job.job_id)
+    assert store.get_job(job.job_id).revision > revision
+
+
+def test_batches_create_jobs_with_sources_and_queue_them_together(store: JobStore, tmp_path) -> None:
+    notes = spool_text("# Antibiotics\nPenicillin inhibits cell wall synthesis\n", str(tmp_path))
+    batch_id, jobs = store.create_batch(
+        [
+            NewJob("Pharma", [OutputFormat.CSV], sources=[(SourceType.TEXT, "notes.txt", notes)]),
+            NewJob("Anatomy", [OutputFormat.APKG], tenant_id="tenant-b"),
+        ]
+    )
+
+    loaded = store.get_batch_jobs(batch_id)
+    assert [job.job_id for job in loaded] == [job.job_id for job in jobs]
+    assert [(job.course_name, job.tenant_id, job.source_count) for job in loaded] == [
+        ("Pharma", "default", 1),
+        ("Anatomy", "tenant-b", 0),
+    ]
+    assert all(job.batch_id == batch_id for job in loaded)
+    assert [source.path for source in store.get_sources(jobs[0].job_id)] == [notes.path]
+    assert store.get_batch_jobs("batch_missing") == []
+
+    store.update_progress_many(
+        [job.job_id for job in jobs], status=JobStatus.QUEUED, progress=0, current_step="waiting for worker"
+    )
+    assert {job.current_step for job in store.get_batch_jobs(batch_id)} == {"waiting for worker"}
+    run_job(store, jobs[0].job_id)
+    assert store.get_job(jobs[0].job_id).status == JobStatus.DONE
+
+
+def test_sqlite_store_survives_reopen(tmp_path) -> None:
+    path = str(tmp_path / "jobs.db")
+    first = SQLiteStore(path)
+    job = first.create_job(course_name="Biochem", output_format=[OutputFormat.CSV])
+    export = first.create_export(
+        job_id=job.job_id,
+        export_format=OutputFormat.CSV,
+        filename="Biochem.csv",
+        content_type="text/csv",
+        path=str(tmp_path / "exp.csv"),
+        size_bytes=16,
+        etag='"abc"',
+    )
+    first.close()
+
+    reopened = SQLiteStore(path)
+    assert reopened.get_job(job.job_id).course_name == "Biochem"
+    assert reopened.get_export(export.export_id).etag == '"abc"'
+    assert reopened.get_job("job_missing") is None
+
+
+def test_writes_to_an_unknown_job_raise_not_found(store: JobStore) -> None:
+    summary = ValidationSummary(total=0, passed=0, failed=0)
+    for write in (
+        lambda: store.update_progress("job_missing", status=JobStatus.PARSING, progress=1, current_step="parsing"),
+        lambda: store.set_chunks("job_missing", []),
+        lambda: store.set_validated_cards("job_missing", [], summary),
+        lambda: store.mark_failed("job_missing", "boom"),
+    ):
+        with pytest.raises(JobNotFoundError):
+            write()
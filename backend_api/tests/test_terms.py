@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+from app.content_index import ContentIndex
+from app.generation import GenerationStage, HeuristicGenerator
+from app.ingest import spool_text
+from app.pipeline import run_job
+from app.records import ChunkData
+from app.schemas import OutputFormat, SourceType
+from app.store import InMemoryStore
+from app.terms import DocumentFrequencies, extract_terms, first_terms, ranked_terms
+
+
+def test_first_terms_matches_full_scan() -> None:
+    text = "Penicillin binds PBPs; penicillin and Vancomycin block cell-wall synthesis in gram-positive bacteria " * 50
+    expected: list[str] = []
+    for token in re.findall(r"\b[A-Za-z][A-Za-z0-9\-]{3,}\b", text):
+        if token.lower() not in {t.lower() for t in expected}:
+            expected.append(token)
+
+    assert first_terms(text, 8) == expected[:8]
+    assert first_terms("a an the", 8) == []
+
+
+def test_frequency_and_tfidf_ranking() -> None:
+    chunks = [
+        "Aspirin inhibits cyclooxygenase. Drug effects: drug drug drug.",
+        "Ibuprofen inhibits cyclooxygenase. Drug effects: drug drug.",
+        "Warfarin inhibits vitamin epoxide reductase. Drug drug.",
+    ]
+    frequencies = DocumentFrequencies.from_texts(chunks)
+
+    assert frequencies.documents == 3 and frequencies.counts["drug"] == 3
+    assert ranked_terms(chunks[0], 2) == ["Drug", "Aspirin"]
+    # "drug" is in every chunk, so tf-idf prefers the chunk's own terms
+    assert ranked_terms(chunks[0], 1, frequencies=frequencies) == ["Aspirin"]
+    with pytest.raises(ValueError):
+        extract_terms(chunks[0], ranking="tfidf")
+
+
+def test_tfidf_generator_binds_job_frequencies() -> None:
+    chunks = [
+        ChunkData(chunk_id=f"chk_{i}", topic="Pharm", subtopic="default", token_estimate=1, text=text)
+        for i, text in enumerate(["Shared shared shared Alpha", "Shared shared Beta", "Shared Gamma"])
+    ]
+    generator = HeuristicGenerator(ranking="tfidf")
+    bound = generator.for_chunks(chunks)
+
+    assert bound.frequencies is not None and bound.prompt_version != generator.prompt_version
+    by_chunk = GenerationStage(generator=generator).run_by_chunk(chunks, course_name="Pharm")
+    assert [[card.correct_answers[0] for card in cards] for cards in by_chunk] == [["Alpha"], ["Beta"], ["Gamma"]]
+
+
+def test_job_frequencies_are_built_once_per_run(tmp_path, monkeypatch) -> None:
+    scans = 0
+    from_texts = DocumentFrequencies.from_texts
+
+    def counting(texts):
+        nonlocal scans
+        scans += 1
+        return from_texts(texts)
+
+    monkeypatch.setattr(DocumentFrequencies, "from_texts", counting)
+    store = InMemoryStore()
+    job = store.create_job(course_name="Pharm", output_format=[OutputFormat.CSV])
+    notes = "# Antibiotics\nPenicillin inhibits cell wall synthesis\n# Analgesics\nIbuprofen reduces inflammation\n"
+    store.add_source(
+        job.job_id, source_type=SourceType.TEXT, filename="notes.txt", spooled=spool_text(notes, str(tmp_path))
+    )
+
+    stage = GenerationStage(generator=HeuristicGenerator(ranking="tfidf"))
+    run_job(store, job.job_id, generation=stage, content_index=ContentIndex())
+
+    assert scans == 1
@@ -0,0 +1,148 @@
+import random
+
+from app.records import CardData
+from app.validation import RULES, RuleRegistry, RuleStats, check_cards, find_near_duplicates, validate_cards
+
+
+def _card(question: str, options: list[str], answers: list[str] | None = None) -> CardData:
+    return CardData(question=question, multiple_choice=options, correct_answers=answers or options[:1], extra="")
+
+
+OPTIONS = ["Penicillin", "Vancomycin", "Linezolid", "Daptomycin", "Cefazolin", "Aztreonam"]
+
+
+def test_reports_first_broken_rule_in_input_order() -> None:
+    cards = [
+        _card("Which drug inhibits cell wall synthesis?", ["True", "False", "a", "b", "c", "d"]),
+        _card("Which drug inhibits cell wall synthesis?", OPTIONS),
+        _card("Drug that inhibits cell wall synthesis", OPTIONS),
+    ]
+
+    passed, failed = validate_cards(cards)
+
+    assert passed == [cards[2]]
+    assert [issue.reason for issue in failed] == [
+        "true/false style options are forbidden",
+        "question starts with forbidden interrogative",
+    ]
+
+
+def test_prompt_rules_and_per_rule_stats() -> None:
+    long_answer = ["A very long and obviously correct answer"]
+    cards = [
+        _card("Drug that, according to the text, blocks cell wall synthesis", OPTIONS),
+        _card("Drug shown in the image", list("ABCDEF"), long_answer),
+        _card("Drug that binds penicillin-binding proteins", list("ABCDEF"), long_answer),
+    ]
+    stats = RuleStats()
+
+    passed, failed = validate_cards(cards, stats=stats)
+
+    assert passed == []
+    assert [issue.reason for issue in failed] == [
+        "phrases like 'according to the text' are forbidden",
+        "question and extra must not refer to the text or image",
+        "correct answers are conspicuously longer than every distractor",
+    ]
+    assert list(stats.hits) == [rule.name for rule in RULES] + ["near_duplicate"]
+    assert stats.hits["according_to"] == stats.hits["source_reference"] == stats.hits["distractor_parity"] == 1
+    assert all(seconds >= 0 for seconds in stats.seconds.values())
+
+
+def test_card_breaking_several_rules_counts_only_under_the_first() -> None:
+    stats = RuleStats()
+    registry = RuleRegistry(RULES)
+    card = _card("Which is right?", ["True", "False", "a", "b", "c", "d"])
+
+    _, failed = validate_cards([card], registry=registry, stats=stats)
+
+    assert [issue.reason for issue in failed] == ["true/false style options are forbidden"]
+    assert {rule: hits for rule, hits in stats.hits.items() if hits} == {"true_false": 1}
+
+
+def test_cheap_rules_rejecting_most_cards_move_first_without_changing_reasons() -> None:
+    registry = RuleRegistry(RULES, warmup_cards=100)
+    assert registry.plan()[:2] == ["true_false", "question_patterns"]
+
+    validate_cards([_card(f"Which drug number {i}?", OPTIONS) for i in range(2000)], registry=registry)
+    validate_cards([_card(f"Drug number {i}", OPTIONS) for i in range(200)], registry=registry)
+    plan = registry.plan()
+    # the question matcher rejected thousands of cards, the true/false check none
+    assert plan.index("question_patterns") < plan.index("true_false")
+
+    stats = RuleStats()
+    tf_and_which = _card("Which is right?", ["True", "False", "a", "b", "c", "d"])
+    _, failed = validate_cards([tf_and_which], registry=registry, stats=stats)
+    assert [issue.reason for issue in failed] == ["true/false style options are forbidden"]
+    assert stats.hits["true_false"] == 1 and stats.hits["interrogative_stem"] == 0
+
+
+def test_column_checks_normalise_like_per_card_checks() -> None:
+    cards = [
+        _card("Drug that blocks cell wall synthesis", ["  TRUE ", "false", "a", "b", "c", "d"]),
+        _card("  WHY does penicillin work", OPTIONS),
+        _card("Drug\x00that, per THE TEXT, works", OPTIONS),
+        _card("Drug that works", ["Penicillin G benzathine", "A", "B", "C", "D", "E"], ["Penicillin G benzathine"]),
+        _card("Drug that works on the textbook example", OPTIONS),
+    ]
+
+    assert check_cards(cards) == [
+        "true/false style options are forbidden",
+        "question starts with forbidden interrogative",
+        "question and extra must not refer to the text or image",
+        "correct answers are conspicuously longer than every distractor",
+        None,
+    ]
+
+
+def test_drops_near_duplicates_across_chunks() -> None:
+    original = _card("Drug that inhibits bacterial cell wall synthesis", OPTIONS)
+    shuffled = _card("Drug that inhibits bacterial cell wall synthesis", list(reversed(OPTIONS)), ["Penicillin"])
+    different = _card("Drug that binds the 50S ribosomal subunit", OPTIONS, ["Linezolid"])
+
+    passed, failed = validate_cards([original, different, shuffled])
+
+    assert passed == [original, different]
+    assert [(issue.reason, issue.card) for issue in failed] == [("near-duplicate of card 1", shuffled)]
+
+
+def test_known_outcomes_are_kept_and_only_new_cards_are_checked() -> None:
+    kept = _card("Drug that inhibits bacterial cell wall synthesis", OPTIONS)
+    known_failure = _card("Which drug is it?", OPTIONS)
+    repeat = _card("Drug that inhibits bacterial cell wall synthesis", list(reversed(OPTIONS)), ["Penicillin"])
+
+    reasons = check_cards([repeat, kept, known_failure], known_reasons={1: None, 2: "reviewed and rejected"})
+
+    # the kept card wins even though the new copy comes first
+    assert reasons == ["near-duplicate of card 2", None, "reviewed and rejected"]
+
+
+def test_prechecked_cards_skip_the_rules_but_are_deduplicated() -> None:
+    vague = _card("Which drug is it?", OPTIONS)
+    original = _card("Drug that inhibits bacterial cell wall synthesis", OPTIONS)
+    repeat = _card("Drug that inhibits bacterial cell wall synthesis", list(reversed(OPTIONS)), ["Penicillin"])
+
+    reasons = check_cards([vague, repeat, original], prechecked=[0, 2])
+
+    assert reasons == [None, None, "near-duplicate of card 2"]
+
+
+def test_token_index_matches_all_pairs() -> None:
+    rng = random.Random(3)
+    vocabulary = [f"t{i}" for i in range(30)]
+    sets = [frozenset(rng.sample(vocabulary, rng.randint(3, 10))) for _ in range(300)]
+    sets += [frozenset(list(s)[:-1]) | {"extra"} for s in rng.sample(sets, 50)]
+
+    expected: dict[int, int] = {}
+    kept: list[int] = []
+    for position, tokens in enumerate(sets):
+        for other in kept:
+            if len(tokens & sets[other]) / len(tokens | sets[other]) >= 0.8:
+                expected[position] = other
+                break
+        else:
+            kept.append(position)
+
+    found = find_near_duplicates(sets, threshold=0.8)
+    assert found.keys() == expected.keys()
+    assert all(len(sets[i] & sets[j]) / len(sets[i] | sets[j]) >= 0.8 for i, j in found.items())